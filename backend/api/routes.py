@@ -1,13 +1,33 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, Response, jsonify, request, current_app, send_file, url_for, stream_with_context
 from werkzeug.utils import secure_filename
+from celery import chain, group
 import os
 import uuid
 import json
-from datetime import datetime
 
 # Import services
 from services.data_service import DataService
 from services.analysis_service import AnalysisService
+from services.export_service import EXPORT_FORMATS
+from services.feature_queries import MVT_MEDIA_TYPE, parse_feature_limit, valid_tile
+from utils.rasters import TILE_FORMATS
+
+# Import response helpers
+from utils.serialization import configure_json
+from utils.compression import init_compression
+from utils.http_cache import make_etag, content_etag, conditional_json, cache_control_header
+from utils.pagination import parse_page_size
+from utils.layer_stats import extent_to_bounds
+from utils.validators import validate_bbox
+from utils.filters import parse_property_filter
+from utils.task_queues import DEFAULT_QUEUE, HEAVY_QUEUE, select_queue
+from utils.pipelines import validate_pipeline
+from utils.events import ANALYSIS_TASK_STATES, subscribe_progress, stream_progress
+from utils.task_results import fetch_task_metas
+from utils.profiling import profiler_from_config
+
+# Upper bound on tasks resolved by one batched status request
+MAX_STATUS_BATCH = 200
 
 # Create blueprints for API endpoints
 health_bp = Blueprint('health', __name__, url_prefix='/api/health')
@@ -19,41 +39,42 @@ analysis_bp = Blueprint('analysis', __name__, url_prefix='/api/analysis')
 def health_check():
     return jsonify({"status": "healthy"})
 
+def _with_next_link(response, next_cursor):
+    """Add an RFC 8288 Link header pointing at the next page"""
+    if next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        url = url_for(request.endpoint, **(request.view_args or {}), **args)
+        response.headers['Link'] = f'<{url}>; rel="next"'
+    return response
+
 # Data endpoints
 @data_bp.route('/datasets', methods=['GET'])
 def get_datasets():
-    # TODO: Implement with actual database queries
-    # This is mock data for development
+    """
+    List datasets, newest first, with keyset pagination
+    
+    Query parameters: user_id, limit, cursor. The URL of the next page is
+    returned in the Link header.
+    """
+    from app import data_service
+    
+    try:
+        limit = parse_page_size(request.args.get('limit'))
+        rows, next_cursor = data_service.list_datasets(
+            user_id=request.args.get('user_id'),
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
     datasets = [
-        {
-            "id": "1",
-            "name": "Land Use 2023",
-            "description": "Current land use classifications for the region",
-            "created_at": "2023-01-15T12:00:00Z",
-            "user_id": "user_1",
-            "file_count": 3,
-            "format": "shapefile"
-        },
-        {
-            "id": "2",
-            "name": "Population Data",
-            "description": "Census population data by district",
-            "created_at": "2023-01-10T14:30:00Z",
-            "user_id": "user_1",
-            "file_count": 1,
-            "format": "geojson"
-        },
-        {
-            "id": "3",
-            "name": "Infrastructure Map",
-            "description": "Roads, utilities and public buildings",
-            "created_at": "2023-01-05T09:15:00Z",
-            "user_id": "user_1",
-            "file_count": 5,
-            "format": "shapefile"
-        }
+        data_service.dataset_to_dict(dataset, file_count, feature_count)
+        for dataset, file_count, feature_count in rows
     ]
-    return jsonify(datasets)
+    response = conditional_json(content_etag(datasets), lambda: datasets)
+    return _with_next_link(response, next_cursor)
 
 @data_bp.route('/datasets/<dataset_id>', methods=['GET'])
 def get_dataset(dataset_id):
@@ -77,249 +98,232 @@ def get_dataset(dataset_id):
 
 @data_bp.route('/datasets/<dataset_id>/layers', methods=['GET'])
 def get_dataset_layers(dataset_id):
-    # TODO: Implement with actual database queries and spatial data retrieval
-    # This is mock data for development
+    """
+    Get a dataset's layers with their features as GeoJSON
+    """
+    from app import data_service
     
-    # Mock different data for different dataset IDs
-    if dataset_id == "1":  # Land Use
-        layers = [
-            {
-                "id": "layer_1",
-                "name": "Land Use Classifications",
-                "dataset_id": dataset_id,
-                "type": "geojson",
-                "extent": {
-                    "north": 40.72,
-                    "south": 40.70,
-                    "east": -74.00,
-                    "west": -74.02
-                },
-                "data": {
-                    "type": "FeatureCollection",
-                    "features": [
-                        {
-                            "type": "Feature",
-                            "properties": {"id": 1, "type": "residential", "area": 1200000},
-                            "geometry": {
-                                "type": "Polygon",
-                                "coordinates": [[
-                                    [-74.01, 40.71],
-                                    [-74.01, 40.72],
-                                    [-74.00, 40.72],
-                                    [-74.00, 40.71],
-                                    [-74.01, 40.71]
-                                ]]
-                            }
-                        },
-                        {
-                            "type": "Feature",
-                            "properties": {"id": 2, "type": "commercial", "area": 800000},
-                            "geometry": {
-                                "type": "Polygon",
-                                "coordinates": [[
-                                    [-74.02, 40.70],
-                                    [-74.02, 40.71],
-                                    [-74.01, 40.71],
-                                    [-74.01, 40.70],
-                                    [-74.02, 40.70]
-                                ]]
-                            }
-                        }
-                    ]
-                },
-                "style": {
-                    "property": "type",
-                    "type": "categorical",
-                    "values": {
-                        "residential": {"color": "#A6CEE3", "opacity": 0.7},
-                        "commercial": {"color": "#33A02C", "opacity": 0.7}
-                    }
-                }
-            }
-        ]
-    elif dataset_id == "2":  # Population Data
-        layers = [
-            {
-                "id": "layer_2",
-                "name": "Population Density",
-                "dataset_id": dataset_id,
-                "type": "geojson",
-                "extent": {
-                    "north": 40.72,
-                    "south": 40.70,
-                    "east": -74.00,
-                    "west": -74.02
-                },
-                "data": {
-                    "type": "FeatureCollection",
-                    "features": [
-                        {
-                            "type": "Feature",
-                            "properties": {"id": 1, "district": "A", "population": 5000, "density": "high"},
-                            "geometry": {
-                                "type": "Polygon",
-                                "coordinates": [[
-                                    [-74.01, 40.71],
-                                    [-74.01, 40.72],
-                                    [-74.00, 40.72],
-                                    [-74.00, 40.71],
-                                    [-74.01, 40.71]
-                                ]]
-                            }
-                        },
-                        {
-                            "type": "Feature",
-                            "properties": {"id": 2, "district": "B", "population": 3000, "density": "medium"},
-                            "geometry": {
-                                "type": "Polygon",
-                                "coordinates": [[
-                                    [-74.02, 40.70],
-                                    [-74.02, 40.71],
-                                    [-74.01, 40.71],
-                                    [-74.01, 40.70],
-                                    [-74.02, 40.70]
-                                ]]
-                            }
-                        }
-                    ]
-                },
-                "style": {
-                    "property": "density",
-                    "type": "categorical",
-                    "values": {
-                        "high": {"color": "#B2182B", "opacity": 0.7},
-                        "medium": {"color": "#FB6A4A", "opacity": 0.7},
-                        "low": {"color": "#FCAE91", "opacity": 0.7}
-                    }
-                }
-            }
-        ]
-    elif dataset_id == "3":  # Infrastructure
-        layers = [
-            {
-                "id": "layer_3",
-                "name": "Roads",
-                "dataset_id": dataset_id,
-                "type": "geojson",
-                "extent": {
-                    "north": 40.72,
-                    "south": 40.70,
-                    "east": -74.00,
-                    "west": -74.02
-                },
-                "data": {
-                    "type": "FeatureCollection",
-                    "features": [
-                        {
-                            "type": "Feature",
-                            "properties": {"id": 1, "name": "Main St", "type": "primary"},
-                            "geometry": {
-                                "type": "LineString",
-                                "coordinates": [
-                                    [-74.02, 40.71],
-                                    [-74.00, 40.71]
-                                ]
-                            }
-                        },
-                        {
-                            "type": "Feature",
-                            "properties": {"id": 2, "name": "Oak Ave", "type": "secondary"},
-                            "geometry": {
-                                "type": "LineString",
-                                "coordinates": [
-                                    [-74.01, 40.70],
-                                    [-74.01, 40.72]
-                                ]
-                            }
-                        }
-                    ]
-                },
-                "style": {
-                    "property": "type",
-                    "type": "categorical",
-                    "values": {
-                        "primary": {"color": "#000000", "weight": 3},
-                        "secondary": {"color": "#555555", "weight": 2}
-                    }
-                }
-            },
-            {
-                "id": "layer_4",
-                "name": "Public Buildings",
-                "dataset_id": dataset_id,
-                "type": "geojson",
-                "data": {
-                    "type": "FeatureCollection",
-                    "features": [
-                        {
-                            "type": "Feature",
-                            "properties": {"id": 1, "name": "City Hall", "type": "government"},
-                            "geometry": {
-                                "type": "Point",
-                                "coordinates": [-74.01, 40.715]
-                            }
-                        },
-                        {
-                            "type": "Feature",
-                            "properties": {"id": 2, "name": "Library", "type": "education"},
-                            "geometry": {
-                                "type": "Point",
-                                "coordinates": [-74.015, 40.71]
-                            }
-                        }
-                    ]
-                },
-                "style": {
-                    "property": "type",
-                    "type": "categorical",
-                    "values": {
-                        "government": {"color": "#FF7F00", "radius": 8},
-                        "education": {"color": "#6A3D9A", "radius": 8}
-                    }
-                }
-            }
+    # Version the response from timestamps so an unchanged dataset is
+    # answered with 304 before any features are loaded
+    version = data_service.get_dataset_layers_version(dataset_id)
+    if version is None:
+        return jsonify({"error": f"Dataset {dataset_id} not found"}), 404
+    
+    def build_layers():
+        return [
+            data_service.layer_to_dict(layer)
+            for layer in data_service.get_layers_for_dataset(dataset_id)
         ]
-    else:
-        layers = []
-        
-    return jsonify(layers)
+    
+    return conditional_json(make_etag('dataset-layers', dataset_id, *version), build_layers)
 
 @data_bp.route('/layers', methods=['GET'])
 def get_all_layers():
-    # TODO: Implement with actual database queries
-    # This is mock data for development
-    layers = [
-        {
-            "id": "layer_1",
-            "name": "Land Use Classifications",
-            "dataset_id": "1",
-            "type": "geojson"
-        },
-        {
-            "id": "layer_2",
-            "name": "Population Density",
-            "dataset_id": "2",
-            "type": "geojson"
-        },
-        {
-            "id": "layer_3",
-            "name": "Roads",
-            "dataset_id": "3",
-            "type": "geojson"
-        },
-        {
-            "id": "layer_4",
-            "name": "Public Buildings",
-            "dataset_id": "3",
-            "type": "geojson"
-        }
-    ]
-    return jsonify(layers)
+    """
+    List layers, newest first, with keyset pagination
+    
+    Query parameters: dataset_id, limit, cursor. The URL of the next page is
+    returned in the Link header.
+    """
+    from app import data_service
+    
+    try:
+        limit = parse_page_size(request.args.get('limit'))
+        page, next_cursor = data_service.list_layers(
+            dataset_id=request.args.get('dataset_id'),
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    layers = [data_service.layer_to_dict(layer, include_data=False) for layer in page]
+    
+    response = conditional_json(content_etag(layers), lambda: layers)
+    return _with_next_link(response, next_cursor)
+
+@data_bp.route('/layers/<layer_id>', methods=['GET'])
+def get_layer(layer_id):
+    """
+    Get a layer's metadata (extent, feature count, style), without features
+    """
+    from app import data_service
+    
+    layer = data_service.get_layer(layer_id)
+    if not layer:
+        return jsonify({"error": f"Layer {layer_id} not found"}), 404
+    
+    return conditional_json(
+        make_etag('layer', layer_id, layer.updated_at),
+        lambda: data_service.layer_to_dict(layer, include_data=False)
+    )
+
+@data_bp.route('/layers/<layer_id>/features', methods=['GET'])
+def get_layer_features(layer_id):
+    """
+    Get a layer's features as GeoJSON, filtered in the database
+    
+    Query parameters:
+        bbox: minx,miny,maxx,maxy in EPSG:4326
+        filter: Attribute filter, repeatable (e.g. filter=type=residential&filter=population>1000)
+        limit: Maximum number of features (default 1000, at most MAX_FEATURES_PER_REQUEST)
+    """
+    from app import data_service
+    
+    layer = data_service.get_layer(layer_id)
+    if not layer:
+        return jsonify({"error": f"Layer {layer_id} not found"}), 404
+    
+    bbox = None
+    if request.args.get('bbox'):
+        bbox = request.args['bbox'].split(',')
+        if not validate_bbox(bbox):
+            return jsonify({"error": "bbox must be minx,miny,maxx,maxy in EPSG:4326"}), 400
+    
+    try:
+        limit = parse_feature_limit(request.args.get('limit'))
+        filters = [parse_property_filter(f) for f in request.args.getlist('filter')]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def build_features():
+        return data_service.get_layer_geojson(layer_id, bbox=bbox, limit=limit, filters=filters)
+    
+    etag = make_etag('layer-features', layer_id, layer.updated_at, request.query_string.decode())
+    return conditional_json(etag, build_features)
+
+@data_bp.route('/layers/<layer_id>/tiles/<int:z>/<int:x>/<int:y>.<tile_format>', methods=['GET'])
+def get_layer_tile(layer_id, z, x, y, tile_format):
+    """
+    Get one XYZ tile of a layer
+    
+    Vector layers are served as Mapbox Vector Tiles (.mvt), raster layers
+    as PNG or WebP images (.png, .webp). Answers 204 for empty tiles.
+    """
+    from app import data_service, raster_tiles
+    
+    if not valid_tile(z, x, y):
+        return jsonify({"error": f"No tile {z}/{x}/{y}"}), 404
+    
+    layer = data_service.get_layer(layer_id)
+    if not layer:
+        return jsonify({"error": f"Layer {layer_id} not found"}), 404
+    
+    formats = list(TILE_FORMATS) if layer.layer_type == 'raster' else ['mvt']
+    if tile_format not in formats:
+        return jsonify({"error": f"Layer {layer_id} has no {tile_format} tiles (use {', '.join(formats)})"}), 404
+    
+    etag = make_etag('layer-tile', layer_id, layer.updated_at, z, x, y, tile_format)
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        if tile_format == 'mvt':
+            tile, mimetype = data_service.get_layer_tile(layer_id, z, x, y), MVT_MEDIA_TYPE
+        else:
+            tile, mimetype = raster_tiles.render(layer, z, x, y, tile_format), TILE_FORMATS[tile_format][1]
+        if tile:
+            response = Response(tile, mimetype=mimetype)
+        else:
+            response = current_app.response_class(status=204)
+    
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = cache_control_header(current_app.config['TILE_MAX_AGE'])
+    return response
+
+@data_bp.route('/layers/<layer_id>/statistics', methods=['GET'])
+def get_layer_statistics(layer_id):
+    """
+    Get a layer's materialized statistics (extent, counts, attribute summaries)
+    """
+    from app import data_service
+    
+    record = data_service.get_layer_statistics(layer_id)
+    if record is None:
+        return jsonify({"error": f"No statistics for layer {layer_id}"}), 404
+    
+    def build_statistics():
+        statistics = data_service.statistics_to_dict(record)
+        statistics["layer_id"] = layer_id
+        statistics["bounds"] = extent_to_bounds(statistics["extent"])
+        return statistics
+    
+    return conditional_json(make_etag('layer-statistics', layer_id, record.updated_at), build_statistics)
+
+@data_bp.route('/layers/<layer_id>/export', methods=['GET'])
+def download_layer_export(layer_id):
+    """
+    Export a layer as GeoJSON, GeoPackage, zipped Shapefile or GeoParquet
+    
+    Layers up to EXPORT_SYNC_MAX_FEATURES features are exported within the
+    request, GeoJSON being streamed as it is read. Larger layers are
+    exported by a background job; the 202 response points to its status,
+    which returns a presigned S3 URL when done.
+    
+    Query parameters:
+        format: geojson (default), gpkg, shp or parquet
+        async: true to always export in the background
+    """
+    from app import data_service, export_service, export_layer
+    
+    export_format = request.args.get('format', 'geojson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format: {export_format}. Use one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    layer = data_service.get_layer(layer_id)
+    if not layer:
+        return jsonify({"error": f"Layer {layer_id} not found"}), 404
+    
+    feature_count = layer.statistics.feature_count if layer.statistics else None
+    run_async = request.args.get('async', 'false').lower() == 'true' or (
+        feature_count is None or feature_count > current_app.config['EXPORT_SYNC_MAX_FEATURES']
+    )
+    
+    if run_async:
+        task = export_layer.apply_async(args=[layer_id, export_format], queue=HEAVY_QUEUE)
+        return jsonify({
+            "task_id": task.id,
+            "status": "pending",
+            "status_url": url_for('data.get_export_status', task_id=task.id)
+        }), 202
+    
+    filename = export_service.export_filename(layer, export_format)
+    mimetype = EXPORT_FORMATS[export_format]['mimetype']
+    
+    if export_format == 'geojson':
+        return Response(
+            stream_with_context(export_service.iter_geojson(layer_id)),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+    
+    # Container formats need a seekable file; it is removed once sent
+    path = export_service.export_to_file(layer_id, export_format)
+    response = send_file(path, mimetype=mimetype, as_attachment=True, download_name=filename)
+    response.call_on_close(lambda: os.remove(path))
+    return response
+
+@data_bp.route('/exports/<task_id>', methods=['GET'])
+def get_export_status(task_id):
+    """
+    Check the status of a background layer export
+    """
+    from app import celery
+    
+    task = celery.AsyncResult(task_id)
+    response = {"task_id": task_id, "state": task.state}
+    if task.state == 'SUCCESS':
+        response["result"] = task.result
+    elif task.state == 'FAILURE':
+        response["error"] = str(task.result)
+    return jsonify(response)
 
 @data_bp.route('/upload', methods=['POST'])
 def upload_data():
     """
-    Handle upload of spatial data files
+    Handle upload of spatial data files into a new dataset
+    
+    Form fields: name, description, user_id, link_existing (default true),
+    profile (true to store a stage timing profile in the dataset's metadata).
     """
     if 'files' not in request.files:
         return jsonify({"error": "No files part"}), 400
@@ -334,20 +338,31 @@ def upload_data():
         
     description = request.form.get('description', '')
     
-    # TODO: In a real implementation, we would:
-    # 1. Save the files to a temporary location
-    # 2. Validate the files are valid spatial data
-    # 3. Process and import them into the database
-    # 4. Store metadata and file references
+    from app import data_service
+    
+    dataset = data_service.create_dataset(name, description, request.form.get('user_id'))
+    
+    # Files uploaded before are linked to their ingested layer unless link_existing=false
+    profiler = None
+    if current_app.config['PROFILE_TASKS']:
+        profiler = profiler_from_config(current_app.config)
+    elif request.form.get('profile') == 'true':
+        # Clients only get timings: memory tracing would slow every request
+        # this process serves
+        profiler = profiler_from_config(current_app.config, timings_only=True)
+    result = data_service.process_uploaded_files(
+        files,
+        dataset.id,
+        profiler=profiler,
+        link_existing=request.form.get('link_existing', 'true').lower() != 'false'
+    )
     
-    # Mock response for development
-    dataset_id = str(uuid.uuid4())
     return jsonify({
-        "id": dataset_id,
+        "id": dataset.id,
         "name": name,
         "description": description,
-        "processed_files": len(files),
-        "created_at": datetime.now().isoformat()
+        **result,
+        "created_at": dataset.created_at.isoformat()
     }), 201
 
 # Analysis endpoints
@@ -387,7 +402,13 @@ def get_recent_analyses():
 def start_analysis():
     """
     Start a new analysis job
+    
+    The job is routed to the light or heavy analysis queue based on the
+    analysis type and the dataset's feature count. With "profile": true the
+    analysis' result metadata records per-stage timings and memory.
     """
+    from app import analysis_service, analyze_data, data_service
+    
     data = request.json
     if not data:
         return jsonify({"error": "No data provided"}), 400
@@ -399,201 +420,359 @@ def start_analysis():
     analysis_type = data.get('analysis_type')
     if not analysis_type:
         return jsonify({"error": "analysis_type is required"}), 400
+    if analysis_type not in analysis_service.ANALYSIS_TYPES:
+        return jsonify({"error": f"Unsupported analysis type: {analysis_type}"}), 400
         
     parameters = data.get('parameters', {})
     
-    # TODO: In a real implementation, we would:
-    # 1. Validate the parameters based on the analysis type
-    # 2. Submit the analysis job to Celery
-    # 3. Return the task ID for status checking
+    if not data_service.get_dataset(dataset_id):
+        return jsonify({"error": f"Dataset {dataset_id} not found"}), 404
+    
+    feature_count = data_service.get_dataset_feature_count(dataset_id)
+    queue, priority = select_queue(
+        analysis_type,
+        feature_count,
+        current_app.config['ANALYSIS_HEAVY_FEATURE_THRESHOLD']
+    )
     
-    # Mock response for development
+    # Record the task ID before dispatch so status lookups never miss it
     task_id = str(uuid.uuid4())
+    analysis = analysis_service.create_analysis(
+        name=data.get('name') or f"{analysis_type.capitalize()} Analysis",
+        analysis_type=analysis_type,
+        dataset_id=dataset_id,
+        user_id=data.get('user_id'),
+        parameters=parameters,
+        task_id=task_id
+    )
+    
+    analyze_data.apply_async(
+        args=[dataset_id, analysis_type, parameters],
+        kwargs={"analysis_id": analysis.id, "profile": bool(data.get('profile'))},
+        task_id=task_id,
+        queue=queue,
+        priority=priority
+    )
+    
     return jsonify({
         "task_id": task_id,
+        "analysis_id": analysis.id,
         "status": "pending",
+        "queue": queue,
         "dataset_id": dataset_id,
         "analysis_type": analysis_type,
         "parameters": parameters
     }), 202
 
+def _analysis_status(state, info, analysis, output_layers=None):
+    """
+    Build the status response for an analysis task
+    
+    Args:
+        state: Celery task state
+        info: Celery task info (progress meta, result or exception)
+        analysis: Analysis run by the task (or None)
+        output_layers: Preloaded output layers of the analysis (optional)
+        
+    Returns:
+        Status dictionary
+    """
+    from app import analysis_service
+    
+    if analysis and analysis.status in ('completed', 'failed'):
+        # The Analysis row outlives the task result, which expires
+        state = ANALYSIS_TASK_STATES[analysis.status]
+    
+    if state == 'PENDING':
+        # Task is pending execution
+        response = {
+            "state": "PENDING",
+            "status": "Analysis is pending execution"
+        }
+    elif state == 'STARTED':
+        # Task is currently running
+        response = {
+            "state": "STARTED",
+            "status": "Analysis is in progress"
+        }
+    elif state == 'PROGRESS':
+        # Task is running a chunked analysis
+        response = {
+            "state": "PROGRESS",
+            "status": "Analysis is in progress",
+            "progress": info.get('progress') if isinstance(info, dict) else None
+        }
+    elif state == 'SUCCESS':
+        # Task completed successfully
+        response = {
+            "state": "SUCCESS",
+            "status": "Analysis completed",
+            "result": analysis_service.result_reference(analysis, output_layers) if analysis else info
+        }
+    elif state == 'FAILURE':
+        # Task failed
+        if analysis and analysis.result_metadata:
+            error = analysis.result_metadata.get('error')
+        else:
+            error = str(info)
+        response = {
+            "state": "FAILURE",
+            "status": "Analysis failed",
+            "error": error
+        }
+    else:
+        # Some other state
+        response = {
+            "state": state,
+            "status": "Analysis status unknown"
+        }
+    
+    # The Analysis row keeps progress across retries and restarts
+    if analysis:
+        response["analysis_id"] = analysis.id
+        response["layers_url"] = url_for('analysis.get_analysis_layers', analysis_id=analysis.id)
+        if response.get("progress") is None:
+            response["progress"] = analysis.progress or 0
+    
+    return response
+
 @analysis_bp.route('/status/<task_id>', methods=['GET'])
 def check_analysis_status(task_id):
     """
     Check the status of an analysis task
+    
+    Successful tasks return a reference to the analysis and its output
+    layers; features are fetched from the layer endpoints.
     """
+    from app import celery, analysis_service
+    
     try:
-        # TODO: Implement with actual Celery task status checking
-        # Get the task result
-        from app import celery
         task = celery.AsyncResult(task_id)
+        analysis = analysis_service.get_analysis_by_task_id(task_id)
+        return jsonify(_analysis_status(task.state, task.info, analysis))
+    except Exception as e:
+        current_app.logger.error(f"Error checking status of task {task_id}: {e}")
+        return jsonify({"error": "Analysis status is unavailable"}), 503
+
+@analysis_bp.route('/status', methods=['POST'])
+def check_analysis_statuses():
+    """
+    Check the status of many analyses at once
+    
+    Accepts {"task_ids": [...], "analysis_ids": [...]} and resolves them with
+    one query on analyses and one read of the Celery result backend.
+    """
+    from app import celery, analysis_service
+    
+    data = request.get_json(silent=True) or {}
+    task_ids = data.get('task_ids') or []
+    analysis_ids = data.get('analysis_ids') or []
+    
+    if not isinstance(task_ids, list) or not isinstance(analysis_ids, list) \
+            or not all(isinstance(i, str) for i in task_ids + analysis_ids):
+        return jsonify({"error": "task_ids and analysis_ids must be lists of strings"}), 400
+    if len(task_ids) + len(analysis_ids) > MAX_STATUS_BATCH:
+        return jsonify({"error": f"At most {MAX_STATUS_BATCH} IDs can be checked at once"}), 400
+    
+    try:
+        analyses = analysis_service.get_analyses_for_tasks(task_ids, analysis_ids)
+        by_task = {analysis.task_id: analysis for analysis in analyses if analysis.task_id}
+        by_id = {analysis.id: analysis for analysis in analyses}
         
-        if task.state == 'PENDING':
-            # Task is pending execution
-            response = {
-                "state": "PENDING",
-                "status": "Analysis is pending execution"
-            }
-        elif task.state == 'STARTED':
-            # Task is currently running
-            response = {
-                "state": "STARTED",
-                "status": "Analysis is in progress"
-            }
-        elif task.state == 'SUCCESS':
-            # Task completed successfully
-            response = {
-                "state": "SUCCESS",
-                "status": "Analysis completed",
-                "result": task.result
-            }
-        elif task.state == 'FAILURE':
-            # Task failed
-            response = {
-                "state": "FAILURE",
-                "status": "Analysis failed",
-                "error": str(task.result)
-            }
-        else:
-            # Some other state
-            response = {
-                "state": task.state,
-                "status": "Analysis status unknown"
-            }
-            
-        return jsonify(response)
+        # (task ID, analysis) for every requested ID that could be resolved
+        requested = [(task_id, by_task.get(task_id)) for task_id in task_ids]
+        requested += [
+            (by_id[analysis_id].task_id, by_id[analysis_id])
+            for analysis_id in analysis_ids if analysis_id in by_id
+        ]
+        
+        # Only tasks that have not finished need their live state
+        live_task_ids = {
+            task_id for task_id, analysis in requested
+            if task_id and not (analysis and analysis.status in ('completed', 'failed'))
+        }
+        metas = fetch_task_metas(celery.backend, live_task_ids)
+        
+        output_layers = analysis_service.get_output_layers_for_analyses(
+            [analysis for analysis in analyses if analysis.status == 'completed']
+        )
+        
+        statuses = []
+        for task_id, analysis in requested:
+            meta = metas.get(task_id) or {}
+            status = _analysis_status(
+                meta.get('status', 'PENDING'),
+                meta.get('result'),
+                analysis,
+                output_layers.get(analysis.id) if analysis else None
+            )
+            status["task_id"] = task_id
+            statuses.append(status)
+        
+        return jsonify({
+            "statuses": statuses,
+            "not_found": [analysis_id for analysis_id in analysis_ids if analysis_id not in by_id]
+        })
     except Exception as e:
-        # For development, return mock data if task lookup fails
-        status = {
-            "state": "SUCCESS",
-            "status": "Analysis completed",
-            "result": {
-                "task_id": task_id,
-                "output_layers": [
-                    {
-                        "id": "analysis_layer_1",
-                        "name": "Analysis Result",
-                        "type": "geojson",
-                        "data": {
-                            "type": "FeatureCollection",
-                            "features": [
-                                {
-                                    "type": "Feature",
-                                    "properties": {"cluster": 0},
-                                    "geometry": {
-                                        "type": "Polygon",
-                                        "coordinates": [[
-                                            [-74.01, 40.71],
-                                            [-74.01, 40.72],
-                                            [-74.00, 40.72],
-                                            [-74.00, 40.71],
-                                            [-74.01, 40.71]
-                                        ]]
-                                    }
-                                },
-                                {
-                                    "type": "Feature",
-                                    "properties": {"cluster": 1},
-                                    "geometry": {
-                                        "type": "Polygon",
-                                        "coordinates": [[
-                                            [-74.02, 40.70],
-                                            [-74.02, 40.71],
-                                            [-74.01, 40.71],
-                                            [-74.01, 40.70],
-                                            [-74.02, 40.70]
-                                        ]]
-                                    }
-                                }
-                            ]
-                        },
-                        "style": {
-                            "property": "cluster",
-                            "type": "categorical",
-                            "values": {
-                                "0": {"color": "#1f77b4", "opacity": 0.7},
-                                "1": {"color": "#ff7f0e", "opacity": 0.7}
-                            }
-                        }
-                    }
-                ],
-                "statistics": {
-                    "clusters": 2,
-                    "features_per_cluster": [1, 1],
-                    "total_area": 2000000
-                }
-            }
+        current_app.logger.error(f"Error checking status of {len(task_ids) + len(analysis_ids)} analyses: {e}")
+        return jsonify({"error": "Analysis status is unavailable"}), 503
+
+@analysis_bp.route('/events/<task_id>', methods=['GET'])
+def stream_analysis_events(task_id):
+    """
+    Stream an analysis task's state and progress as Server-Sent Events
+    
+    Events are pushed from Redis pub/sub as the worker publishes them; the
+    initial state comes from the Analysis row, not the Celery result backend.
+    Each open stream holds a worker thread here; async_app serves the same
+    path without one.
+    """
+    from app import analysis_service
+    
+    pubsub = subscribe_progress(current_app.config['REDIS_URL'], task_id)
+    
+    analysis = analysis_service.get_analysis_by_task_id(task_id)
+    if analysis:
+        initial = {
+            "state": ANALYSIS_TASK_STATES.get(analysis.status, 'PENDING'),
+            "analysis_id": analysis.id,
+            "progress": analysis.progress or 0
+        }
+        if analysis.status == 'completed':
+            initial["result"] = analysis_service.result_reference(analysis)
+    else:
+        # Analyses are recorded before dispatch: no events will ever come
+        initial = {"state": 'FAILURE', "error": f"No analysis for task {task_id}"}
+    
+    return Response(
+        stream_with_context(stream_progress(
+            pubsub,
+            initial=initial,
+            heartbeat=current_app.config['SSE_HEARTBEAT_SECONDS']
+        )),
+        mimetype='text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy buffering (nginx) so events arrive immediately
+            "X-Accel-Buffering": "no"
         }
-        return jsonify(status)
+    )
+
+@analysis_bp.route('/pipelines', methods=['POST'])
+def start_pipeline():
+    """
+    Start a pipeline of analysis steps
+    
+    Takes {"dataset_id", "name", "steps": [{"id", "type", "parameters",
+    "inputs", "targets", "keep"}]}. Steps are run stage by stage as a Celery
+    chain; steps within a stage run in parallel as a group (a chord when
+    followed by another stage). Steps pass results as layer IDs.
+    """
+    from app import analysis_service, analyze_data, data_service, finish_pipeline
+    
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+    
+    dataset_id = data.get('dataset_id')
+    if not dataset_id:
+        return jsonify({"error": "dataset_id is required"}), 400
+    
+    steps = data.get('steps')
+    try:
+        stages = validate_pipeline(steps, analysis_service.ANALYSIS_TYPES)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if not data_service.get_dataset(dataset_id):
+        return jsonify({"error": f"Dataset {dataset_id} not found"}), 404
+    
+    # Record every task ID before dispatch so status lookups never miss them
+    task_id = str(uuid.uuid4())
+    pipeline, analyses = analysis_service.create_pipeline(
+        name=data.get('name') or "Analysis Pipeline",
+        dataset_id=dataset_id,
+        user_id=data.get('user_id'),
+        steps=steps,
+        stages=stages,
+        task_id=task_id
+    )
+    
+    feature_count = data_service.get_dataset_feature_count(dataset_id)
+    
+    # A step that fails for good stops the chain before its last task, so
+    # every step finalizes the pipeline (and removes its temporary layers)
+    # on error as well
+    on_failure = finish_pipeline.si(pipeline.id).set(queue=DEFAULT_QUEUE)
+    
+    def step_signature(step_id):
+        analysis = analyses[step_id]
+        queue, priority = select_queue(
+            analysis.analysis_type,
+            feature_count,
+            current_app.config['ANALYSIS_HEAVY_FEATURE_THRESHOLD']
+        )
+        # Immutable: steps read their inputs from the database, not from
+        # the previous task's return value
+        return analyze_data.si(
+            dataset_id, analysis.analysis_type, analysis.parameters, analysis_id=analysis.id
+        ).set(task_id=analysis.task_id, queue=queue, priority=priority).on_error(on_failure)
+    
+    workflow = chain(
+        *[
+            group(*[step_signature(step_id) for step_id in stage]) if len(stage) > 1
+            else step_signature(stage[0])
+            for stage in stages
+        ],
+        finish_pipeline.si(pipeline.id).set(task_id=task_id, queue=DEFAULT_QUEUE)
+    )
+    workflow.apply_async()
+    
+    return jsonify(analysis_service.pipeline_to_dict(pipeline)), 202
+
+@analysis_bp.route('/pipelines/<pipeline_id>', methods=['GET'])
+def get_pipeline(pipeline_id):
+    """
+    Get a pipeline's status and the status of each step
+    """
+    from app import analysis_service
+    
+    pipeline = analysis_service.get_pipeline(pipeline_id)
+    if not pipeline:
+        return jsonify({"error": f"Pipeline {pipeline_id} not found"}), 404
+    
+    return jsonify(analysis_service.pipeline_to_dict(pipeline))
 
 @analysis_bp.route('/<analysis_id>/layers', methods=['GET'])
 def get_analysis_layers(analysis_id):
     """
     Get the layers associated with an analysis result
     """
-    # TODO: Implement with actual database queries
-    # Mock response for development
-    layers = [
-        {
-            "id": "analysis_layer_1",
-            "name": "Analysis Result",
-            "analysis_id": analysis_id,
-            "type": "geojson",
-            "extent": {
-                "north": 40.72,
-                "south": 40.70,
-                "east": -74.00,
-                "west": -74.02
-            },
-            "data": {
-                "type": "FeatureCollection",
-                "features": [
-                    {
-                        "type": "Feature",
-                        "properties": {"cluster": 0},
-                        "geometry": {
-                            "type": "Polygon",
-                            "coordinates": [[
-                                [-74.01, 40.71],
-                                [-74.01, 40.72],
-                                [-74.00, 40.72],
-                                [-74.00, 40.71],
-                                [-74.01, 40.71]
-                            ]]
-                        }
-                    },
-                    {
-                        "type": "Feature",
-                        "properties": {"cluster": 1},
-                        "geometry": {
-                            "type": "Polygon",
-                            "coordinates": [[
-                                [-74.02, 40.70],
-                                [-74.02, 40.71],
-                                [-74.01, 40.71],
-                                [-74.01, 40.70],
-                                [-74.02, 40.70]
-                            ]]
-                        }
-                    }
-                ]
-            },
-            "style": {
-                "property": "cluster",
-                "type": "categorical",
-                "values": {
-                    "0": {"color": "#1f77b4", "opacity": 0.7},
-                    "1": {"color": "#ff7f0e", "opacity": 0.7}
-                }
-            }
-        }
-    ]
-    return jsonify(layers)
+    from app import analysis_service, data_service
+    
+    analysis = analysis_service.get_analysis(analysis_id)
+    if not analysis:
+        return jsonify({"error": f"Analysis {analysis_id} not found"}), 404
+    
+    def build_layers():
+        return [
+            data_service.layer_to_dict(layer)
+            for layer in analysis_service.get_output_layers(analysis_id)
+        ]
+    
+    # Output layers never change once an analysis has completed
+    etag = make_etag('analysis-layers', analysis.id, analysis.status, analysis.completed_at)
+    max_age = current_app.config['ANALYSIS_LAYERS_MAX_AGE'] if analysis.status == 'completed' else 0
+    return conditional_json(etag, build_layers, max_age=max_age)
 
 def register_routes(app):
     """
     Register all API blueprints
     """
+    # Fast JSON encoding and negotiated compression for every blueprint
+    configure_json(app)
+    init_compression(app)
+    
     app.register_blueprint(health_bp)
     app.register_blueprint(data_bp)
     app.register_blueprint(analysis_bp)
\ No newline at end of file
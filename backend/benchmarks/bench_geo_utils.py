@@ -0,0 +1,74 @@
+"""
+Benchmark the geometry helpers in utils.geo_utils
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_geo_utils --sizes 1k,10k --output geo_utils.json
+"""
+import argparse
+import warnings
+
+from benchmarks.datagen import GEOMETRY_KINDS, parse_size, random_geodataframe
+from benchmarks.harness import Report, measure
+from utils import geo_utils
+
+# geo_utils works one geometry at a time; larger sizes only measure Python overhead
+DEFAULT_SIZES = '1k,10k'
+
+
+def run(sizes, repeat, report):
+    """
+    Run the geo_utils benchmarks
+
+    Args:
+        sizes: List of feature counts
+        repeat: Timed runs per benchmark
+        report: Report to add results to
+    """
+    for count in sizes:
+        for kind in GEOMETRY_KINDS:
+            geoms = list(random_geodataframe(count, kind).geometry)
+            mappings = [geom.__geo_interface__ for geom in geoms]
+            label = f"{kind}/{count}"
+
+            def each(func):
+                return lambda: [func(geom) for geom in geoms]
+
+            report.add(f"geo_utils.reproject_geometry/{label}",
+                       measure(each(lambda g: geo_utils.reproject_geometry(g, 4326, 3857)), repeat), features=count)
+            report.add(f"geo_utils.simplify_geometry/{label}",
+                       measure(each(geo_utils.simplify_geometry), repeat), features=count)
+            report.add(f"geo_utils.geojson_to_shapely/{label}",
+                       measure(lambda: [geo_utils.geojson_to_shapely(m) for m in mappings], repeat), features=count)
+
+            if kind == 'polygon':
+                report.add(f"geo_utils.calculate_area/{label}",
+                           measure(each(geo_utils.calculate_area), repeat), features=count)
+            if kind == 'line':
+                report.add(f"geo_utils.calculate_length/{label}",
+                           measure(each(geo_utils.calculate_length), repeat), features=count)
+            if kind == 'point':
+                pairs = list(zip(geoms, geoms[1:]))
+                report.add(f"geo_utils.haversine_distance/{label}",
+                           measure(lambda: [geo_utils.haversine_distance(a.x, a.y, b.x, b.y) for a, b in pairs],
+                                   repeat), features=count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Comma-separated sizes (1k, 10k, ... or integers)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    # geo_utils still calls the deprecated pyproj.transform once per geometry
+    warnings.simplefilter('ignore', FutureWarning)
+
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    report = Report('geo_utils', sizes=sizes)
+    run(sizes, args.repeat, report)
+    if args.output:
+        report.write(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark JSON encoding and response compression on a large layer
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_serialization --features 100000 [--output serialization.json]
+"""
+import argparse
+import json
+import time
+
+from benchmarks.datagen import random_feature_collection
+from benchmarks.harness import Report
+from utils.compression import DEFAULT_LEVELS, available_compressors
+from utils.serialization import orjson, orjson_dumps
+
+
+def _time(func, repeat):
+    """Return the best wall time of `repeat` calls and the last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _stdlib_dumps(obj):
+    # Mirrors Flask's DefaultJSONProvider (sorted keys, ASCII output)
+    return json.dumps(obj, sort_keys=True, ensure_ascii=True).encode('utf-8')
+
+
+def run(feature_count, repeat):
+    """
+    Run the serialization benchmark
+
+    Args:
+        feature_count: Number of features in the synthetic layer
+        repeat: Number of repetitions per measurement
+
+    Returns:
+        Dictionary with encode and compression results
+    """
+    layer = random_feature_collection(feature_count)
+
+    encoders = {'json': _stdlib_dumps}
+    if orjson is not None:
+        encoders['orjson'] = orjson_dumps
+
+    report = {"features": feature_count, "encode": {}, "compress": {}}
+    body = None
+    for name, dumps in encoders.items():
+        seconds, body = _time(lambda: dumps(layer), repeat)
+        report["encode"][name] = {"seconds": seconds, "bytes": len(body)}
+
+    # Compress the output of the fastest available encoder
+    for name, compress in available_compressors().items():
+        level = DEFAULT_LEVELS[name]
+        seconds, compressed = _time(lambda: compress(body, level), repeat)
+        report["compress"][name] = {
+            "level": level,
+            "seconds": seconds,
+            "bytes": len(compressed),
+            "ratio": len(body) / len(compressed),
+        }
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--features', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    parser.add_argument('--output', help="Write a report comparable with benchmarks.compare to this file")
+    args = parser.parse_args()
+
+    report = run(args.features, args.repeat)
+    if args.output:
+        comparable = Report('serialization', features=args.features)
+        for group in ("encode", "compress"):
+            for name, stats in report[group].items():
+                # Best-of-N timings; min and median are both the best run
+                comparable.results[f"{group}/{name}/{args.features}"] = {
+                    "min": stats["seconds"], "median": stats["seconds"], "runs": args.repeat, **stats
+                }
+        comparable.write(args.output)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Layer with {report['features']} features")
+    for name, stats in report["encode"].items():
+        print(f"  encode {name:8s} {stats['seconds'] * 1000:9.1f} ms  {stats['bytes']:>12,d} bytes")
+    for name, stats in report["compress"].items():
+        print(f"  {name:6s} (level {stats['level']}) {stats['seconds'] * 1000:9.1f} ms  "
+              f"{stats['bytes']:>12,d} bytes  x{stats['ratio']:.1f}")
+
+
+if __name__ == '__main__':
+    main()
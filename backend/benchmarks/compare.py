@@ -0,0 +1,81 @@
+"""
+Compare two benchmark reports and flag regressions
+
+Usage (from the backend directory):
+    python -m benchmarks.compare baseline.json current.json --threshold 0.1
+
+Exits with status 1 if any benchmark's median got slower by more than the
+threshold, so it can gate CI.
+"""
+import argparse
+import sys
+
+from benchmarks.harness import load_report
+
+
+def compare(baseline, current, threshold=0.1, metric='median'):
+    """
+    Compare the results of two reports
+
+    Args:
+        baseline: Baseline report dictionary
+        current: Current report dictionary
+        threshold: Relative slowdown counted as a regression (0.1 = 10%)
+        metric: Timing statistic to compare
+
+    Returns:
+        List of (name, baseline seconds, current seconds, relative change, status)
+        tuples; status is 'regression', 'improvement', 'ok', 'new' or 'missing'
+    """
+    rows = []
+    names = sorted(set(baseline["results"]) | set(current["results"]))
+    for name in names:
+        before = baseline["results"].get(name, {}).get(metric)
+        after = current["results"].get(name, {}).get(metric)
+        if before is None:
+            rows.append((name, None, after, None, 'new'))
+            continue
+        if after is None:
+            rows.append((name, before, None, None, 'missing'))
+            continue
+
+        change = (after - before) / before if before else 0.0
+        if change > threshold:
+            status = 'regression'
+        elif change < -threshold:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append((name, before, after, change, status))
+    return rows
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:10.1f}" if seconds is not None else f"{'-':>10s}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=0.1, help="Relative slowdown that fails (default 0.1)")
+    parser.add_argument('--metric', default='median', choices=['min', 'median', 'mean', 'max'])
+    args = parser.parse_args()
+
+    baseline = load_report(args.baseline)
+    current = load_report(args.current)
+    rows = compare(baseline, current, args.threshold, args.metric)
+
+    print(f"{baseline['meta'].get('commit')} -> {current['meta'].get('commit')} ({args.metric}, ms)")
+    for name, before, after, change, status in rows:
+        delta = f"{change:+7.1%}" if change is not None else f"{'':7s}"
+        print(f"  {name:45s} {_ms(before)} {_ms(after)} {delta}  {status}")
+
+    regressions = [row for row in rows if row[4] == 'regression']
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+import random
+
+# Default extent for synthetic data (roughly the New York area used by the mock layers)
+DEFAULT_EXTENT = (-74.3, 40.5, -73.7, 40.9)
+
+LAND_USE_TYPES = ['residential', 'commercial', 'industrial', 'park', 'water']
+
+
+def random_polygon_feature(rng, feature_id, extent=DEFAULT_EXTENT, size=0.001):
+    """
+    Build a GeoJSON polygon feature with land-use style properties
+
+    Args:
+        rng: random.Random instance
+        feature_id: Feature identifier
+        extent: (minx, miny, maxx, maxy) to place the feature in
+        size: Approximate polygon width in degrees
+
+    Returns:
+        GeoJSON Feature dictionary
+    """
+    minx, miny, maxx, maxy = extent
+    x = rng.uniform(minx, maxx - size)
+    y = rng.uniform(miny, maxy - size)
+    return {
+        "type": "Feature",
+        "properties": {
+            "id": feature_id,
+            "type": rng.choice(LAND_USE_TYPES),
+            "area": round(rng.uniform(1000, 2000000), 2),
+            "population": rng.randint(0, 20000),
+        },
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[
+                [x, y],
+                [x, y + size],
+                [x + size, y + size],
+                [x + size, y],
+                [x, y],
+            ]]
+        }
+    }
+
+
+def random_feature_collection(count, seed=42, extent=DEFAULT_EXTENT):
+    """
+    Build a synthetic polygon FeatureCollection
+
+    Args:
+        count: Number of features
+        seed: Random seed so runs are reproducible
+        extent: (minx, miny, maxx, maxy) to place the features in
+
+    Returns:
+        GeoJSON FeatureCollection dictionary
+    """
+    rng = random.Random(seed)
+    return {
+        "type": "FeatureCollection",
+        "features": [random_polygon_feature(rng, i, extent) for i in range(count)]
+    }
+
+
+# Named dataset sizes used across the benchmark suite
+SIZES = {
+    '1k': 1000,
+    '10k': 10000,
+    '100k': 100000,
+    '1m': 1000000,
+    '10m': 10000000,
+}
+
+GEOMETRY_KINDS = ('point', 'line', 'polygon')
+
+
+def parse_size(value):
+    """
+    Parse a dataset size such as "100k" or "250000"
+
+    Args:
+        value: Size name from SIZES or an integer string
+
+    Returns:
+        Feature count
+    """
+    return SIZES.get(str(value).lower()) or int(value)
+
+
+def random_geodataframe(count, geometry='polygon', seed=42, extent=DEFAULT_EXTENT, size=0.001):
+    """
+    Build a synthetic GeoDataFrame, vectorized so 10M features stay practical
+
+    Args:
+        count: Number of features
+        geometry: 'point', 'line' or 'polygon'
+        seed: Random seed so runs are reproducible
+        extent: (minx, miny, maxx, maxy) to place the features in
+        size: Approximate line length / polygon width in degrees
+
+    Returns:
+        GeoDataFrame in EPSG:4326 with type, area and population attributes
+    """
+    import numpy as np
+    import geopandas as gpd
+    import shapely
+
+    rng = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = extent
+    x = rng.uniform(minx, maxx - size, count)
+    y = rng.uniform(miny, maxy - size, count)
+
+    if geometry == 'point':
+        geoms = shapely.points(x, y)
+    elif geometry == 'line':
+        # Three-vertex polylines heading in a random direction
+        angle = rng.uniform(0, 2 * np.pi, count)
+        dx, dy = np.cos(angle) * size / 2, np.sin(angle) * size / 2
+        coords = np.stack([
+            np.column_stack([x, y]),
+            np.column_stack([x + dx, y + dy]),
+            np.column_stack([x + 2 * dx, y + dy / 2]),
+        ], axis=1)
+        geoms = shapely.linestrings(coords)
+    elif geometry == 'polygon':
+        geoms = shapely.box(x, y, x + size, y + size)
+    else:
+        raise ValueError(f"Unknown geometry kind: {geometry}")
+
+    return gpd.GeoDataFrame({
+        "type": rng.choice(LAND_USE_TYPES, count),
+        "area": rng.uniform(1000, 2000000, count).round(2),
+        "population": rng.integers(0, 20000, count),
+    }, geometry=geoms, crs='EPSG:4326')
+
+
+def write_random_raster(path, width=2048, height=2048, seed=3, extent=DEFAULT_EXTENT):
+    """
+    Write a synthetic single-band float32 cloud-optimized GeoTIFF
+
+    Values are smooth noise with a nodata border, written as the upload
+    path writes rasters (see utils.rasters.convert_to_cog).
+
+    Args:
+        path: Output path
+        width: Raster width in pixels
+        height: Raster height in pixels
+        seed: Random seed
+        extent: (minx, miny, maxx, maxy) the raster covers (EPSG:4326)
+
+    Returns:
+        path
+    """
+    import numpy as np
+    from rasterio.io import MemoryFile
+    from rasterio.transform import from_bounds
+    from utils.rasters import convert_to_cog
+
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[0:height, 0:width]
+    data = (
+        np.sin(cols / 97.0) * np.cos(rows / 131.0) * 100
+        + rng.normal(0, 5, (height, width))
+    ).astype('float32')
+    data[:16, :] = -9999
+
+    profile = {
+        "driver": 'GTiff', "width": width, "height": height, "count": 1, "dtype": 'float32',
+        "crs": 'EPSG:4326', "transform": from_bounds(*extent, width, height), "nodata": -9999,
+    }
+    with MemoryFile() as memory:
+        with memory.open(**profile) as dataset:
+            dataset.write(data, 1)
+        convert_to_cog(memory.name, path)
+    return path
+
+
+def random_bboxes(count, seed=7, extent=DEFAULT_EXTENT, fraction=0.05):
+    """
+    Build query windows covering a fixed fraction of the extent's width
+
+    Args:
+        count: Number of windows
+        seed: Random seed
+        extent: (minx, miny, maxx, maxy) to place the windows in
+        fraction: Window width as a fraction of the extent's width
+
+    Returns:
+        List of [minx, miny, maxx, maxy] lists
+    """
+    rng = random.Random(seed)
+    minx, miny, maxx, maxy = extent
+    width = (maxx - minx) * fraction
+    height = (maxy - miny) * fraction
+    boxes = []
+    for _ in range(count):
+        x = rng.uniform(minx, maxx - width)
+        y = rng.uniform(miny, maxy - height)
+        boxes.append([x, y, x + width, y + height])
+    return boxes
@@ -0,0 +1,106 @@
+"""
+Shared timing and JSON report helpers for the benchmark suite
+
+Reports have the form:
+    {"meta": {...run environment...}, "results": {name: {"median": s, ...}}}
+and are compared with `python -m benchmarks.compare`.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+
+def git_commit():
+    """Get the current git commit, or None outside a checkout"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(func, repeat=5, warmup=1, setup=None):
+    """
+    Time a function
+
+    Args:
+        func: Callable to time; receives setup()'s return value if setup is given
+        repeat: Number of timed runs
+        warmup: Number of untimed runs first
+        setup: Callable run before every run, outside the timing (optional)
+
+    Returns:
+        Dictionary with min, median, mean and max seconds and the run count
+    """
+    timings = []
+    for i in range(warmup + repeat):
+        argument = setup() if setup else None
+        start = time.perf_counter()
+        func(argument) if setup else func()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            timings.append(elapsed)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+        "runs": len(timings),
+    }
+
+
+class Report:
+    """Collects benchmark results and writes them as JSON"""
+
+    def __init__(self, suite, **meta):
+        """
+        Initialize the report
+
+        Args:
+            suite: Benchmark suite name
+            **meta: Extra run parameters to record (sizes, database, ...)
+        """
+        self.meta = {
+            "suite": suite,
+            "commit": git_commit(),
+            "created_at": datetime.utcnow().isoformat() + 'Z',
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **meta,
+        }
+        self.results = {}
+
+    def add(self, name, result, **extra):
+        """
+        Record a measurement
+
+        Args:
+            name: Unique benchmark name, e.g. "buffer/point/100k"
+            result: Dictionary from measure()
+            **extra: Additional values (feature counts, throughput, ...)
+        """
+        self.results[name] = {**result, **extra}
+        print(f"  {name:45s} {result['median'] * 1000:10.1f} ms (median of {result['runs']})", flush=True)
+
+    def to_dict(self):
+        return {"meta": self.meta, "results": self.results}
+
+    def write(self, path):
+        """Write the report to a JSON file"""
+        with open(path, 'w') as output:
+            json.dump(self.to_dict(), output, indent=2)
+        print(f"Report written to {path}")
+
+
+def load_report(path):
+    """Load a JSON report"""
+    with open(path) as source:
+        return json.load(source)
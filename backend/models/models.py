@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, ForeignKey, JSON, Text
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Float, Boolean, ForeignKey, JSON, Text, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geometry
@@ -29,6 +30,10 @@ class User(Base):
 class Dataset(Base):
     """Dataset model for storing uploaded data information"""
     __tablename__ = 'datasets'
+    __table_args__ = (
+        # Keyset pagination of a user's datasets, newest first
+        Index('ix_datasets_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     id = Column(String(36), primary_key=True, default=generate_uuid)
     name = Column(String(100), nullable=False)
@@ -37,7 +42,10 @@ class Dataset(Base):
     user_id = Column(String(36), ForeignKey('users.id'))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    metadata = Column(JSON)  # Stores additional metadata about the dataset
+    # Stores additional metadata about the dataset ("metadata" is reserved by declarative)
+    dataset_metadata = Column('metadata', JSONB)
+    # Incremented whenever the dataset's features change; part of analysis cache keys
+    content_version = Column(Integer, nullable=False, default=1)
     
     # Relationships
     user = relationship('User', back_populates='datasets')
@@ -47,11 +55,15 @@ class Dataset(Base):
 class Layer(Base):
     """Layer model for representing individual spatial data layers"""
     __tablename__ = 'layers'
+    __table_args__ = (
+        # Keyset pagination of layers, newest first
+        Index('ix_layers_created', 'created_at', 'id'),
+    )
     
     id = Column(String(36), primary_key=True, default=generate_uuid)
     name = Column(String(100), nullable=False)
-    dataset_id = Column(String(36), ForeignKey('datasets.id'))
-    analysis_id = Column(String(36), ForeignKey('analyses.id'), nullable=True)
+    dataset_id = Column(String(36), ForeignKey('datasets.id'), index=True)
+    analysis_id = Column(String(36), ForeignKey('analyses.id'), nullable=True, index=True)
     layer_type = Column(String(50))  # e.g., vector, raster, heatmap
     geometry_type = Column(String(50))  # e.g., point, line, polygon, multipolygon
     style = Column(JSON)  # Stores style information for rendering
@@ -62,17 +74,68 @@ class Layer(Base):
     # For vector layers
     geom_field = Column(String(50), default='geom')
     
+    # For raster layers: location of the cloud-optimized GeoTIFF (s3://bucket/key)
+    source_uri = Column(String(1024))
+    
     # Relationships
     dataset = relationship('Dataset', back_populates='layers')
     features = relationship('Feature', back_populates='layer')
+    statistics = relationship('LayerStatistics', back_populates='layer', uselist=False)
+
+class LayerStatistics(Base):
+    """Materialized per-layer statistics, maintained at ingest"""
+    __tablename__ = 'layer_statistics'
+    
+    layer_id = Column(String(36), ForeignKey('layers.id'), primary_key=True)
+    feature_count = Column(Integer, default=0)
+    
+    # Bounding box of all features (ST_Extent)
+    min_x = Column(Float)
+    min_y = Column(Float)
+    max_x = Column(Float)
+    max_y = Column(Float)
+    
+    geometry_types = Column(JSON)  # Histogram, e.g., {"Polygon": 120, "MultiPolygon": 3}
+    attributes = Column(JSON)  # Per attribute: type, min, max, cardinality, values
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    layer = relationship('Layer', back_populates='statistics')
+
+class UploadedFile(Base):
+    """Uploaded file content, by hash, for deduplicating uploads"""
+    __tablename__ = 'uploaded_files'
+    
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    content_hash = Column(String(64), unique=True, nullable=False)  # SHA-256, hex
+    size = Column(BigInteger)
+    filename = Column(String(255))  # Name of the first upload
+    s3_key = Column(String(1024))
+    # Layer ingested from this content; copied instead of re-parsing the file
+    layer_id = Column(String(36), ForeignKey('layers.id', ondelete='SET NULL'), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    layer = relationship('Layer')
 
 class Feature(Base):
     """Feature model for storing individual spatial features"""
     __tablename__ = 'features'
+    __table_args__ = (
+        # Containment (@>) lookups for attribute equality filters
+        Index(
+            'ix_features_properties',
+            'properties',
+            postgresql_using='gin',
+            postgresql_ops={'properties': 'jsonb_path_ops'}
+        ),
+        # Keyset paging of one layer's features in ID order (analysis chunks)
+        Index('ix_features_layer_id_id', 'layer_id', 'id'),
+    )
     
     id = Column(String(36), primary_key=True, default=generate_uuid)
-    layer_id = Column(String(36), ForeignKey('layers.id'))
-    properties = Column(JSON)  # Store non-spatial attributes
+    layer_id = Column(String(36), ForeignKey('layers.id'), index=True)
+    properties = Column(JSONB)  # Store non-spatial attributes
     geom = Column(Geometry('GEOMETRY', srid=4326))  # Store spatial geometry
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -90,14 +153,44 @@ class Analysis(Base):
     analysis_type = Column(String(50), nullable=False)  # e.g., buffer, cluster, intersection
     parameters = Column(JSON)  # Store analysis parameters
     status = Column(String(50), default='pending')  # e.g., pending, running, completed, failed
-    task_id = Column(String(36))  # For tracking Celery tasks
+    task_id = Column(String(36), index=True)  # For tracking Celery tasks
     user_id = Column(String(36), ForeignKey('users.id'))
     dataset_id = Column(String(36), ForeignKey('datasets.id'))
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime)
     result_metadata = Column(JSON)  # Store analysis results metadata
     
+    # Result memoization: hash of (type, normalized parameters, dataset version)
+    cache_key = Column(String(64), index=True)
+    cache_used_at = Column(DateTime)  # Last time the result was computed or reused
+    
+    # Chunked execution: percentage done and where to resume after a restart
+    progress = Column(Float, default=0)
+    checkpoint = Column(JSON)  # e.g., {"last_feature_id": ..., "processed_features": ...}
+    
+    # Pipeline runs: the pipeline and the step this analysis executes
+    pipeline_id = Column(String(36), ForeignKey('pipelines.id'), index=True)
+    pipeline_step = Column(String(50))
+    
     # Relationships
     user = relationship('User', back_populates='analyses')
     dataset = relationship('Dataset', back_populates='analyses')
-    output_layers = relationship('Layer', foreign_keys=[Layer.analysis_id])
\ No newline at end of file
+    pipeline = relationship('Pipeline', back_populates='analyses')
+    output_layers = relationship('Layer', foreign_keys=[Layer.analysis_id])
+
+class Pipeline(Base):
+    """Pipeline model for DAGs of analysis steps run as one job"""
+    __tablename__ = 'pipelines'
+    
+    id = Column(String(36), primary_key=True, default=generate_uuid)
+    name = Column(String(100), nullable=False)
+    definition = Column(JSON, nullable=False)  # {"steps": [...], "stages": [[step ids], ...]}
+    status = Column(String(50), default='pending')  # e.g., pending, running, completed, failed
+    task_id = Column(String(36), index=True)  # Celery task that finalizes the pipeline
+    user_id = Column(String(36), ForeignKey('users.id'))
+    dataset_id = Column(String(36), ForeignKey('datasets.id'))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime)
+    
+    # Relationships
+    analyses = relationship('Analysis', back_populates='pipeline')
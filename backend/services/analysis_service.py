@@ -1,31 +1,73 @@
 import os
 import uuid
 import json
+import hashlib
 from datetime import datetime
 import numpy as np
 import pandas as pd
 import geopandas as gpd
+import rasterio
 from sklearn.cluster import KMeans, DBSCAN
 from shapely.geometry import Point, LineString, Polygon, shape
 from shapely.ops import unary_union, cascaded_union
 import pyproj
 from functools import partial
 from shapely.ops import transform
-from models.models import Dataset, Layer, Feature, Analysis
+from sqlalchemy import func, or_, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import joinedload
+from models.models import Dataset, Layer, Feature, Analysis, LayerStatistics, Pipeline
+from utils.pipelines import step_dependencies, temporary_steps
+from services.layer_cache import LayerFrameCache
+from services.raster_tiles import GDAL_OPTIONS
+from utils.profiling import profile_stage
+from utils.db_routing import reads_from_replica
+from utils.zonal_stats import ZONAL_STATISTICS, zonal_statistics
 
 class AnalysisService:
     """Service for performing spatial analysis operations"""
     
-    def __init__(self, db_session):
+    # Analysis types supported by perform_analysis
+    ANALYSIS_TYPES = ('clustering', 'buffer', 'intersection', 'heatmap', 'zonal_statistics')
+    
+    # Parameter defaults per analysis type, applied before computing cache keys
+    # so that omitted and explicit default values hash the same
+    PARAMETER_DEFAULTS = {
+        'clustering': {'algorithm': 'kmeans', 'n_clusters': 5, 'eps': 0.5, 'min_samples': 5},
+        'buffer': {'distance': 100, 'segments': 16},
+        'intersection': {},
+        'heatmap': {'radius': 25, 'intensity': 0.5, 'gradient': 'default'},
+        'zonal_statistics': {'stats': list(ZONAL_STATISTICS), 'band': 1, 'all_touched': False, 'prefix': 'zonal_'},
+    }
+    
+    # Analysis types that still return placeholder results; never memoized
+    UNCACHED_ANALYSIS_TYPES = ('heatmap',)
+    
+    # Result references only carry scalars and lists up to this length from
+    # the result metadata; geometries live in the output layers
+    MAX_REFERENCE_LIST_ITEMS = 50
+    
+    def __init__(self, db_session, cache_max_entries=1000, chunk_size=10000, data_service=None,
+                 layer_cache=None, raster_workers=4):
         """
         Initialize the AnalysisService
         
         Args:
             db_session: SQLAlchemy database session
+            cache_max_entries: Maximum number of analyses kept reusable in the result cache
+            chunk_size: Features processed per checkpointed chunk
+            data_service: DataService used to maintain output layer statistics (optional)
+            layer_cache: LayerFrameCache shared by analyses in this process (optional)
+            raster_workers: Raster blocks read at the same time by zonal statistics
         """
         self.db_session = db_session
+        self.cache_max_entries = cache_max_entries
+        self.chunk_size = chunk_size
+        self.data_service = data_service
+        self.layer_cache = layer_cache or LayerFrameCache(db_session, max_bytes=0, name=None)
+        self.raster_workers = raster_workers
     
-    def create_analysis(self, name, analysis_type, dataset_id, user_id, parameters=None):
+    def create_analysis(self, name, analysis_type, dataset_id, user_id, parameters=None, task_id=None):
         """
         Create a new analysis record
         
@@ -35,6 +77,7 @@ class AnalysisService:
             dataset_id: Dataset ID to analyze
             user_id: User ID
             parameters: Dict of analysis parameters
+            task_id: ID of the Celery task that will run the analysis (optional)
             
         Returns:
             Analysis object
@@ -45,12 +88,56 @@ class AnalysisService:
             dataset_id=dataset_id,
             user_id=user_id,
             parameters=parameters or {},
-            status='pending'
+            status='pending',
+            task_id=task_id
         )
         self.db_session.add(analysis)
         self.db_session.commit()
         return analysis
     
+    def create_pipeline(self, name, dataset_id, user_id, steps, stages, task_id=None):
+        """
+        Create a pipeline and one analysis record per step
+        
+        Args:
+            name: Pipeline name
+            dataset_id: Dataset ID the steps run against
+            user_id: User ID
+            steps: Validated step definitions
+            stages: Step IDs grouped into stages (see utils.pipelines.validate_pipeline)
+            task_id: ID of the Celery task that finalizes the pipeline (optional)
+            
+        Returns:
+            (Pipeline, {step ID: Analysis}) tuple
+        """
+        pipeline = Pipeline(
+            name=name,
+            dataset_id=dataset_id,
+            user_id=user_id,
+            definition={"steps": steps, "stages": stages},
+            status='pending',
+            task_id=task_id
+        )
+        self.db_session.add(pipeline)
+        
+        analyses = {}
+        for step in steps:
+            analyses[step['id']] = Analysis(
+                name=f"{name}: {step['id']}",
+                analysis_type=step['type'],
+                dataset_id=dataset_id,
+                user_id=user_id,
+                parameters=dict(step.get('parameters') or {}),
+                status='pending',
+                task_id=str(uuid.uuid4()),
+                pipeline=pipeline,
+                pipeline_step=step['id']
+            )
+            self.db_session.add(analyses[step['id']])
+        
+        self.db_session.commit()
+        return pipeline, analyses
+    
     def update_analysis_status(self, analysis_id, status, result_metadata=None):
         """
         Update the status of an analysis
@@ -77,12 +164,16 @@ class AnalysisService:
         self.db_session.commit()
         return analysis
     
-    def perform_analysis(self, analysis_id):
+    def perform_analysis(self, analysis_id, progress_callback=None):
         """
         Perform the analysis for the given analysis ID
         
+        Chunked analysis types resume from the analysis' checkpoint when it
+        is run again after a failure or worker restart.
+        
         Args:
             analysis_id: Analysis ID
+            progress_callback: Called with the Analysis after each chunk (optional)
             
         Returns:
             Result metadata
@@ -95,40 +186,389 @@ class AnalysisService:
         self.update_analysis_status(analysis_id, 'running')
         
         try:
-            # Get the dataset
-            dataset = self.db_session.query(Dataset).get(analysis.dataset_id)
-            if not dataset:
-                raise ValueError(f"Dataset with ID {analysis.dataset_id} not found")
+            with profile_stage('load'):
+                # Get the dataset
+                dataset = self.db_session.query(Dataset).get(analysis.dataset_id)
+                if not dataset:
+                    raise ValueError(f"Dataset with ID {analysis.dataset_id} not found")
+                
+                # Pipeline steps read the output layers of their upstream steps
+                if analysis.pipeline_id:
+                    self._resolve_pipeline_inputs(analysis)
+                
+                # Reuse an identical completed analysis of the same dataset version
+                cache_key = None
+                cached = None
+                if self._is_cacheable(analysis):
+                    cache_key = self.compute_cache_key(analysis.analysis_type, analysis.parameters, dataset)
+                    cached = self.find_cached_analysis(cache_key, exclude_id=analysis.id)
             
-            # Load the features
-            # In a real implementation, this would retrieve the actual features from the database
-            # and convert them to GeoDataFrame
+            if cached:
+                result = dict(cached.result_metadata or {})
+                # The source's profile describes its run, not this one
+                result.pop('profile', None)
+                result['cache_hit'] = True
+                result['source_analysis_id'] = cached.id
+                cached.cache_used_at = datetime.utcnow()
+                self.update_analysis_status(analysis_id, 'completed', result)
+                return result
             
             # Choose analysis method based on type
             if analysis.analysis_type == 'clustering':
                 result = self._perform_clustering(analysis, dataset)
             elif analysis.analysis_type == 'buffer':
-                result = self._perform_buffer(analysis, dataset)
+                result = self._perform_buffer(analysis, dataset, progress_callback)
             elif analysis.analysis_type == 'intersection':
-                result = self._perform_intersection(analysis, dataset)
+                result = self._perform_intersection(analysis, dataset, progress_callback)
             elif analysis.analysis_type == 'heatmap':
                 result = self._perform_heatmap(analysis, dataset)
+            elif analysis.analysis_type == 'zonal_statistics':
+                result = self._perform_zonal_statistics(analysis, dataset)
             else:
                 raise ValueError(f"Unsupported analysis type: {analysis.analysis_type}")
             
-            # Update status to completed with result metadata
-            self.update_analysis_status(analysis_id, 'completed', result)
+            # Make the result reusable, then update status to completed
+            with profile_stage('write'):
+                analysis.cache_key = cache_key
+                analysis.cache_used_at = datetime.utcnow()
+                analysis.progress = 100
+                self.update_analysis_status(analysis_id, 'completed', result)
+                self.evict_cache_entries()
             
             return result
+        except OperationalError:
+            # Database unavailable: leave the analysis running so the task's
+            # retry resumes it from the last committed checkpoint
+            self.db_session.rollback()
+            raise
         except Exception as e:
-            # Update status to failed
+            # Update status to failed, in a clean transaction
+            self.db_session.rollback()
             self.update_analysis_status(analysis_id, 'failed', {'error': str(e)})
             raise
     
+    def _is_cacheable(self, analysis):
+        """
+        Check whether an analysis' result may be memoized and reused
+        
+        Placeholder analysis types are never reused. Neither are temporary
+        pipeline steps, whose output layers are deleted when their pipeline
+        finishes.
+        """
+        if analysis.analysis_type in self.UNCACHED_ANALYSIS_TYPES:
+            return False
+        if analysis.pipeline_id:
+            steps = analysis.pipeline.definition['steps']
+            return analysis.pipeline_step not in temporary_steps(steps)
+        return True
+    
+    def save_profile(self, analysis_id, profile):
+        """
+        Store a stage profile in an analysis' result metadata
+        
+        Args:
+            analysis_id: Analysis ID
+            profile: Profile dictionary from StageProfiler.report()
+        """
+        analysis = self.db_session.query(Analysis).get(analysis_id)
+        if analysis:
+            analysis.result_metadata = {**(analysis.result_metadata or {}), 'profile': profile}
+            self.db_session.commit()
+    
+    def normalize_parameters(self, analysis_type, parameters):
+        """
+        Normalize analysis parameters for hashing
+        
+        Applies the type's defaults, drops unset values and turns integral
+        floats into ints, so equivalent requests normalize identically.
+        
+        Args:
+            analysis_type: Type of analysis
+            parameters: Dict of analysis parameters
+            
+        Returns:
+            Normalized parameters dict
+        """
+        def normalize(value):
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+            if isinstance(value, dict):
+                return {k: normalize(v) for k, v in value.items() if v is not None}
+            if isinstance(value, (list, tuple)):
+                return [normalize(v) for v in value]
+            return value
+        
+        merged = dict(self.PARAMETER_DEFAULTS.get(analysis_type, {}))
+        merged.update(parameters or {})
+        return normalize(merged)
+    
+    def compute_cache_key(self, analysis_type, parameters, dataset):
+        """
+        Compute the result cache key for an analysis
+        
+        The key holds the content version of every dataset the analysis
+        reads: the analyzed dataset, target_dataset, and the datasets of
+        explicitly listed layers. An upload to any of them changes the key.
+        
+        Args:
+            analysis_type: Type of analysis
+            parameters: Dict of analysis parameters
+            dataset: Dataset being analyzed
+            
+        Returns:
+            Hex SHA-256 digest
+        """
+        canonical = json.dumps({
+            'analysis_type': analysis_type,
+            'parameters': self.normalize_parameters(analysis_type, parameters),
+            'dataset_id': dataset.id,
+            'dataset_versions': self._input_dataset_versions(parameters, dataset)
+        }, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
+    def _input_dataset_versions(self, parameters, dataset):
+        """Map the ID of every dataset an analysis reads to its content version"""
+        parameters = parameters or {}
+        layer_ids = list(parameters.get('layer_ids') or []) + list(parameters.get('target_layer_ids') or [])
+        if parameters.get('raster_layer_id'):
+            layer_ids.append(parameters['raster_layer_id'])
+        
+        dataset_ids = {dataset.id}
+        if parameters.get('target_dataset'):
+            dataset_ids.add(parameters['target_dataset'])
+        if layer_ids:
+            dataset_ids.update(
+                dataset_id for (dataset_id,) in self.db_session.query(Layer.dataset_id)
+                .filter(Layer.id.in_(layer_ids))
+                .distinct()
+            )
+        
+        versions = self.db_session.query(Dataset.id, Dataset.content_version)\
+            .filter(Dataset.id.in_(dataset_ids))
+        return {dataset_id: version or 1 for dataset_id, version in versions}
+    
+    def find_cached_analysis(self, cache_key, exclude_id=None):
+        """
+        Find a completed analysis whose result can be reused
+        
+        Args:
+            cache_key: Cache key from compute_cache_key
+            exclude_id: Analysis ID to ignore (the one being run)
+            
+        Returns:
+            Analysis object or None
+        """
+        query = self.db_session.query(Analysis)\
+            .filter(Analysis.cache_key == cache_key, Analysis.status == 'completed')
+        if exclude_id:
+            query = query.filter(Analysis.id != exclude_id)
+        return query.order_by(Analysis.completed_at.desc()).first()
+    
+    def evict_cache_entries(self):
+        """
+        Keep only the most recently used cache_max_entries analyses reusable
+        
+        Evicted analyses keep their results and layers; they are just no
+        longer matched by new requests.
+        
+        Returns:
+            Number of evicted entries
+        """
+        stale = self.db_session.query(Analysis.id)\
+            .filter(Analysis.cache_key.isnot(None))\
+            .order_by(Analysis.cache_used_at.desc())\
+            .offset(self.cache_max_entries)\
+            .subquery()
+        evicted = self.db_session.query(Analysis)\
+            .filter(Analysis.id.in_(select(stale.c.id)))\
+            .update({Analysis.cache_key: None}, synchronize_session=False)
+        self.db_session.commit()
+        return evicted
+    
+    def _source_layer_ids(self, analysis, dataset):
+        """Get the IDs of the layers an analysis reads (explicit layer_ids, else the dataset's uploads)"""
+        layer_ids = (analysis.parameters or {}).get('layer_ids')
+        if layer_ids:
+            return list(layer_ids)
+        return self._dataset_layer_ids(dataset.id)
+    
+    def _dataset_layer_ids(self, dataset_id):
+        """Get the IDs of a dataset's uploaded (non-analysis) layers"""
+        return [
+            layer_id for (layer_id,) in self.db_session.query(Layer.id)
+            .filter(Layer.dataset_id == dataset_id, Layer.analysis_id.is_(None))
+        ]
+    
+    def _resolve_pipeline_inputs(self, analysis):
+        """
+        Point a pipeline step at the output layers of its upstream steps
+        
+        Intermediate results stay in PostGIS: steps exchange layer IDs and
+        read each other's features in SQL.
+        
+        Raises:
+            ValueError: If an upstream step did not complete
+        """
+        step = next(
+            step for step in analysis.pipeline.definition['steps']
+            if step['id'] == analysis.pipeline_step
+        )
+        dependencies = step_dependencies(step)
+        if not dependencies:
+            return
+        
+        upstream = {
+            other.pipeline_step: other
+            for other in self.db_session.query(Analysis).filter(
+                Analysis.pipeline_id == analysis.pipeline_id,
+                Analysis.pipeline_step.in_(dependencies)
+            )
+        }
+        for step_id in dependencies:
+            if upstream[step_id].status != 'completed':
+                raise ValueError(f"Upstream step {step_id} did not complete")
+        
+        def output_layer_ids(step_ids):
+            return [
+                layer.id
+                for step_id in step_ids
+                for layer in self.get_output_layers(upstream[step_id].id)
+            ]
+        
+        parameters = dict(analysis.parameters or {})
+        if step.get('inputs'):
+            parameters['layer_ids'] = output_layer_ids(step['inputs'])
+        if step.get('targets'):
+            parameters['target_layer_ids'] = output_layer_ids(step['targets'])
+        analysis.parameters = parameters
+        self.db_session.commit()
+    
+    def _count_features(self, layer_ids):
+        """Count the features in a set of layers, from layer statistics where available"""
+        counted = self.db_session.query(func.sum(LayerStatistics.feature_count))\
+            .filter(LayerStatistics.layer_id.in_(layer_ids))\
+            .scalar()
+        if counted is not None:
+            return int(counted)
+        return self.db_session.query(func.count(Feature.id))\
+            .filter(Feature.layer_id.in_(layer_ids))\
+            .scalar()
+    
+    def _next_chunk(self, layer_id, after_id):
+        """
+        Find the next feature-ID range of up to chunk_size features in one layer
+        
+        Paging within a single layer is a range scan of the (layer_id, id)
+        index that stops after chunk_size rows.
+        
+        Returns:
+            (last feature ID, feature count) tuple, or None when done
+        """
+        last_id, count = self.db_session.execute(text("""
+            SELECT max(id), count(*) FROM (
+                SELECT id FROM features
+                WHERE layer_id = :layer_id AND id > :after_id
+                ORDER BY id
+                LIMIT :chunk_size
+            ) chunk
+        """), {"layer_id": layer_id, "after_id": after_id, "chunk_size": self.chunk_size}).one()
+        return (last_id, count) if count else None
+    
+    def _run_chunked(self, analysis, layer_ids, process_chunk, progress_callback=None):
+        """
+        Run an analysis over feature-ID ranges with a checkpoint per chunk
+        
+        Layers are processed one after another, each in ID order. Each
+        chunk's writes and its checkpoint are committed together, so a rerun
+        continues after the last committed chunk without redoing or
+        duplicating work.
+        
+        Args:
+            analysis: Analysis object (its checkpoint is read and updated)
+            layer_ids: Input layer IDs
+            process_chunk: Callable(layer_id, after_id, last_id, state)
+                returning the new state dict; state is JSON-serializable and
+                survives restarts
+            progress_callback: Called with the Analysis after each chunk (optional)
+            
+        Returns:
+            (state, processed feature count) tuple
+        """
+        checkpoint = dict(analysis.checkpoint or {})
+        total = checkpoint.get('total_features')
+        if total is None:
+            total = self._count_features(layer_ids)
+        processed = checkpoint.get('processed_features', 0)
+        state = checkpoint.get('state', {})
+        
+        # Resume in the layer the checkpoint was taken in
+        layer_ids = sorted(layer_ids)
+        if checkpoint.get('layer_id') in layer_ids:
+            layer_ids = layer_ids[layer_ids.index(checkpoint['layer_id']):]
+            after_id = checkpoint.get('last_feature_id', '')
+        else:
+            after_id = ''
+        
+        for layer_id in layer_ids:
+            while True:
+                with profile_stage('load'):
+                    chunk = self._next_chunk(layer_id, after_id)
+                if chunk is None:
+                    break
+                last_id, count = chunk
+                
+                # Chunks compute and write their output in one statement
+                with profile_stage('compute'):
+                    state = process_chunk(layer_id, after_id, last_id, state)
+                after_id = last_id
+                processed += count
+                
+                analysis.checkpoint = {
+                    'total_features': total,
+                    'layer_id': layer_id,
+                    'last_feature_id': after_id,
+                    'processed_features': processed,
+                    'chunks_completed': checkpoint.get('chunks_completed', 0) + 1,
+                    'state': state
+                }
+                checkpoint = analysis.checkpoint
+                analysis.progress = min(99.0, 100.0 * processed / total) if total else 99.0
+                with profile_stage('write'):
+                    self.db_session.commit()
+                
+                if progress_callback:
+                    progress_callback(analysis)
+            after_id = ''
+        
+        return state, processed
+    
+    def _create_output_layer(self, analysis, dataset, name, geometry_type=None):
+        """Create the layer an analysis writes its results to"""
+        layer = Layer(
+            name=name,
+            dataset_id=dataset.id,
+            analysis_id=analysis.id,
+            layer_type='vector',
+            geometry_type=geometry_type
+        )
+        self.db_session.add(layer)
+        self.db_session.flush()
+        return layer
+    
+    def _finish_output_layer(self, layer_id):
+        """Compute statistics for a completed output layer"""
+        if self.data_service:
+            with profile_stage('statistics'):
+                self.data_service.refresh_layer_statistics(layer_id)
+    
     def _perform_clustering(self, analysis, dataset):
         """
         Perform clustering analysis
         
+        Clusters feature representative points with K-Means or DBSCAN (eps
+        in degrees). Features are read through the layer cache, so repeated
+        analyses of a hot layer skip the database read.
+        
         Args:
             analysis: Analysis object
             dataset: Dataset object
@@ -137,82 +577,186 @@ class AnalysisService:
             Result metadata
         """
         # Extract parameters
-        algorithm = analysis.parameters.get('algorithm', 'kmeans')
+        parameters = analysis.parameters
+        algorithm = parameters.get('algorithm', 'kmeans')
+        layer_ids = self._source_layer_ids(analysis, dataset)
         
-        # In a real implementation, you would:
-        # 1. Load the features into a GeoDataFrame
-        # 2. Extract coordinates or other attributes for clustering
-        # 3. Apply the clustering algorithm
-        # 4. Create a new layer with the clusters
-        # 5. Save the results to the database
+        with profile_stage('load'):
+            gdf = self.layer_cache.load_layers(layer_ids)
+        
+        with profile_stage('transform'):
+            gdf = gdf[gdf.geometry.notna() & ~gdf.geometry.is_empty]
+            if gdf.empty:
+                raise ValueError("No features to cluster")
+            points = gdf.geometry.representative_point()
+            coords = np.column_stack([points.x.to_numpy(), points.y.to_numpy()])
+        
+        with profile_stage('compute'):
+            if algorithm == 'kmeans':
+                n_clusters = min(int(parameters.get('n_clusters', 5)), len(coords))
+                labels = KMeans(n_clusters=n_clusters, n_init=10, random_state=0).fit_predict(coords)
+            elif algorithm == 'dbscan':
+                labels = DBSCAN(
+                    eps=float(parameters.get('eps', 0.5)),
+                    min_samples=int(parameters.get('min_samples', 5))
+                ).fit_predict(coords)
+            else:
+                raise ValueError(f"Unsupported clustering algorithm: {algorithm}")
+        
+        # Write the labels; geometries are copied inside the database
+        with profile_stage('write'):
+            layer = self._create_output_layer(analysis, dataset, f"{algorithm.upper()} Clusters")
+            self.db_session.execute(text("""
+                INSERT INTO features (id, layer_id, properties, geom, created_at, updated_at)
+                SELECT gen_random_uuid()::text, :output_layer_id,
+                       coalesce(f.properties, '{}'::jsonb) || jsonb_build_object('cluster', c.cluster),
+                       f.geom, now(), now()
+                FROM features f
+                JOIN unnest(CAST(:ids AS text[]), CAST(:clusters AS integer[])) AS c(id, cluster)
+                  ON f.id = c.id
+            """), {
+                "output_layer_id": layer.id,
+                "ids": gdf['id'].tolist(),
+                "clusters": [int(label) for label in labels]
+            })
+            self.db_session.commit()
+        self._finish_output_layer(layer.id)
+        
+        clustered = labels[labels >= 0]
+        features_per_cluster = np.bincount(clustered).tolist() if len(clustered) else []
         
-        # Mock result
         result = {
             'algorithm': algorithm,
-            'num_clusters': 3 if algorithm == 'kmeans' else 2,
-            'features_per_cluster': [10, 15, 20] if algorithm == 'kmeans' else [25, 20],
-            'output_layer_id': str(uuid.uuid4())
+            'num_clusters': len(features_per_cluster),
+            'features_per_cluster': features_per_cluster,
+            'noise_points': int((labels < 0).sum()),
+            'features_processed': int(len(coords)),
+            'output_layer_id': layer.id
         }
         
         return result
     
-    def _perform_buffer(self, analysis, dataset):
+    def _perform_buffer(self, analysis, dataset, progress_callback=None):
         """
         Perform buffer analysis
         
+        Buffers are computed in PostGIS on the geography type, so distances
+        are in meters anywhere on the globe. Runs in checkpointed chunks.
+        
         Args:
             analysis: Analysis object
             dataset: Dataset object
+            progress_callback: Called with the Analysis after each chunk (optional)
             
         Returns:
             Result metadata
         """
         # Extract parameters
-        distance = analysis.parameters.get('distance', 100)  # meters
-        segments = analysis.parameters.get('segments', 16)
+        distance = float(analysis.parameters.get('distance', 100))  # meters
+        segments = int(analysis.parameters.get('segments', 16))
+        layer_ids = self._source_layer_ids(analysis, dataset)
         
-        # In a real implementation, you would:
-        # 1. Load the features into a GeoDataFrame
-        # 2. Apply the buffer operation
-        # 3. Create a new layer with the buffered geometries
-        # 4. Save the results to the database
+        def buffer_chunk(layer_id, after_id, last_id, state):
+            if 'output_layer_id' not in state:
+                layer = self._create_output_layer(
+                    analysis, dataset, f"Buffer {distance:g} m", geometry_type='polygon'
+                )
+                state = {'output_layer_id': layer.id}
+            
+            self.db_session.execute(text("""
+                INSERT INTO features (id, layer_id, properties, geom, created_at, updated_at)
+                SELECT gen_random_uuid()::text, :output_layer_id, properties,
+                       ST_Buffer(geom::geography, :distance, :style)::geometry,
+                       now(), now()
+                FROM features
+                WHERE layer_id = :layer_id AND id > :after_id AND id <= :last_id
+                  AND geom IS NOT NULL
+            """), {
+                "output_layer_id": state['output_layer_id'],
+                "distance": distance,
+                "style": f"quad_segs={segments}",
+                "layer_id": layer_id,
+                "after_id": after_id,
+                "last_id": last_id
+            })
+            return state
+        
+        state, processed = self._run_chunked(analysis, layer_ids, buffer_chunk, progress_callback)
+        output_layer_id = state.get('output_layer_id')
+        if output_layer_id:
+            self._finish_output_layer(output_layer_id)
         
-        # Mock result
         result = {
             'distance': distance,
             'segments': segments,
-            'features_processed': 50,
-            'output_layer_id': str(uuid.uuid4())
+            'features_processed': processed,
+            'output_layer_id': output_layer_id
         }
         
         return result
     
-    def _perform_intersection(self, analysis, dataset):
+    def _perform_intersection(self, analysis, dataset, progress_callback=None):
         """
         Perform intersection analysis
         
+        Intersects the source layers with target layers in PostGIS. Targets
+        are the target_layer_ids parameter, else the uploads of
+        target_dataset. Output features carry the properties of both sides,
+        source values winning on conflicts. Runs in checkpointed chunks.
+        
         Args:
             analysis: Analysis object
             dataset: Dataset object
+            progress_callback: Called with the Analysis after each chunk (optional)
             
         Returns:
             Result metadata
         """
         # Extract parameters
         target_dataset_id = analysis.parameters.get('target_dataset')
+        target_layer_ids = list(analysis.parameters.get('target_layer_ids') or [])
+        if not target_layer_ids and target_dataset_id:
+            target_layer_ids = self._dataset_layer_ids(target_dataset_id)
+        if not target_layer_ids:
+            raise ValueError("Intersection needs target_dataset or target_layer_ids")
+        layer_ids = self._source_layer_ids(analysis, dataset)
         
-        # In a real implementation, you would:
-        # 1. Load the features from both datasets into GeoDataFrames
-        # 2. Perform the spatial intersection
-        # 3. Create a new layer with the intersection geometries
-        # 4. Save the results to the database
+        def intersect_chunk(layer_id, after_id, last_id, state):
+            if 'output_layer_id' not in state:
+                layer = self._create_output_layer(analysis, dataset, "Intersection")
+                state = {'output_layer_id': layer.id, 'intersections': 0}
+            
+            inserted = self.db_session.execute(text("""
+                INSERT INTO features (id, layer_id, properties, geom, created_at, updated_at)
+                SELECT gen_random_uuid()::text, :output_layer_id,
+                       coalesce(t.properties, '{}'::jsonb) || coalesce(s.properties, '{}'::jsonb),
+                       i.geom, now(), now()
+                FROM features s
+                JOIN features t
+                  ON t.layer_id = ANY(:target_layer_ids) AND ST_Intersects(s.geom, t.geom)
+                CROSS JOIN LATERAL (SELECT ST_Intersection(s.geom, t.geom) AS geom) i
+                WHERE s.layer_id = :layer_id AND s.id > :after_id AND s.id <= :last_id
+                  AND NOT ST_IsEmpty(i.geom)
+            """), {
+                "output_layer_id": state['output_layer_id'],
+                "target_layer_ids": target_layer_ids,
+                "layer_id": layer_id,
+                "after_id": after_id,
+                "last_id": last_id
+            }).rowcount
+            return {**state, 'intersections': state['intersections'] + inserted}
+        
+        state, processed = self._run_chunked(analysis, layer_ids, intersect_chunk, progress_callback)
+        output_layer_id = state.get('output_layer_id')
+        if output_layer_id:
+            self._finish_output_layer(output_layer_id)
         
-        # Mock result
         result = {
             'target_dataset_id': target_dataset_id,
-            'features_processed': 30,
-            'intersections_found': 12,
-            'output_layer_id': str(uuid.uuid4())
+            'target_layers': len(target_layer_ids),
+            'features_processed': processed,
+            'intersections_found': state.get('intersections', 0),
+            'output_layer_id': output_layer_id
         }
         
         return result
@@ -250,10 +794,320 @@ class AnalysisService:
         
         return result
     
+    def _perform_zonal_statistics(self, analysis, dataset):
+        """
+        Compute statistics of a raster layer under each polygon of the source layers
+        
+        The raster (raster_layer_id) is read from its COG block by block, and
+        only blocks under a zone are read; see utils.zonal_stats. Output
+        features are the zones with the requested statistics added to their
+        properties (named prefix + statistic).
+        
+        Args:
+            analysis: Analysis object
+            dataset: Dataset object
+            
+        Returns:
+            Result metadata
+        """
+        # Extract parameters
+        parameters = analysis.parameters
+        raster_layer_id = parameters.get('raster_layer_id')
+        stats = list(parameters.get('stats') or ZONAL_STATISTICS)
+        band = int(parameters.get('band', 1))
+        prefix = parameters.get('prefix', 'zonal_')
+        unknown = set(stats) - set(ZONAL_STATISTICS)
+        if unknown:
+            raise ValueError(f"Unsupported statistics: {', '.join(sorted(unknown))}")
+        
+        raster = self.db_session.get(Layer, raster_layer_id) if raster_layer_id else None
+        if raster is None or raster.layer_type != 'raster' or not raster.source_uri:
+            raise ValueError("Zonal statistics needs raster_layer_id of a raster layer")
+        layer_ids = [layer_id for layer_id in self._source_layer_ids(analysis, dataset) if layer_id != raster.id]
+        
+        with profile_stage('load'):
+            gdf = self.layer_cache.load_layers(layer_ids)
+            with rasterio.Env(**GDAL_OPTIONS), rasterio.open(raster.source_uri) as src:
+                raster_crs = src.crs
+        
+        with profile_stage('transform'):
+            gdf = gdf[gdf.geom_type.isin(['Polygon', 'MultiPolygon'])]
+            if gdf.empty:
+                raise ValueError("No polygon features to summarize")
+            zones = gdf.geometry.to_crs(raster_crs)
+        
+        with profile_stage('compute'):
+            statistics = zonal_statistics(
+                raster.source_uri,
+                zones.values,
+                band=band,
+                all_touched=bool(parameters.get('all_touched', False)),
+                workers=self.raster_workers,
+                env_options=GDAL_OPTIONS
+            )
+        
+        # Write the statistics; geometries are copied inside the database
+        with profile_stage('write'):
+            # Zones without valid pixels get nulls (NaN is not valid JSON)
+            columns = {
+                stat: statistics[stat].tolist() if stat == 'count'
+                else [None if np.isnan(value) else float(value) for value in statistics[stat]]
+                for stat in stats
+            }
+            properties = [
+                json.dumps({f"{prefix}{stat}": values[i] for stat, values in columns.items()})
+                for i in range(len(gdf))
+            ]
+            layer = self._create_output_layer(
+                analysis, dataset, f"Zonal statistics ({raster.name})", geometry_type='polygon'
+            )
+            self.db_session.execute(text("""
+                INSERT INTO features (id, layer_id, properties, geom, created_at, updated_at)
+                SELECT gen_random_uuid()::text, :output_layer_id,
+                       coalesce(f.properties, '{}'::jsonb) || z.stats::jsonb,
+                       f.geom, now(), now()
+                FROM features f
+                JOIN unnest(CAST(:ids AS text[]), CAST(:stats AS text[])) AS z(id, stats)
+                  ON f.id = z.id
+            """), {
+                "output_layer_id": layer.id,
+                "ids": gdf['id'].tolist(),
+                "stats": properties
+            })
+            self.db_session.commit()
+        self._finish_output_layer(layer.id)
+        
+        result = {
+            'raster_layer_id': raster.id,
+            'band': band,
+            'stats': stats,
+            'zones_processed': int(len(gdf)),
+            'zones_with_data': int((statistics['count'] > 0).sum()),
+            'blocks_read': statistics['blocks_read'],
+            'output_layer_id': layer.id
+        }
+        
+        return result
+    
     def get_analysis(self, analysis_id):
         """Get an analysis by ID"""
         return self.db_session.query(Analysis).get(analysis_id)
     
+    def get_analysis_by_task_id(self, task_id):
+        """Get the analysis run by a Celery task"""
+        return self.db_session.query(Analysis).filter(Analysis.task_id == task_id).first()
+    
+    def get_output_layers(self, analysis_id):
+        """Get the layers produced by an analysis (or the analysis its result was reused from)"""
+        analysis = self.get_analysis(analysis_id)
+        if analysis and analysis.result_metadata and analysis.result_metadata.get('source_analysis_id'):
+            analysis_id = analysis.result_metadata['source_analysis_id']
+        return self.db_session.query(Layer)\
+            .filter(Layer.analysis_id == analysis_id)\
+            .order_by(Layer.created_at)\
+            .all()
+    
+    def summarize_result(self, result_metadata):
+        """
+        Reduce result metadata to the small values safe to pass around
+        
+        Args:
+            result_metadata: Analysis result metadata
+            
+        Returns:
+            Dictionary of scalar values and short lists of scalars
+        """
+        scalar_types = (str, int, float, bool, type(None))
+        summary = {}
+        for key, value in (result_metadata or {}).items():
+            if isinstance(value, scalar_types):
+                summary[key] = value
+            elif isinstance(value, (list, tuple)) \
+                    and len(value) <= self.MAX_REFERENCE_LIST_ITEMS \
+                    and all(isinstance(item, scalar_types) for item in value):
+                summary[key] = list(value)
+        return summary
+    
+    def result_reference(self, analysis, output_layers=None):
+        """
+        Build a reference to an analysis' output
+        
+        Task results and status responses carry this reference instead of
+        the output itself; features are read from the output layers.
+        
+        Args:
+            analysis: Analysis object
+            output_layers: Preloaded output layers (optional, queried if omitted)
+            
+        Returns:
+            Reference dictionary with statistics and output layer IDs
+        """
+        if output_layers is None:
+            output_layers = self.get_output_layers(analysis.id)
+        
+        return {
+            "analysis_id": analysis.id,
+            "analysis_type": analysis.analysis_type,
+            "status": analysis.status,
+            "statistics": self.summarize_result(analysis.result_metadata),
+            "output_layers": [
+                {
+                    "id": layer.id,
+                    "name": layer.name,
+                    "feature_count": layer.statistics.feature_count if layer.statistics else None
+                }
+                for layer in output_layers
+            ]
+        }
+    
+    def get_analyses_for_tasks(self, task_ids=(), analysis_ids=()):
+        """
+        Get the analyses matching any of the given task or analysis IDs
+        
+        Args:
+            task_ids: Celery task IDs
+            analysis_ids: Analysis IDs
+            
+        Returns:
+            List of Analysis objects, loaded with a single query
+        """
+        conditions = []
+        if task_ids:
+            conditions.append(Analysis.task_id.in_(list(task_ids)))
+        if analysis_ids:
+            conditions.append(Analysis.id.in_(list(analysis_ids)))
+        if not conditions:
+            return []
+        
+        return self.db_session.query(Analysis)\
+            .filter(or_(*conditions))\
+            .all()
+    
+    def get_output_layers_for_analyses(self, analyses):
+        """
+        Get the output layers of several analyses with a single query
+        
+        Args:
+            analyses: Analysis objects
+            
+        Returns:
+            Dictionary mapping analysis ID to its output layers
+        """
+        # Cache hits read the layers of the analysis their result came from
+        sources = {
+            analysis.id: (analysis.result_metadata or {}).get('source_analysis_id') or analysis.id
+            for analysis in analyses
+        }
+        if not sources:
+            return {}
+        
+        layers = self.db_session.query(Layer)\
+            .options(joinedload(Layer.statistics))\
+            .filter(Layer.analysis_id.in_(set(sources.values())))\
+            .order_by(Layer.created_at)\
+            .all()
+        
+        layers_by_source = {}
+        for layer in layers:
+            layers_by_source.setdefault(layer.analysis_id, []).append(layer)
+        return {
+            analysis_id: layers_by_source.get(source_id, [])
+            for analysis_id, source_id in sources.items()
+        }
+    
+    def get_pipeline(self, pipeline_id):
+        """Get a pipeline by ID"""
+        return self.db_session.query(Pipeline).get(pipeline_id)
+    
+    def finish_pipeline(self, pipeline_id):
+        """
+        Record a pipeline's outcome once all its steps have run, or once a
+        step has failed for good
+        
+        Output layers of temporary steps (consumed downstream and not marked
+        "keep") are removed. Steps that never started because the workflow
+        stopped are marked failed. Safe to call more than once.
+        
+        Args:
+            pipeline_id: Pipeline ID
+            
+        Returns:
+            Updated Pipeline object
+        """
+        pipeline = self.get_pipeline(pipeline_id)
+        if not pipeline:
+            raise ValueError(f"Pipeline with ID {pipeline_id} not found")
+        
+        temporary = temporary_steps(pipeline.definition['steps'])
+        for analysis in pipeline.analyses:
+            if analysis.pipeline_step in temporary:
+                self._discard_output_layers(analysis)
+            if analysis.status == 'pending':
+                analysis.status = 'failed'
+                analysis.result_metadata = {"error": "Not run: an earlier pipeline step failed"}
+        
+        completed = all(analysis.status == 'completed' for analysis in pipeline.analyses)
+        pipeline.status = 'completed' if completed else 'failed'
+        pipeline.completed_at = datetime.utcnow()
+        self.db_session.commit()
+        return pipeline
+    
+    def _discard_output_layers(self, analysis):
+        """Delete the layers an analysis wrote; its result can no longer be reused"""
+        layer_ids = [
+            layer_id for (layer_id,) in self.db_session.query(Layer.id)
+            .filter(Layer.analysis_id == analysis.id)
+        ]
+        if layer_ids:
+            self.db_session.query(Feature).filter(Feature.layer_id.in_(layer_ids)).delete(synchronize_session=False)
+            self.db_session.query(LayerStatistics).filter(LayerStatistics.layer_id.in_(layer_ids)).delete(synchronize_session=False)
+            self.db_session.query(Layer).filter(Layer.id.in_(layer_ids)).delete(synchronize_session=False)
+            for layer_id in layer_ids:
+                self.layer_cache.invalidate(layer_id)
+        analysis.cache_key = None
+    
+    def pipeline_to_dict(self, pipeline):
+        """
+        Convert a pipeline and its steps to a dictionary
+        
+        Args:
+            pipeline: Pipeline object
+            
+        Returns:
+            Pipeline dictionary
+        """
+        analyses = {analysis.pipeline_step: analysis for analysis in pipeline.analyses}
+        temporary = temporary_steps(pipeline.definition['steps'])
+        
+        status = pipeline.status
+        if status == 'pending' and any(a.status != 'pending' for a in analyses.values()):
+            status = 'running'
+        
+        return {
+            "id": pipeline.id,
+            "name": pipeline.name,
+            "dataset_id": pipeline.dataset_id,
+            "status": status,
+            "task_id": pipeline.task_id,
+            "created_at": pipeline.created_at.isoformat() if pipeline.created_at else None,
+            "completed_at": pipeline.completed_at.isoformat() if pipeline.completed_at else None,
+            "stages": pipeline.definition['stages'],
+            "steps": [
+                {
+                    "id": step['id'],
+                    "analysis_id": analyses[step['id']].id,
+                    "task_id": analyses[step['id']].task_id,
+                    "analysis_type": step['type'],
+                    "status": analyses[step['id']].status,
+                    "progress": analyses[step['id']].progress or 0,
+                    "temporary": step['id'] in temporary,
+                    "statistics": self.summarize_result(analyses[step['id']].result_metadata)
+                }
+                for step in pipeline.definition['steps']
+            ]
+        }
+    
+    @reads_from_replica
     def get_analyses_for_user(self, user_id, limit=10):
         """Get recent analyses for a user"""
         return self.db_session.query(Analysis)\
@@ -262,6 +1116,7 @@ class AnalysisService:
             .limit(limit)\
             .all()
     
+    @reads_from_replica
     def get_analyses_for_dataset(self, dataset_id):
         """Get all analyses for a dataset"""
         return self.db_session.query(Analysis)\
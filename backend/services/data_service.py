@@ -1,6 +1,13 @@
 import os
+import re
 import uuid
 import json
+import hashlib
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from contextvars import copy_context
 from datetime import datetime
 import boto3
 from werkzeug.utils import secure_filename
@@ -10,12 +17,50 @@ import pandas as pd
 from shapely.geometry import Point, LineString, Polygon
 import rasterio
 from rasterio.warp import calculate_default_transform
-from models.models import Dataset, Layer, Feature, User
+from geoalchemy2.shape import from_shape
+from sqlalchemy import func, select, insert, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased, contains_eager, joinedload
+from models.models import Dataset, Layer, Feature, LayerStatistics, UploadedFile, User, Analysis
+from utils.pagination import after_cursor, encode_cursor
+from utils.layer_stats import MAX_TRACKED_VALUES, summarize_geodataframe, merge_statistics
+from utils.style_utils import build_default_style, raster_style
+from utils.filters import validate_attribute_name
+from utils.profiling import profile_stage
+from utils.db_routing import reads_from_replica
+from utils.rasters import convert_to_cog, raster_summary
+from services.feature_queries import (
+    apply_bbox, apply_property_filters, feature_collection, layer_geojson_query,
+    layer_summary, layer_tile_query, statistics_to_dict
+)
+
+# Features are written with executemany in batches of this size
+INSERT_BATCH_SIZE = 5000
+
+# Uploads are hashed in chunks of this size
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Ingest method per uploaded file extension
+UPLOAD_PROCESSORS = {
+    '.geojson': '_process_geojson',
+    '.json': '_process_geojson',
+    '.shp': '_process_shapefile',
+    '.zip': '_process_shapefile',
+    '.csv': '_process_csv',
+    '.txt': '_process_csv',
+    '.tif': '_process_geotiff',
+    '.tiff': '_process_geotiff',
+}
+
+# Column names recognised as coordinates in CSV uploads
+CSV_LONGITUDE_COLUMNS = ['longitude', 'lon', 'lng', 'long', 'x']
+CSV_LATITUDE_COLUMNS = ['latitude', 'lat', 'y']
 
 class DataService:
     """Service for handling data upload, storage, and retrieval"""
     
-    def __init__(self, db_session, s3_client=None, s3_bucket=None):
+    def __init__(self, db_session, s3_client=None, s3_bucket=None, session_factory=None, upload_workers=4,
+                 layer_cache=None):
         """
         Initialize the DataService
         
@@ -23,10 +68,18 @@ class DataService:
             db_session: SQLAlchemy database session
             s3_client: boto3 S3 client (optional)
             s3_bucket: S3 bucket name (optional)
+            session_factory: Creates a new session; uploads of several files
+                are processed in parallel with one session per file (optional)
+            upload_workers: Files of one upload processed at the same time
+            layer_cache: LayerFrameCache whose entries and snapshots of
+                deleted layers are dropped (optional)
         """
         self.db_session = db_session
         self.s3_client = s3_client or boto3.client('s3')
         self.s3_bucket = s3_bucket or os.environ.get('S3_BUCKET_NAME')
+        self.session_factory = session_factory
+        self.upload_workers = upload_workers
+        self.layer_cache = layer_cache
         
     def create_dataset(self, name, description, user_id, format=None):
         """
@@ -51,7 +104,7 @@ class DataService:
         self.db_session.commit()
         return dataset
     
-    def upload_file_to_s3(self, file_object, filename, content_type=None):
+    def upload_file_to_s3(self, file_object, filename, content_type=None, object_key=None):
         """
         Upload a file to S3
         
@@ -59,12 +112,14 @@ class DataService:
             file_object: File object to upload
             filename: Name to give the file in S3
             content_type: MIME type of the file (optional)
+            object_key: S3 key (optional, a unique key is generated if omitted)
             
         Returns:
             S3 object URL
         """
         # Generate a unique object key
-        object_key = f"uploads/{uuid.uuid4()}/{secure_filename(filename)}"
+        if object_key is None:
+            object_key = f"uploads/{uuid.uuid4()}/{secure_filename(filename)}"
         
         # Upload to S3
         extra_args = {}
@@ -81,13 +136,124 @@ class DataService:
         # Return the S3 object URL
         return f"https://{self.s3_bucket}.s3.amazonaws.com/{object_key}"
     
-    def process_uploaded_files(self, files, dataset_id):
+    def hash_file(self, file_object):
+        """
+        Compute the SHA-256 of a file, reading it in chunks
+        
+        Args:
+            file_object: File object, read from its current position
+            
+        Returns:
+            (hex digest, size in bytes) tuple
+        """
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in iter(lambda: file_object.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+        return digest.hexdigest(), size
+    
+    def store_upload(self, file_object, filename):
+        """
+        Store an uploaded file in S3 unless the same content is already stored
+        
+        Objects are keyed by content hash, so each distinct file is
+        transferred to S3 once.
+        
+        Args:
+            file_object: File object to store
+            filename: Uploaded file name
+            
+        Returns:
+            (UploadedFile, uploaded) tuple; uploaded is False when the content
+            was already stored
+        """
+        file_object.seek(0)
+        content_hash, size = self.hash_file(file_object)
+        
+        upload = self.db_session.query(UploadedFile)\
+            .filter(UploadedFile.content_hash == content_hash)\
+            .first()
+        if upload:
+            return upload, False
+        
+        file_object.seek(0)
+        object_key = f"uploads/sha256/{content_hash}/{secure_filename(filename)}"
+        self.upload_file_to_s3(file_object, filename, object_key=object_key)
+        
+        upload = UploadedFile(
+            content_hash=content_hash,
+            size=size,
+            filename=filename,
+            s3_key=object_key
+        )
+        self.db_session.add(upload)
+        try:
+            self.db_session.commit()
+        except IntegrityError:
+            # The same content was stored concurrently
+            self.db_session.rollback()
+            upload = self.db_session.query(UploadedFile)\
+                .filter(UploadedFile.content_hash == content_hash)\
+                .one()
+        return upload, True
+    
+    def copy_layer(self, source, dataset, name):
+        """
+        Copy a layer, its features and statistics into a dataset
+        
+        Features are copied inside the database, which is much cheaper than
+        parsing and inserting the file they came from again.
+        
+        Args:
+            source: Layer to copy
+            dataset: Dataset to copy it into
+            name: Name of the new layer
+            
+        Returns:
+            New Layer object
+        """
+        layer = Layer(
+            name=name,
+            dataset_id=dataset.id,
+            layer_type=source.layer_type,
+            geometry_type=source.geometry_type,
+            style=source.style,
+            geom_field=source.geom_field,
+            source_uri=source.source_uri
+        )
+        self.db_session.add(layer)
+        self.db_session.flush()
+        
+        self.db_session.execute(text("""
+            INSERT INTO features (id, layer_id, properties, geom, created_at, updated_at)
+            SELECT gen_random_uuid()::text, :layer_id, properties, geom, now(), now()
+            FROM features
+            WHERE layer_id = :source_layer_id
+        """), {"layer_id": layer.id, "source_layer_id": source.id})
+        
+        statistics = self.statistics_to_dict(source.statistics)
+        if statistics:
+            self._save_statistics(layer, statistics)
+        
+        self.bump_dataset_version(dataset)
+        self.db_session.commit()
+        return layer
+    
+    def process_uploaded_files(self, files, dataset_id, profiler=None, link_existing=True):
         """
         Process uploaded spatial data files
         
+        Files whose content was uploaded before are not transferred to S3
+        again, and with link_existing the layer ingested from that content
+        is copied instead of parsing the file.
+        
         Args:
             files: List of file objects
             dataset_id: ID of the dataset to associate with the files
+            profiler: StageProfiler to time upload/load/transform/write stages
+                with; its report is stored in the dataset's metadata (optional)
+            link_existing: Copy previously ingested layers of identical files
             
         Returns:
             Dictionary with processing results
@@ -100,6 +266,8 @@ class DataService:
             "processed_files": len(files),
             "layers_created": 0,
             "features_created": 0,
+            "layers_linked": 0,
+            "uploads_reused": 0,
             "errors": []
         }
         
@@ -108,133 +276,696 @@ class DataService:
         if not dataset:
             raise ValueError(f"Dataset with ID {dataset_id} not found")
         
-        # Process each file based on its extension
-        for file in files:
-            filename = secure_filename(file.filename)
-            file_ext = os.path.splitext(filename)[1].lower()
-            
-            try:
-                # Upload to S3
-                file_url = self.upload_file_to_s3(file, filename)
-                
-                # Process based on file type
-                if file_ext in ['.geojson', '.json']:
-                    # Process GeoJSON
-                    self._process_geojson(file, dataset)
-                    result["layers_created"] += 1
-                elif file_ext == '.shp':
-                    # Process Shapefile
-                    self._process_shapefile(file, dataset)
-                    result["layers_created"] += 1
-                elif file_ext in ['.csv', '.txt']:
-                    # Process CSV
-                    self._process_csv(file, dataset)
-                    result["layers_created"] += 1
-                elif file_ext in ['.tif', '.tiff']:
-                    # Process GeoTIFF
-                    self._process_geotiff(file, dataset)
-                    result["layers_created"] += 1
-                else:
-                    result["errors"].append(f"Unsupported file format: {file_ext}")
-                    
-            except Exception as e:
-                result["errors"].append(f"Error processing {filename}: {str(e)}")
+        with profiler.activate() if profiler else nullcontext():
+            self._process_files(files, dataset, result, link_existing)
+        
+        if profiler:
+            profile = profiler.report()
+            dataset.dataset_metadata = {**(dataset.dataset_metadata or {}), 'profile': profile}
+            self.db_session.commit()
+            result["profile"] = profile
         
         return result
     
+    def _process_files(self, files, dataset, result, link_existing=True):
+        """Store and ingest the uploaded files, several at a time when possible"""
+        workers = min(self.upload_workers, len(files))
+        if self.session_factory is None or workers < 2:
+            for file in files:
+                self._process_file(file, dataset, result, link_existing)
+            return
+        
+        # Sessions are not thread-safe, so each file gets its own. The context
+        # is copied so profile stages still reach the active profiler.
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload') as executor:
+            futures = [
+                executor.submit(copy_context().run, self._process_file_in_session, file, dataset.id, link_existing)
+                for file in files
+            ]
+            for future in futures:
+                file_result = future.result()
+                result["errors"].extend(file_result.pop("errors"))
+                for key, value in file_result.items():
+                    result[key] += value
+        
+        # The workers changed the dataset's version in their own sessions
+        self.db_session.expire(dataset)
+    
+    def _process_file_in_session(self, file, dataset_id, link_existing):
+        """Process one uploaded file with a new session; returns its result counts"""
+        session = self.session_factory()
+        try:
+            worker = DataService(session, s3_client=self.s3_client, s3_bucket=self.s3_bucket)
+            file_result = {
+                "layers_created": 0,
+                "features_created": 0,
+                "layers_linked": 0,
+                "uploads_reused": 0,
+                "errors": []
+            }
+            worker._process_file(file, session.get(Dataset, dataset_id), file_result, link_existing)
+            return file_result
+        finally:
+            session.close()
+    
+    def _process_file(self, file, dataset, result, link_existing=True):
+        """Store one uploaded file and ingest it based on its extension"""
+        filename = secure_filename(file.filename)
+        file_ext = os.path.splitext(filename)[1].lower()
+        if file_ext not in UPLOAD_PROCESSORS:
+            result["errors"].append(f"Unsupported file format: {file_ext}")
+            return
+        
+        try:
+            # Upload to S3, once per distinct content
+            with profile_stage('upload'):
+                upload, uploaded = self.store_upload(file, filename)
+            if not uploaded:
+                result["uploads_reused"] += 1
+            
+            if link_existing and upload.layer is not None:
+                # Same content as an ingested file: copy its layer
+                with profile_stage('write'):
+                    layer = self.copy_layer(upload.layer, dataset, self._layer_name(file))
+                result["layers_linked"] += 1
+            else:
+                # The hash and S3 upload consumed the stream
+                file.seek(0)
+                layer = getattr(self, UPLOAD_PROCESSORS[file_ext])(file, dataset)
+                if layer is not None and upload.layer_id is None:
+                    upload.layer_id = layer.id
+                    self.db_session.commit()
+                result["layers_created"] += 1
+            
+            if layer is not None and layer.statistics is not None:
+                result["features_created"] += layer.statistics.feature_count or 0
+                
+        except Exception as e:
+            self.db_session.rollback()
+            result["errors"].append(f"Error processing {filename}: {str(e)}")
+
+    def _layer_name(self, file):
+        """Derive a layer name from an uploaded file's name"""
+        return os.path.splitext(secure_filename(file.filename))[0] or 'Layer'
+    
     def _process_geojson(self, file, dataset):
         """Process a GeoJSON file"""
-        # In a real implementation, you would:
-        # 1. Parse the GeoJSON
-        # 2. Create a Layer
-        # 3. Create Features for each feature in the GeoJSON
-        # 4. Store in the database
-        pass
+        with profile_stage('load'):
+            gdf = gpd.read_file(file)
+        return self._ingest_geodataframe(gdf, dataset, self._layer_name(file))
     
     def _process_shapefile(self, file, dataset):
-        """Process a Shapefile"""
-        # In a real implementation, you would:
-        # 1. Save the shapefile to a temporary location
-        # 2. Read it with fiona or geopandas
-        # 3. Create a Layer
-        # 4. Create Features for each feature in the shapefile
-        # 5. Store in the database
-        pass
+        """Process a Shapefile (zipped together with its .shx/.dbf/.prj sidecars)"""
+        with profile_stage('load'):
+            gdf = gpd.read_file(file)
+        return self._ingest_geodataframe(gdf, dataset, self._layer_name(file))
     
     def _process_csv(self, file, dataset):
         """Process a CSV file with geographic coordinates"""
-        # In a real implementation, you would:
-        # 1. Read the CSV with pandas
-        # 2. Identify coordinate columns
-        # 3. Convert to GeoDataFrame
-        # 4. Create a Layer
-        # 5. Create Features for each row
-        # 6. Store in the database
-        pass
+        with profile_stage('load'):
+            df = pd.read_csv(file)
+        columns = {column.lower(): column for column in df.columns}
+        
+        lon_column = next((columns[c] for c in CSV_LONGITUDE_COLUMNS if c in columns), None)
+        lat_column = next((columns[c] for c in CSV_LATITUDE_COLUMNS if c in columns), None)
+        if not lon_column or not lat_column:
+            raise ValueError("CSV file has no recognisable longitude/latitude columns")
+        
+        gdf = gpd.GeoDataFrame(
+            df.drop(columns=[lon_column, lat_column]),
+            geometry=gpd.points_from_xy(df[lon_column], df[lat_column]),
+            crs='EPSG:4326'
+        )
+        return self._ingest_geodataframe(gdf, dataset, self._layer_name(file))
+    
+    def _ingest_geodataframe(self, gdf, dataset, name):
+        """
+        Store a GeoDataFrame as a new vector layer
+        
+        Args:
+            gdf: GeoDataFrame to store
+            dataset: Dataset the layer belongs to
+            name: Layer name
+            
+        Returns:
+            The new Layer object
+        """
+        with profile_stage('transform'):
+            # Features are stored in WGS84
+            if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+                gdf = gdf.to_crs(epsg=4326)
+            
+            # Properties go through pandas' JSON encoder, which maps NaN to null
+            # and NumPy/Timestamp values to JSON types
+            properties = json.loads(
+                gdf.drop(columns=gdf.geometry.name).to_json(orient='records', date_format='iso')
+            )
+            geoms = [from_shape(geom, srid=4326) if geom is not None else None for geom in gdf.geometry]
+        
+        with profile_stage('write'):
+            geometry_types = gdf.geom_type.dropna()
+            layer = Layer(
+                name=name,
+                dataset_id=dataset.id,
+                layer_type='vector',
+                geometry_type=geometry_types.mode()[0].lower() if len(geometry_types) else None
+            )
+            self.db_session.add(layer)
+            self.db_session.flush()
+            
+            rows = [
+                {
+                    "id": str(uuid.uuid4()),
+                    "layer_id": layer.id,
+                    "properties": props,
+                    "geom": geom
+                }
+                for props, geom in zip(properties, geoms)
+            ]
+        
+        # Each batch is summarized as it is written and merged into the running
+        # statistics, so no single pass ever summarizes the whole layer
+        batch_statistics = None
+        for start in range(0, len(rows), INSERT_BATCH_SIZE):
+            stop = start + INSERT_BATCH_SIZE
+            with profile_stage('write'):
+                self.db_session.execute(insert(Feature), rows[start:stop])
+            with profile_stage('statistics'):
+                batch_statistics = merge_statistics(batch_statistics, summarize_geodataframe(gdf.iloc[start:stop]))
+        
+        with profile_stage('statistics'):
+            statistics = self.update_layer_statistics(layer, batch_statistics or summarize_geodataframe(gdf))
+            if not layer.style:
+                layer.style = build_default_style(statistics)
+        
+        with profile_stage('write'):
+            self.bump_dataset_version(dataset)
+            self.db_session.commit()
+        return layer
     
     def _process_geotiff(self, file, dataset):
-        """Process a GeoTIFF file"""
-        # In a real implementation, you would:
-        # 1. Save the GeoTIFF to a temporary location
-        # 2. Read it with rasterio
-        # 3. Create a Layer for the raster
-        # 4. Store metadata
-        # 5. Potentially convert to vector features if needed
-        pass
+        """
+        Store a GeoTIFF as a raster layer backed by a cloud-optimized GeoTIFF
+        
+        The file is rewritten as a COG (tiled, with overviews) and uploaded to
+        S3, where RasterTileRenderer reads it; pixels are not stored in the
+        database.
+        
+        Args:
+            file: Uploaded GeoTIFF
+            dataset: Dataset the layer belongs to
+            
+        Returns:
+            The new Layer object
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            source_path = os.path.join(directory, 'source.tif')
+            cog_path = os.path.join(directory, 'cog.tif')
+            with profile_stage('load'):
+                with open(source_path, 'wb') as target:
+                    shutil.copyfileobj(file, target)
+            
+            with profile_stage('transform'):
+                convert_to_cog(source_path, cog_path)
+            
+            with profile_stage('statistics'):
+                summary = raster_summary(cog_path)
+            
+            with profile_stage('write'):
+                if summary["count"] >= 3 and summary["dtype"] == 'uint8':
+                    style = {"type": "rgb", "bands": [1, 2, 3]}
+                elif summary["min"] is not None:
+                    style = raster_style(summary["min"], summary["max"])
+                else:
+                    style = None
+                layer = Layer(
+                    name=self._layer_name(file),
+                    dataset_id=dataset.id,
+                    layer_type='raster',
+                    style=style
+                )
+                self.db_session.add(layer)
+                self.db_session.flush()
+                
+                object_key = f"rasters/{layer.id}.tif"
+                with open(cog_path, 'rb') as cog:
+                    self.upload_file_to_s3(cog, object_key, content_type='image/tiff', object_key=object_key)
+                layer.source_uri = f"s3://{self.s3_bucket}/{object_key}"
+        
+        with profile_stage('write'):
+            attributes = {}
+            if summary["min"] is not None:
+                attributes["band1"] = {"type": 'number', "min": summary["min"], "max": summary["max"]}
+            self._save_statistics(layer, {
+                "feature_count": 0,
+                "extent": summary["extent"],
+                "geometry_types": {},
+                "attributes": attributes
+            })
+            self.bump_dataset_version(dataset)
+            self.db_session.commit()
+        return layer
+    
+    def bump_dataset_version(self, dataset):
+        """
+        Record that a dataset's content changed
+        
+        Increments the content version and drops the dataset's analyses from
+        the analysis result cache. The caller is responsible for committing.
+        
+        Args:
+            dataset: Dataset object
+        """
+        # Incremented in SQL, so concurrent ingests of one dataset never lose a bump
+        dataset.content_version = func.coalesce(Dataset.content_version, 1) + 1
+        self.db_session.execute(
+            update(Analysis)
+            .where(Analysis.dataset_id == dataset.id, Analysis.cache_key.isnot(None))
+            .values(cache_key=None)
+        )
     
+    @reads_from_replica
     def get_dataset(self, dataset_id):
         """Get a dataset by ID"""
         return self.db_session.query(Dataset).get(dataset_id)
     
+    @reads_from_replica
     def get_datasets_for_user(self, user_id):
         """Get all datasets for a user"""
         return self.db_session.query(Dataset).filter(Dataset.user_id == user_id).all()
     
+    @reads_from_replica
+    def list_datasets(self, user_id=None, limit=50, cursor=None):
+        """
+        List datasets newest first, with layer and feature counts
+        
+        Counts come from the same statement as the page itself (grouped
+        joins restricted to the page), so there are no per-dataset queries.
+        Feature counts are summed from the materialized layer statistics
+        rather than counted from the features table.
+        
+        Args:
+            user_id: Only list this user's datasets (optional)
+            limit: Page size
+            cursor: Cursor returned for the previous page (optional)
+            
+        Returns:
+            (rows, next_cursor) where rows is a list of
+            (Dataset, file_count, feature_count) tuples
+        """
+        page = self.db_session.query(Dataset)
+        if user_id:
+            page = page.filter(Dataset.user_id == user_id)
+        if cursor:
+            page = page.filter(after_cursor(Dataset.created_at, Dataset.id, cursor))
+        # Fetch one extra row to know whether there is a next page
+        # A CTE, so the page is computed once and shared by the count subquery
+        page = page.order_by(Dataset.created_at.desc(), Dataset.id.desc())\
+            .limit(limit + 1)\
+            .cte('dataset_page')
+        page_dataset = aliased(Dataset, page)
+        
+        # Uploaded layers (not analysis outputs) and their features, per dataset
+        counts = self.db_session.query(
+                Layer.dataset_id.label('dataset_id'),
+                func.count(Layer.id).label('file_count'),
+                func.sum(LayerStatistics.feature_count).label('feature_count')
+            )\
+            .outerjoin(LayerStatistics, LayerStatistics.layer_id == Layer.id)\
+            .filter(Layer.dataset_id.in_(select(page.c.id)))\
+            .filter(Layer.analysis_id.is_(None))\
+            .group_by(Layer.dataset_id)\
+            .subquery()
+        
+        rows = self.db_session.query(
+                page_dataset,
+                func.coalesce(counts.c.file_count, 0),
+                func.coalesce(counts.c.feature_count, 0)
+            )\
+            .outerjoin(counts, counts.c.dataset_id == page_dataset.id)\
+            .order_by(page_dataset.created_at.desc(), page_dataset.id.desc())\
+            .all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1][0]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return rows, next_cursor
+    
+    @reads_from_replica
+    def list_layers(self, dataset_id=None, limit=50, cursor=None):
+        """
+        List layers newest first, with their statistics eagerly loaded
+        
+        Args:
+            dataset_id: Only list this dataset's layers (optional)
+            limit: Page size
+            cursor: Cursor returned for the previous page (optional)
+            
+        Returns:
+            (layers, next_cursor) tuple
+        """
+        query = self.db_session.query(Layer)\
+            .outerjoin(Layer.statistics)\
+            .options(contains_eager(Layer.statistics))
+        if dataset_id:
+            query = query.filter(Layer.dataset_id == dataset_id)
+        if cursor:
+            query = query.filter(after_cursor(Layer.created_at, Layer.id, cursor))
+        # Fetch one extra row to know whether there is a next page
+        layers = query.order_by(Layer.created_at.desc(), Layer.id.desc())\
+            .limit(limit + 1)\
+            .all()
+        
+        next_cursor = None
+        if len(layers) > limit:
+            layers = layers[:limit]
+            next_cursor = encode_cursor(layers[-1].created_at, layers[-1].id)
+        return layers, next_cursor
+    
+    def dataset_to_dict(self, dataset, file_count=None, feature_count=None):
+        """
+        Serialize a dataset for the API
+        
+        Args:
+            dataset: Dataset object
+            file_count: Number of uploaded layers (optional)
+            feature_count: Number of features across those layers (optional)
+            
+        Returns:
+            Dataset dictionary
+        """
+        return {
+            "id": dataset.id,
+            "name": dataset.name,
+            "description": dataset.description,
+            "created_at": dataset.created_at.isoformat() if dataset.created_at else None,
+            "user_id": dataset.user_id,
+            "format": dataset.format,
+            "file_count": file_count,
+            "feature_count": feature_count
+        }
+    
     def get_layer(self, layer_id):
         """Get a layer by ID"""
         return self.db_session.query(Layer).get(layer_id)
     
+    @reads_from_replica
     def get_layers_for_dataset(self, dataset_id):
         """Get all layers for a dataset"""
-        return self.db_session.query(Layer).filter(Layer.dataset_id == dataset_id).all()
+        return self.db_session.query(Layer)\
+            .options(joinedload(Layer.statistics))\
+            .filter(Layer.dataset_id == dataset_id)\
+            .all()
+    
+    def get_dataset_feature_count(self, dataset_id):
+        """Get the number of features in a dataset's uploaded layers, from layer statistics"""
+        count = self.db_session.query(func.sum(LayerStatistics.feature_count))\
+            .join(Layer, Layer.id == LayerStatistics.layer_id)\
+            .filter(Layer.dataset_id == dataset_id, Layer.analysis_id.is_(None))\
+            .scalar()
+        return int(count or 0)
+    
+    @reads_from_replica
+    def get_layer_statistics(self, layer_id):
+        """Get the materialized statistics for a layer"""
+        return self.db_session.query(LayerStatistics).get(layer_id)
+    
+    def statistics_to_dict(self, record):
+        """
+        Convert a LayerStatistics record to a statistics dictionary
+        
+        Args:
+            record: LayerStatistics object (or None)
+            
+        Returns:
+            Statistics dictionary, or None
+        """
+        return statistics_to_dict(record)
     
-    def get_features_for_layer(self, layer_id, bbox=None, limit=1000):
+    def _save_statistics(self, layer, statistics):
+        """Write a statistics dictionary to the layer's LayerStatistics record"""
+        record = layer.statistics or LayerStatistics(layer_id=layer.id)
+        extent = statistics["extent"] or [None] * 4
+        record.feature_count = statistics["feature_count"]
+        record.min_x, record.min_y, record.max_x, record.max_y = extent
+        record.geometry_types = statistics["geometry_types"]
+        record.attributes = statistics["attributes"]
+        layer.statistics = record
+        # Statistics only change with the features, so this also versions the layer
+        layer.updated_at = datetime.utcnow()
+        return record
+    
+    def update_layer_statistics(self, layer, batch_statistics):
+        """
+        Merge statistics for newly added features into a layer's record
+        
+        The caller is responsible for committing the session.
+        
+        Args:
+            layer: Layer object
+            batch_statistics: Statistics for the new features (see summarize_geodataframe)
+            
+        Returns:
+            Merged statistics dictionary
+        """
+        statistics = merge_statistics(self.statistics_to_dict(layer.statistics), batch_statistics)
+        self._save_statistics(layer, statistics)
+        return statistics
+    
+    def refresh_layer_statistics(self, layer_id):
+        """
+        Recompute a layer's statistics from its stored features
+        
+        Used to repair the materialized record after features were changed
+        outside the ingest path. All aggregation runs in PostGIS.
+        
+        Args:
+            layer_id: Layer ID
+            
+        Returns:
+            Statistics dictionary
+        """
+        layer = self.get_layer(layer_id)
+        if not layer:
+            raise ValueError(f"Layer with ID {layer_id} not found")
+        params = {"layer_id": layer_id}
+        
+        feature_count, minx, miny, maxx, maxy = self.db_session.execute(text("""
+            SELECT n, ST_XMin(ext), ST_YMin(ext), ST_XMax(ext), ST_YMax(ext)
+            FROM (
+                SELECT count(*) AS n, ST_Extent(geom) AS ext
+                FROM features WHERE layer_id = :layer_id
+            ) summary
+        """), params).one()
+        
+        geometry_types = dict(self.db_session.execute(text("""
+            SELECT replace(ST_GeometryType(geom), 'ST_', ''), count(*)
+            FROM features
+            WHERE layer_id = :layer_id AND geom IS NOT NULL
+            GROUP BY 1
+        """), params).all())
+        
+        attributes = {}
+        for key, value_type, cardinality, num_min, num_max, str_min, str_max in self.db_session.execute(text("""
+            SELECT kv.key,
+                   jsonb_typeof(kv.value),
+                   count(DISTINCT kv.value::text),
+                   min((kv.value #>> '{}')::float8) FILTER (WHERE jsonb_typeof(kv.value) = 'number'),
+                   max((kv.value #>> '{}')::float8) FILTER (WHERE jsonb_typeof(kv.value) = 'number'),
+                   min(kv.value #>> '{}') FILTER (WHERE jsonb_typeof(kv.value) = 'string'),
+                   max(kv.value #>> '{}') FILTER (WHERE jsonb_typeof(kv.value) = 'string')
+            FROM features f, jsonb_each(f.properties) AS kv
+            WHERE f.layer_id = :layer_id AND jsonb_typeof(f.properties) = 'object'
+            GROUP BY kv.key, jsonb_typeof(kv.value)
+        """), params):
+            if value_type == 'null':
+                continue
+            kind = value_type if value_type in ('number', 'string', 'boolean') else 'mixed'
+            if key in attributes:
+                # Values of more than one JSON type
+                attributes[key] = {
+                    "type": 'mixed',
+                    "cardinality": attributes[key]["cardinality"] + cardinality,
+                    "exact": False
+                }
+                continue
+            entry = {"type": kind, "cardinality": cardinality, "exact": True}
+            if kind == 'number':
+                entry["min"], entry["max"] = num_min, num_max
+            elif kind == 'string':
+                entry["min"], entry["max"] = str_min, str_max
+            attributes[key] = entry
+        
+        # Distinct values, only for the attributes that are cheap to enumerate
+        low_cardinality = [
+            key for key, entry in attributes.items()
+            if entry["type"] in ('number', 'string') and entry["cardinality"] <= MAX_TRACKED_VALUES
+        ]
+        if low_cardinality:
+            for key, values in self.db_session.execute(text("""
+                SELECT kv.key, array_agg(DISTINCT kv.value #>> '{}')
+                FROM features f, jsonb_each(f.properties) AS kv
+                WHERE f.layer_id = :layer_id AND kv.key = ANY(:keys)
+                  AND jsonb_typeof(kv.value) IN ('number', 'string')
+                GROUP BY kv.key
+            """), {**params, "keys": low_cardinality}):
+                if attributes[key]["type"] == 'number':
+                    values = [float(value) for value in values]
+                attributes[key]["values"] = sorted(values)
+        
+        statistics = {
+            "feature_count": feature_count,
+            "extent": [minx, miny, maxx, maxy] if minx is not None else None,
+            "geometry_types": geometry_types,
+            "attributes": attributes
+        }
+        self._save_statistics(layer, statistics)
+        self.db_session.commit()
+        return statistics
+    
+    @reads_from_replica
+    def get_dataset_layers_version(self, dataset_id):
+        """
+        Get a cheap version marker for a dataset's layers
+
+        Args:
+            dataset_id: Dataset ID
+
+        Returns:
+            (dataset updated_at, layer count, latest layer updated_at) tuple,
+            or None if the dataset does not exist
+        """
+        row = self.db_session.query(
+                Dataset.updated_at,
+                func.count(Layer.id),
+                func.max(Layer.updated_at)
+            )\
+            .outerjoin(Layer, Layer.dataset_id == Dataset.id)\
+            .filter(Dataset.id == dataset_id)\
+            .group_by(Dataset.id, Dataset.updated_at)\
+            .first()
+        return tuple(row) if row else None
+    
+    @reads_from_replica
+    def get_features_for_layer(self, layer_id, bbox=None, limit=1000, filters=None):
         """
         Get features for a layer, optionally filtered by a bounding box
+        and attribute filters
         
         Args:
             layer_id: Layer ID
             bbox: Bounding box tuple (minx, miny, maxx, maxy)
             limit: Maximum number of features to return
+            filters: Attribute filters, e.g. ["type=residential", "population>1000"]
             
         Returns:
             List of Feature objects
         """
         query = self.db_session.query(Feature).filter(Feature.layer_id == layer_id)
-        
-        if bbox:
-            # Use PostGIS ST_MakeEnvelope to create a bounding box
-            # and ST_Intersects to filter by it
-            minx, miny, maxx, maxy = bbox
-            query = query.filter(
-                "ST_Intersects("
-                "geom, "
-                f"ST_MakeEnvelope({minx}, {miny}, {maxx}, {maxy}, 4326)"
-                ")"
-            )
+        query = apply_bbox(query, bbox)
+        query = apply_property_filters(query, filters)
         
         return query.limit(limit).all()
     
+    @reads_from_replica
+    def get_layer_geojson(self, layer_id, bbox=None, limit=None, filters=None):
+        """
+        Get a layer's features as a GeoJSON FeatureCollection
+        
+        Geometries are encoded by PostGIS (ST_AsGeoJSON), so no ORM objects
+        or Shapely geometries are built.
+        
+        Args:
+            layer_id: Layer ID
+            bbox: Bounding box tuple (minx, miny, maxx, maxy) (optional)
+            limit: Maximum number of features to return (optional)
+            filters: Attribute filters, e.g. ["type=residential"] (optional)
+            
+        Returns:
+            GeoJSON FeatureCollection dictionary
+        """
+        query = layer_geojson_query(layer_id, bbox=bbox, limit=limit, filters=filters)
+        return feature_collection(self.db_session.execute(query))
+    
+    @reads_from_replica
+    def get_layer_tile(self, layer_id, z, x, y):
+        """
+        Encode a layer's features in one XYZ tile as a Mapbox Vector Tile
+        
+        Args:
+            layer_id: Layer ID
+            z: Zoom level
+            x: Tile column
+            y: Tile row
+            
+        Returns:
+            Tile bytes (empty if no features fall in the tile)
+        """
+        statement, params = layer_tile_query(layer_id, z, x, y)
+        tile = self.db_session.execute(statement, params).scalar()
+        return bytes(tile) if tile else b''
+    
+    def ensure_property_index(self, attribute):
+        """
+        Create an expression index for range filters on one attribute
+        
+        The index is on (properties -> 'attribute'), matching the expression
+        apply_property_filters generates. It is built CONCURRENTLY so
+        ingestion is not blocked.
+        
+        Args:
+            attribute: Property name
+            
+        Returns:
+            Index name
+        """
+        if not validate_attribute_name(attribute):
+            raise ValueError(f"Invalid attribute name: {attribute}")
+        
+        slug = re.sub(r'\W+', '_', attribute.lower()).strip('_')[:30]
+        digest = hashlib.sha1(attribute.encode('utf-8')).hexdigest()[:8]
+        index_name = f"ix_features_prop_{slug}_{digest}"
+        
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with self.db_session.get_bind().connect() as connection:
+            connection.execution_options(isolation_level='AUTOCOMMIT').execute(text(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index_name}" '
+                f"ON features ((properties -> '{attribute}'))"
+            ))
+        return index_name
+    
+    def layer_to_dict(self, layer, include_data=True):
+        """
+        Serialize a layer for the API
+        
+        Args:
+            layer: Layer object
+            include_data: If True, embed the layer's features as GeoJSON
+            
+        Returns:
+            Layer dictionary
+        """
+        result = layer_summary(layer)
+        
+        if include_data and result["type"] == 'geojson':
+            result["data"] = self.get_layer_geojson(layer.id)
+        return result
+    
     def delete_dataset(self, dataset_id):
         """Delete a dataset and all associated layers and features"""
-        dataset = self.get_dataset(dataset_id)
+        # Load from the primary, so layers a lagging replica misses are deleted too
+        dataset = self.db_session.query(Dataset).get(dataset_id)
         if not dataset:
             return False
         
         # Delete associated layers and features
+        layer_ids = [layer.id for layer in dataset.layers]
         for layer in dataset.layers:
             # Delete features
             self.db_session.query(Feature).filter(Feature.layer_id == layer.id).delete()
+            self.db_session.query(LayerStatistics).filter(LayerStatistics.layer_id == layer.id).delete()
             
             # Delete layer
             self.db_session.delete(layer)
@@ -243,4 +974,9 @@ class DataService:
         self.db_session.delete(dataset)
         self.db_session.commit()
         
+        # Cached frames and snapshot files of the layers are never read again
+        if self.layer_cache:
+            for layer_id in layer_ids:
+                self.layer_cache.invalidate(layer_id)
+        
         return True
\ No newline at end of file
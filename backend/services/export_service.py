@@ -0,0 +1,223 @@
+import os
+import json
+import shutil
+import tempfile
+import zipfile
+import boto3
+import fiona
+from werkzeug.utils import secure_filename
+from models.models import Layer, LayerStatistics
+from services.layer_snapshots import iter_layer_batches, iter_layer_rows
+from utils.geoarrow import write_parquet_batches
+
+# Supported export formats
+EXPORT_FORMATS = {
+    'geojson': {'extension': '.geojson', 'mimetype': 'application/geo+json'},
+    'gpkg': {'extension': '.gpkg', 'mimetype': 'application/geopackage+sqlite3', 'driver': 'GPKG'},
+    'shp': {'extension': '.zip', 'mimetype': 'application/zip', 'driver': 'ESRI Shapefile'},
+    'parquet': {'extension': '.parquet', 'mimetype': 'application/vnd.apache.parquet'},
+}
+
+# Fiona field types for the attribute types tracked in layer statistics
+FIONA_FIELD_TYPES = {'number': 'float', 'boolean': 'bool', 'string': 'str'}
+
+# GeoJSON is written in chunks of this many features
+GEOJSON_CHUNK_FEATURES = 5000
+
+
+class ExportService:
+    """Service for exporting layers to downloadable files"""
+
+    def __init__(self, db_session, s3_client=None, s3_bucket=None, url_expires=3600):
+        """
+        Initialize the ExportService
+
+        Args:
+            db_session: SQLAlchemy database session
+            s3_client: boto3 S3 client (optional)
+            s3_bucket: S3 bucket name (optional)
+            url_expires: Lifetime of presigned download URLs in seconds
+        """
+        self.db_session = db_session
+        self.s3_client = s3_client or boto3.client('s3')
+        self.s3_bucket = s3_bucket or os.environ.get('S3_BUCKET_NAME')
+        self.url_expires = url_expires
+
+    def export_filename(self, layer, export_format):
+        """Get the download file name for a layer export"""
+        name = secure_filename(layer.name or '') or layer.id
+        return name + EXPORT_FORMATS[export_format]['extension']
+
+    def iter_geojson(self, layer_id):
+        """
+        Stream a layer as a GeoJSON FeatureCollection
+
+        PostGIS renders each geometry and the properties as JSON text, which
+        is spliced into the output without being parsed.
+
+        Args:
+            layer_id: Layer ID
+
+        Yields:
+            Chunks of GeoJSON text
+        """
+        yield '{"type":"FeatureCollection","features":['
+        first = True
+        for rows in iter_layer_rows(
+            self.db_session, layer_id,
+            "id, properties::text, ST_AsGeoJSON(geom)",
+            GEOJSON_CHUNK_FEATURES
+        ):
+            chunk = ','.join(
+                f'{{"type":"Feature","id":{json.dumps(feature_id)},'
+                f'"properties":{properties or "null"},"geometry":{geometry or "null"}}}'
+                for feature_id, properties, geometry in rows
+            )
+            yield chunk if first else ',' + chunk
+            first = False
+        yield ']}'
+
+    def _fiona_schema(self, layer_id):
+        """Build a Fiona schema from the attribute types in the layer's statistics"""
+        statistics = self.db_session.query(LayerStatistics).get(layer_id)
+        attributes = (statistics.attributes if statistics else None) or {}
+        return {
+            # Mixed geometry types are allowed in GeoPackage; shapefiles take
+            # their type from the first feature
+            'geometry': 'Unknown',
+            'properties': {
+                name: FIONA_FIELD_TYPES.get(attribute.get('type'), 'str')
+                for name, attribute in sorted(attributes.items())
+            }
+        }
+
+    def _write_ogr(self, layer_id, path, driver):
+        """Write a layer through Fiona, one cursor batch at a time"""
+        schema = self._fiona_schema(layer_id)
+        fields = schema['properties']
+
+        def to_value(value, field_type):
+            # Values that do not match the column type are written as text
+            if value is None or field_type != 'str' or isinstance(value, str):
+                return value
+            return json.dumps(value)
+
+        with fiona.open(path, 'w', driver=driver, schema=schema, crs='EPSG:4326') as sink:
+            for rows in iter_layer_rows(self.db_session, layer_id, "properties::text, ST_AsGeoJSON(geom)"):
+                records = []
+                for properties, geometry in rows:
+                    if geometry is None:
+                        continue
+                    values = json.loads(properties) if properties else {}
+                    records.append({
+                        'geometry': json.loads(geometry),
+                        'properties': {
+                            name: to_value(values.get(name), field_type)
+                            for name, field_type in fields.items()
+                        }
+                    })
+                sink.writerecords(records)
+
+    def write_export(self, layer_id, export_format, path):
+        """
+        Write a layer export to a file
+
+        Features are streamed from a server-side cursor into the writer, so
+        the layer is never held in memory as a whole.
+
+        Args:
+            layer_id: Layer ID
+            export_format: One of EXPORT_FORMATS
+            path: Destination file path
+        """
+        if export_format == 'geojson':
+            with open(path, 'w') as output:
+                for chunk in self.iter_geojson(layer_id):
+                    output.write(chunk)
+        elif export_format == 'parquet':
+            write_parquet_batches(iter_layer_batches(self.db_session, layer_id), path)
+        elif export_format == 'gpkg':
+            self._write_ogr(layer_id, path, EXPORT_FORMATS['gpkg']['driver'])
+        elif export_format == 'shp':
+            # Shapefiles are several files; they are delivered zipped
+            workdir = tempfile.mkdtemp(prefix='export-')
+            try:
+                self._write_ogr(layer_id, os.path.join(workdir, 'layer.shp'), EXPORT_FORMATS['shp']['driver'])
+                with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+                    for name in sorted(os.listdir(workdir)):
+                        archive.write(os.path.join(workdir, name), name)
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            raise ValueError(f"Unsupported export format: {export_format}")
+
+    def export_to_file(self, layer_id, export_format):
+        """
+        Export a layer to a temporary file
+
+        Args:
+            layer_id: Layer ID
+            export_format: One of EXPORT_FORMATS
+
+        Returns:
+            Path of the temporary file; the caller removes it
+        """
+        fd, path = tempfile.mkstemp(suffix=EXPORT_FORMATS[export_format]['extension'], prefix='export-')
+        os.close(fd)
+        try:
+            if export_format in ('gpkg', 'shp'):
+                # OGR drivers create their own files
+                os.remove(path)
+            self.write_export(layer_id, export_format, path)
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return path
+
+    def export_to_s3(self, layer_id, export_format):
+        """
+        Export a layer and stage it in S3 behind a presigned URL
+
+        Args:
+            layer_id: Layer ID
+            export_format: One of EXPORT_FORMATS
+
+        Returns:
+            Dictionary with the download URL, its lifetime and the object key
+        """
+        layer = self.db_session.query(Layer).get(layer_id)
+        if not layer:
+            raise ValueError(f"Layer with ID {layer_id} not found")
+
+        filename = self.export_filename(layer, export_format)
+        version = int(layer.updated_at.timestamp()) if layer.updated_at else 0
+        object_key = f"exports/{layer_id}/{version}/{filename}"
+
+        path = self.export_to_file(layer_id, export_format)
+        try:
+            self.s3_client.upload_file(
+                path,
+                self.s3_bucket,
+                object_key,
+                ExtraArgs={
+                    'ContentType': EXPORT_FORMATS[export_format]['mimetype'],
+                    'ContentDisposition': f'attachment; filename="{filename}"'
+                }
+            )
+        finally:
+            os.remove(path)
+
+        url = self.s3_client.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': self.s3_bucket, 'Key': object_key},
+            ExpiresIn=self.url_expires
+        )
+        return {
+            "layer_id": layer_id,
+            "format": export_format,
+            "filename": filename,
+            "key": object_key,
+            "url": url,
+            "expires_in": self.url_expires
+        }
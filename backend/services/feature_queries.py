@@ -0,0 +1,258 @@
+import json
+from sqlalchemy import and_, func, literal, not_, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+from models.models import Feature
+from utils.filters import parse_property_filter
+from utils.layer_stats import extent_to_bounds
+
+# Queries shared by the Flask DataService and the async read tier (async_app).
+# They only build statements, so either a Session or an AsyncSession runs them.
+
+# Vector tile grid resolution and the margin (in tile units) kept around each tile
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+# Zoom levels served as vector tiles
+MAX_TILE_ZOOM = 22
+
+# Upper bound on features encoded into one tile
+MAX_TILE_FEATURES = 50000
+
+MVT_MEDIA_TYPE = 'application/vnd.mapbox-vector-tile'
+
+# Features returned by a features request by default, and at most
+DEFAULT_FEATURE_LIMIT = 1000
+MAX_FEATURES_PER_REQUEST = 10000
+
+
+def parse_feature_limit(value):
+    """
+    Parse and clamp the limit of a features request
+
+    Args:
+        value: Raw limit value (e.g., from the query string) or None
+
+    Returns:
+        Feature limit between 1 and MAX_FEATURES_PER_REQUEST
+
+    Raises:
+        ValueError: If the value is not an integer
+    """
+    if value is None:
+        return DEFAULT_FEATURE_LIMIT
+    return max(1, min(int(value), MAX_FEATURES_PER_REQUEST))
+
+
+def apply_bbox(query, bbox):
+    """Restrict a Feature query to geometries intersecting a bounding box"""
+    if not bbox:
+        return query
+
+    # Use PostGIS ST_MakeEnvelope to create a bounding box
+    # and ST_Intersects to filter by it
+    minx, miny, maxx, maxy = map(float, bbox)
+    return query.filter(
+        func.ST_Intersects(
+            Feature.geom,
+            func.ST_MakeEnvelope(minx, miny, maxx, maxy, 4326)
+        )
+    )
+
+
+def apply_property_filters(query, filters):
+    """
+    Restrict a Feature query by attribute filters, evaluated in SQL
+
+    Equality compiles to JSONB containment (properties @> '{"k": v}'),
+    which the GIN index on properties answers. Range comparisons compile
+    to properties -> 'k' compared as JSONB, guarded by jsonb_typeof so
+    mixed-type values never raise; an expression index on the attribute
+    (DataService.ensure_property_index, run through the
+    `flask create-property-index` command) serves them.
+
+    Args:
+        query: Feature query or select()
+        filters: Filter expressions (e.g., "type=residential") or
+            parsed (key, operator, value) tuples
+
+    Returns:
+        Filtered query
+    """
+    parsed = [
+        parse_property_filter(f) if isinstance(f, str) else tuple(f)
+        for f in filters or []
+    ]
+    for key, op, value in parsed:
+        if op == '=':
+            query = query.filter(Feature.properties.contains({key: value}))
+        elif op == '!=':
+            query = query.filter(not_(Feature.properties.contains({key: value})))
+        else:
+            attribute = Feature.properties[key]
+            bound = literal(value, JSONB)
+            comparison = {
+                '>': attribute > bound,
+                '>=': attribute >= bound,
+                '<': attribute < bound,
+                '<=': attribute <= bound,
+            }[op]
+            # JSONB orders values of different types against each other,
+            # so only compare values of the same JSON type
+            value_type = 'string' if isinstance(value, str) else 'number'
+            query = query.filter(and_(func.jsonb_typeof(attribute) == value_type, comparison))
+    return query
+
+
+def layer_geojson_query(layer_id, bbox=None, limit=None, filters=None):
+    """
+    Build the query for a layer's features with PostGIS-encoded geometries
+
+    Args:
+        layer_id: Layer ID
+        bbox: Bounding box tuple (minx, miny, maxx, maxy) (optional)
+        limit: Maximum number of features to return (optional)
+        filters: Attribute filters, e.g. ["type=residential"] (optional)
+
+    Returns:
+        select() of (id, properties, GeoJSON geometry text) rows
+    """
+    query = select(
+            Feature.id,
+            Feature.properties,
+            func.ST_AsGeoJSON(Feature.geom)
+        )\
+        .where(Feature.layer_id == layer_id)
+    query = apply_bbox(query, bbox)
+    query = apply_property_filters(query, filters)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def feature_collection(rows):
+    """
+    Build a GeoJSON FeatureCollection from layer_geojson_query rows
+
+    Args:
+        rows: Iterable of (id, properties, GeoJSON geometry text)
+
+    Returns:
+        GeoJSON FeatureCollection dictionary
+    """
+    features = [
+        {
+            "type": "Feature",
+            "id": feature_id,
+            "properties": properties or {},
+            "geometry": json.loads(geometry) if geometry else None
+        }
+        for feature_id, properties, geometry in rows
+    ]
+    return {"type": "FeatureCollection", "features": features}
+
+
+def valid_tile(z, x, y):
+    """Check that z/x/y addresses a tile of the Web Mercator grid"""
+    return 0 <= z <= MAX_TILE_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def layer_tile_query(layer_id, z, x, y):
+    """
+    Build the query encoding a layer's features as one Mapbox Vector Tile
+
+    Features are found with the GiST index on geom (in EPSG:4326), then
+    clipped and quantized to the tile by ST_AsMVTGeom. Properties are
+    expanded into tile attributes by ST_AsMVT.
+
+    Args:
+        layer_id: Layer ID
+        z: Zoom level
+        x: Tile column
+        y: Tile row (XYZ scheme, origin at the top left)
+
+    Returns:
+        (statement, parameters); the statement returns a single bytea
+    """
+    statement = text("""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS tile,
+                   ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => :margin), 4326) AS search
+        ),
+        tile_features AS (
+            SELECT f.id, f.properties,
+                   ST_AsMVTGeom(ST_Transform(f.geom, 3857), bounds.tile, :extent, :buffer, true) AS geom
+            FROM features f, bounds
+            WHERE f.layer_id = :layer_id
+              AND f.geom && bounds.search
+            LIMIT :max_features
+        )
+        SELECT ST_AsMVT(tile_features, :layer_name, :extent, 'geom')
+        FROM tile_features
+        WHERE geom IS NOT NULL
+    """)
+    return statement, {
+        "layer_id": layer_id,
+        "layer_name": layer_id,
+        "z": z,
+        "x": x,
+        "y": y,
+        "extent": TILE_EXTENT,
+        "buffer": TILE_BUFFER,
+        "margin": TILE_BUFFER / TILE_EXTENT,
+        "max_features": MAX_TILE_FEATURES,
+    }
+
+
+def statistics_to_dict(record):
+    """
+    Convert a LayerStatistics record to a statistics dictionary
+
+    Args:
+        record: LayerStatistics object (or None)
+
+    Returns:
+        Statistics dictionary, or None
+    """
+    if record is None:
+        return None
+    extent = None
+    if record.min_x is not None:
+        extent = [record.min_x, record.min_y, record.max_x, record.max_y]
+    return {
+        "feature_count": record.feature_count or 0,
+        "extent": extent,
+        "geometry_types": record.geometry_types or {},
+        "attributes": record.attributes or {}
+    }
+
+
+def layer_summary(layer):
+    """
+    Serialize a layer's metadata for the API, without its features
+
+    The layer's statistics must be loaded (or loadable) with it.
+
+    Args:
+        layer: Layer object
+
+    Returns:
+        Layer dictionary
+    """
+    result = {
+        "id": layer.id,
+        "name": layer.name,
+        "dataset_id": layer.dataset_id,
+        "analysis_id": layer.analysis_id,
+        "type": layer.layer_type if layer.layer_type == 'raster' else 'geojson',
+        "geometry_type": layer.geometry_type,
+        "visible": layer.visible,
+        "style": layer.style,
+        "updated_at": layer.updated_at.isoformat() if layer.updated_at else None
+    }
+
+    # Extent and count come from the materialized statistics, not the features
+    statistics = statistics_to_dict(layer.statistics)
+    if statistics:
+        result["extent"] = extent_to_bounds(statistics["extent"])
+        result["feature_count"] = statistics["feature_count"]
+    return result
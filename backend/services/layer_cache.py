@@ -0,0 +1,126 @@
+import logging
+import numpy as np
+import geopandas as gpd
+import pandas as pd
+import shapely
+from models.models import Layer
+from services.layer_snapshots import read_layer_table
+from utils.geoarrow import FEATURE_SCHEMA, table_to_geodataframe
+from utils.lru_cache import ByteLRUCache
+
+logger = logging.getLogger(__name__)
+
+# Rough per-geometry overhead of a shapely object beyond its coordinates
+GEOMETRY_OVERHEAD_BYTES = 64
+
+
+def frame_nbytes(gdf):
+    """
+    Estimate the memory held by a GeoDataFrame
+
+    Args:
+        gdf: GeoDataFrame
+
+    Returns:
+        Approximate size in bytes
+    """
+    coordinates = int(shapely.get_num_coordinates(np.asarray(gdf.geometry.values)).sum())
+    attributes = int(gdf.drop(columns=gdf.geometry.name).memory_usage(deep=True).sum())
+    return attributes + coordinates * 16 + len(gdf) * GEOMETRY_OVERHEAD_BYTES
+
+
+class LayerFrameCache:
+    """Per-process cache of layers loaded from PostGIS as GeoDataFrames"""
+
+    def __init__(self, db_session, max_bytes=512 * 1024 * 1024, snapshot_store=None, name='layer_frames'):
+        """
+        Initialize the LayerFrameCache
+
+        Args:
+            db_session: SQLAlchemy database session
+            max_bytes: Memory budget for cached frames; 0 disables caching
+            snapshot_store: LayerSnapshotStore to read misses from (optional,
+                misses are read from the database if omitted)
+            name: Cache label of the exported metrics (None for no metrics)
+        """
+        self.db_session = db_session
+        self.cache = ByteLRUCache(max_bytes, sizeof=frame_nbytes, name=name)
+        self.snapshot_store = snapshot_store
+
+    def load_layer(self, layer_id):
+        """
+        Get a layer's features as a GeoDataFrame
+
+        Entries are keyed by (layer ID, updated_at), so a layer whose features
+        changed is reloaded. Frames are shared between callers and must be
+        treated as read-only.
+
+        Args:
+            layer_id: Layer ID
+
+        Returns:
+            GeoDataFrame with id, properties (JSON text) and geometry columns (EPSG:4326)
+        """
+        updated_at = self.db_session.query(Layer.updated_at)\
+            .filter(Layer.id == layer_id)\
+            .scalar()
+        key = (layer_id, updated_at)
+
+        gdf = self.cache.get(key)
+        if gdf is not None:
+            return gdf
+
+        gdf = self._read_layer(layer_id, updated_at)
+        # Older versions of this layer can never be hit again
+        self.cache.discard(lambda cached: cached[0] == layer_id and cached != key)
+        self.cache.put(key, gdf)
+        logger.debug("Loaded layer %s (%d features), cache: %s", layer_id, len(gdf), self.cache.stats())
+        return gdf
+
+    def load_layers(self, layer_ids):
+        """
+        Get the features of several layers as one GeoDataFrame
+
+        Args:
+            layer_ids: Layer IDs
+
+        Returns:
+            GeoDataFrame with id, layer_id, properties and geometry columns
+        """
+        frames = [self.load_layer(layer_id).assign(layer_id=layer_id) for layer_id in layer_ids]
+        if not frames:
+            return self._empty_frame()
+        return gpd.GeoDataFrame(pd.concat(frames, ignore_index=True), geometry='geometry', crs='EPSG:4326')
+
+    def invalidate(self, layer_id):
+        """
+        Drop every cached version of a layer, and its snapshot files
+
+        Call when a layer is deleted: versioned entries of a layer that
+        still exists are replaced on their own, but nothing would ever read
+        or replace those of a deleted one.
+
+        Args:
+            layer_id: Layer ID
+
+        Returns:
+            Number of cached frames removed
+        """
+        if self.snapshot_store:
+            self.snapshot_store.remove_snapshots(layer_id)
+        return self.cache.discard(lambda cached: cached[0] == layer_id)
+
+    def stats(self):
+        """Get hit, miss and size metrics for this process' cache"""
+        return self.cache.stats()
+
+    def _read_layer(self, layer_id, updated_at):
+        """Read a layer from its snapshot, or from PostGIS without the ORM"""
+        if self.snapshot_store:
+            table = self.snapshot_store.load_table(layer_id, updated_at)
+        else:
+            table = read_layer_table(self.db_session, layer_id)
+        return table_to_geodataframe(table)
+
+    def _empty_frame(self):
+        return table_to_geodataframe(FEATURE_SCHEMA.empty_table())
@@ -0,0 +1,159 @@
+import glob
+import logging
+import os
+import uuid
+import pyarrow as pa
+from models.models import Layer
+from utils.geoarrow import FEATURE_SCHEMA, SNAPSHOT_FORMATS, rows_to_batch, read_table, write_table
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip from the server-side cursor
+FETCH_BATCH_SIZE = 50000
+
+
+def iter_layer_rows(db_session, layer_id, columns, batch_size=FETCH_BATCH_SIZE):
+    """
+    Stream rows of a layer's features from a server-side cursor
+
+    Rows come straight from the DB-API cursor, bypassing the ORM, so memory
+    stays bounded by one batch.
+
+    Args:
+        db_session: SQLAlchemy database session
+        layer_id: Layer ID
+        columns: SQL select list over the features table (a trusted constant)
+        batch_size: Rows per batch
+
+    Yields:
+        Lists of row tuples
+    """
+    connection = db_session.connection().connection.driver_connection
+    with connection.cursor(name=f"layer_{uuid.uuid4().hex}") as cursor:
+        cursor.itersize = batch_size
+        cursor.execute(f"SELECT {columns} FROM features WHERE layer_id = %s", (layer_id,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+
+
+def iter_layer_batches(db_session, layer_id, batch_size=FETCH_BATCH_SIZE):
+    """
+    Stream a layer's features as Arrow record batches of WKB and JSON text
+
+    Args:
+        db_session: SQLAlchemy database session
+        layer_id: Layer ID
+        batch_size: Rows per batch
+
+    Yields:
+        pyarrow.RecordBatch with FEATURE_SCHEMA
+    """
+    for rows in iter_layer_rows(db_session, layer_id, "id, properties::text, ST_AsBinary(geom)", batch_size):
+        yield rows_to_batch(rows)
+
+
+def read_layer_table(db_session, layer_id, batch_size=FETCH_BATCH_SIZE):
+    """
+    Read a layer's features into an Arrow table without the ORM
+
+    Args:
+        db_session: SQLAlchemy database session
+        layer_id: Layer ID
+        batch_size: Rows per fetch
+
+    Returns:
+        pyarrow.Table with FEATURE_SCHEMA
+    """
+    batches = list(iter_layer_batches(db_session, layer_id, batch_size))
+    return pa.Table.from_batches(batches, schema=FEATURE_SCHEMA)
+
+
+class LayerSnapshotStore:
+    """Layer snapshots on local disk, read memory-mapped by workers"""
+
+    def __init__(self, db_session, directory, file_format='arrow'):
+        """
+        Initialize the LayerSnapshotStore
+
+        Args:
+            db_session: SQLAlchemy database session
+            directory: Directory holding snapshot files
+            file_format: 'arrow' (memory-mapped, zero-copy) or 'parquet' (GeoParquet, compressed)
+        """
+        if file_format not in SNAPSHOT_FORMATS:
+            raise ValueError(f"Unsupported snapshot format: {file_format}")
+        self.db_session = db_session
+        self.directory = directory
+        self.file_format = file_format
+        os.makedirs(directory, exist_ok=True)
+
+    def snapshot_path(self, layer_id, updated_at):
+        """Get the snapshot file for a version of a layer"""
+        version = int(updated_at.timestamp() * 1000000) if updated_at else 0
+        return os.path.join(
+            self.directory,
+            f"{layer_id}-{version}{SNAPSHOT_FORMATS[self.file_format]}"
+        )
+
+    def _layer_version(self, layer_id):
+        return self.db_session.query(Layer.updated_at)\
+            .filter(Layer.id == layer_id)\
+            .scalar()
+
+    def write_snapshot(self, layer_id, updated_at=None):
+        """
+        Export a layer to a snapshot file, replacing older versions
+
+        Args:
+            layer_id: Layer ID
+            updated_at: Layer version (optional, looked up if omitted)
+
+        Returns:
+            Snapshot file path
+        """
+        if updated_at is None:
+            updated_at = self._layer_version(layer_id)
+        path = self.snapshot_path(layer_id, updated_at)
+
+        write_table(read_layer_table(self.db_session, layer_id), path, self.file_format)
+        self.remove_snapshots(layer_id, keep=path)
+        logger.info("Wrote snapshot of layer %s to %s", layer_id, path)
+        return path
+
+    def load_table(self, layer_id, updated_at=None):
+        """
+        Get a layer's features from its snapshot, writing it on first use
+
+        Args:
+            layer_id: Layer ID
+            updated_at: Layer version (optional, looked up if omitted)
+
+        Returns:
+            pyarrow.Table with FEATURE_SCHEMA, memory-mapped from disk
+        """
+        if updated_at is None:
+            updated_at = self._layer_version(layer_id)
+        path = self.snapshot_path(layer_id, updated_at)
+
+        if not os.path.exists(path):
+            path = self.write_snapshot(layer_id, updated_at)
+        return read_table(path)
+
+    def remove_snapshots(self, layer_id, keep=None):
+        """
+        Delete a layer's snapshot files
+
+        Args:
+            layer_id: Layer ID
+            keep: Path of a snapshot to keep (optional)
+        """
+        for path in glob.glob(os.path.join(self.directory, f"{layer_id}-*")):
+            if path != keep and not path.endswith('.tmp'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    # Another worker removed it first
+                    pass
@@ -0,0 +1,192 @@
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+from rasterio.transform import from_bounds
+from rasterio.vrt import WarpedVRT
+from rasterio.warp import calculate_default_transform, transform_bounds
+from utils.lru_cache import ByteLRUCache
+from utils.rasters import TILE_FORMATS, TILE_SIZE, apply_style, encode_image, stretch_rgb, tile_bounds
+
+# GDAL settings for reading cloud-optimized GeoTIFFs over HTTP/S3: no sibling
+# file listing, merged range requests and a block cache shared by the reads
+GDAL_OPTIONS = {
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR',
+    'CPL_VSIL_CURL_ALLOWED_EXTENSIONS': '.tif,.tiff',
+    'GDAL_HTTP_MERGE_CONSECUTIVE_RANGES': 'YES',
+    'GDAL_HTTP_MULTIPLEX': 'YES',
+    'VSI_CACHE': 'TRUE',
+    'VSI_CACHE_SIZE': 64 * 1024 * 1024,
+}
+
+# Open datasets kept per thread (rasterio datasets are not thread-safe)
+MAX_OPEN_DATASETS = 16
+
+
+def _tile_window(bounds, raster_bounds):
+    """
+    Find the part of a tile a raster covers, snapped to the tile's pixels
+
+    Args:
+        bounds: Tile bounds (EPSG:3857)
+        raster_bounds: Raster bounds (EPSG:3857)
+
+    Returns:
+        (bounds, (row_start, row_stop, col_start, col_stop)) of the covered
+        part, or None if the raster is outside the tile
+    """
+    minx, miny, maxx, maxy = bounds
+    if minx >= raster_bounds[2] or maxx <= raster_bounds[0] or miny >= raster_bounds[3] or maxy <= raster_bounds[1]:
+        return None
+
+    size = (maxx - minx) / TILE_SIZE
+    col_start = math.floor((max(minx, raster_bounds[0]) - minx) / size)
+    col_stop = min(TILE_SIZE, max(col_start + 1, math.ceil((min(maxx, raster_bounds[2]) - minx) / size)))
+    row_start = math.floor((maxy - min(maxy, raster_bounds[3])) / size)
+    row_stop = min(TILE_SIZE, max(row_start + 1, math.ceil((maxy - max(miny, raster_bounds[1])) / size)))
+    window_bounds = (
+        minx + col_start * size,
+        maxy - row_stop * size,
+        minx + col_stop * size,
+        maxy - row_start * size,
+    )
+    return window_bounds, (row_start, row_stop, col_start, col_stop)
+
+
+class RasterTileRenderer:
+    """
+    Renders XYZ PNG/WebP tiles of raster layers from their COGs
+
+    Each tile reads only the blocks it covers, from the overview level
+    closest to the tile's resolution, warped to Web Mercator on the fly.
+    Encoded tiles are kept in a per-process LRU cache.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, gdal_options=None):
+        """
+        Initialize the RasterTileRenderer
+
+        Args:
+            max_bytes: Memory budget for encoded tiles; 0 disables caching
+            gdal_options: GDAL configuration options (defaults to GDAL_OPTIONS)
+        """
+        self.cache = ByteLRUCache(max_bytes, name='raster_tiles')
+        self.gdal_options = GDAL_OPTIONS if gdal_options is None else gdal_options
+        self._local = threading.local()
+
+    def render(self, layer, z, x, y, tile_format='png'):
+        """
+        Render one tile of a raster layer
+
+        Tiles are keyed by (layer ID, updated_at), so restyling a layer
+        invalidates its cached tiles.
+
+        Args:
+            layer: Raster Layer with a source_uri
+            z: Zoom level
+            x: Tile column
+            y: Tile row
+            tile_format: Key of utils.rasters.TILE_FORMATS
+
+        Returns:
+            Encoded tile bytes (empty if the tile is outside the raster)
+        """
+        if tile_format not in TILE_FORMATS:
+            raise ValueError(f"Unsupported tile format: {tile_format}")
+        if not layer.source_uri:
+            raise ValueError(f"Layer {layer.id} has no raster source")
+
+        key = (layer.id, layer.updated_at, z, x, y, tile_format)
+        tile = self.cache.get(key)
+        if tile is None:
+            with rasterio.Env(**self.gdal_options):
+                tile = self._render(layer, z, x, y, tile_format)
+            self.cache.put(key, tile)
+        return tile
+
+    def _render(self, layer, z, x, y, tile_format):
+        source = self._open(layer.source_uri)
+        window = _tile_window(tile_bounds(z, x, y), source["bounds"])
+        if window is None:
+            return b''
+
+        style = layer.style or {}
+        rgb = style.get("type") == 'rgb'
+        indexes = style.get("bands", [1, 2, 3]) if rgb else [style.get("band", 1)]
+        resampling = Resampling.nearest if style.get("type") == 'categorical' else Resampling.bilinear
+
+        # The VRT spans the part of the tile the raster covers, at the source's
+        # resolution; reading it into the tile's pixels lets GDAL pick the
+        # matching overview
+        bounds, (row_start, row_stop, col_start, col_stop) = window
+        width = max(1, round((bounds[2] - bounds[0]) / source["resolution"]))
+        height = max(1, round((bounds[3] - bounds[1]) / source["resolution"]))
+        shape = (row_stop - row_start, col_stop - col_start)
+        dataset = source["dataset"]
+        vrt_options = {"nodata": dataset.nodata} if dataset.nodata is not None else {"add_alpha": True}
+        with WarpedVRT(
+            dataset,
+            crs='EPSG:3857',
+            transform=from_bounds(*bounds, width, height),
+            width=width,
+            height=height,
+            resampling=resampling,
+            **vrt_options
+        ) as vrt:
+            part = vrt.read(indexes, out_shape=(len(indexes),) + shape, resampling=resampling)
+            part_mask = vrt.read_masks(1, out_shape=shape, resampling=Resampling.nearest) == 0
+
+        data = np.zeros((len(indexes), TILE_SIZE, TILE_SIZE), dtype=part.dtype)
+        mask = np.ones((TILE_SIZE, TILE_SIZE), dtype=bool)
+        data[:, row_start:row_stop, col_start:col_stop] = part
+        mask[row_start:row_stop, col_start:col_stop] = part_mask
+
+        opacity = round(255 * style.get("opacity", 1))
+        if rgb:
+            rgba = stretch_rgb(data, mask, style, opacity)
+        else:
+            rgba = apply_style(data[0], mask, style, opacity)
+        return encode_image(rgba, tile_format)
+
+    def _open(self, uri):
+        """Open a raster once per thread, with its Web Mercator bounds and resolution"""
+        datasets = getattr(self._local, 'datasets', None)
+        if datasets is None:
+            datasets = self._local.datasets = OrderedDict()
+
+        source = datasets.get(uri)
+        if source is not None:
+            datasets.move_to_end(uri)
+            return source
+
+        dataset = rasterio.open(uri)
+        transform, _, _ = calculate_default_transform(
+            dataset.crs, 'EPSG:3857', dataset.width, dataset.height, *dataset.bounds
+        )
+        source = datasets[uri] = {
+            "dataset": dataset,
+            "bounds": transform_bounds(dataset.crs, 'EPSG:3857', *dataset.bounds, densify_pts=21),
+            "resolution": transform.a,
+        }
+        if len(datasets) > MAX_OPEN_DATASETS:
+            _, evicted = datasets.popitem(last=False)
+            evicted["dataset"].close()
+        return source
+
+    def invalidate(self, layer_id):
+        """
+        Drop a layer's cached tiles
+
+        Args:
+            layer_id: Layer ID
+
+        Returns:
+            Number of tiles removed
+        """
+        return self.cache.discard(lambda key: key[0] == layer_id)
+
+    def stats(self):
+        """Get tile cache metrics"""
+        return self.cache.stats()
@@ -0,0 +1,145 @@
+import gzip
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional
+    zstandard = None
+
+# Response types worth compressing; images and archives are already compressed
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/geo+json',
+    'application/javascript',
+    'text/csv',
+    'text/html',
+    'text/plain',
+    'image/svg+xml',
+    # Vector tiles are uncompressed protobuf
+    'application/vnd.mapbox-vector-tile',
+}
+
+# Default compression level per encoding, tuned for dynamic responses where
+# compression time is on the request path
+DEFAULT_LEVELS = {
+    'gzip': 6,
+    'br': 4,
+    'zstd': 3,
+}
+
+
+def _compress_gzip(data, level):
+    return gzip.compress(data, compresslevel=level)
+
+
+def _compress_brotli(data, level):
+    return brotli.compress(data, quality=level)
+
+
+def _compress_zstd(data, level):
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def available_compressors():
+    """
+    Get the compressors supported by the installed libraries
+
+    Returns:
+        Dictionary mapping content-coding names to compress(data, level) functions
+    """
+    compressors = {'gzip': _compress_gzip}
+    if brotli is not None:
+        compressors['br'] = _compress_brotli
+    if zstandard is not None:
+        compressors['zstd'] = _compress_zstd
+    return compressors
+
+
+def negotiate_encoding(accept_encodings, preferred):
+    """
+    Choose a content-coding from the client's Accept-Encoding header
+
+    Args:
+        accept_encodings: werkzeug Accept object for the Accept-Encoding header
+        preferred: Server-side encodings in order of preference
+
+    Returns:
+        Encoding name, or None if the client accepts none of them
+    """
+    # best_match honours client q-values and falls back to our order on ties
+    return accept_encodings.best_match(preferred)
+
+
+def _add_vary(response, header):
+    if header not in response.vary:
+        response.vary.add(header)
+
+
+def compress_response(response):
+    """
+    Compress a response body according to the negotiated content-coding
+
+    Args:
+        response: Flask response object
+
+    Returns:
+        The (possibly compressed) response
+    """
+    config = current_app.config
+
+    if not config.get('COMPRESS_ENABLED', True):
+        return response
+
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+
+    # Caches must key on Accept-Encoding whether or not this body is compressed
+    _add_vary(response, 'Accept-Encoding')
+
+    if (response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    if response.content_length is not None and \
+            response.content_length < config.get('COMPRESS_MIN_SIZE', 1024):
+        return response
+
+    compressors = available_compressors()
+    preferred = [
+        name for name in config.get('COMPRESS_ALGORITHMS', ['zstd', 'br', 'gzip'])
+        if name in compressors
+    ]
+    encoding = negotiate_encoding(request.accept_encodings, preferred)
+    if not encoding:
+        return response
+
+    level = config.get('COMPRESS_LEVELS', {}).get(encoding, DEFAULT_LEVELS[encoding])
+    response.set_data(compressors[encoding](response.get_data(), level))
+    response.headers['Content-Encoding'] = encoding
+
+    # The compressed bytes differ from the identity representation, so a strong
+    # validator would no longer be correct
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+    return response
+
+
+def init_compression(app):
+    """
+    Register response compression on a Flask app
+
+    Args:
+        app: Flask application
+    """
+    app.after_request(compress_response)
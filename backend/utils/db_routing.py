@@ -0,0 +1,116 @@
+import functools
+import time
+from contextlib import contextmanager
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+# Cookie holding the time until which a client's reads stay on the primary
+STICKY_COOKIE = 'db_primary_until'
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads marked with replica_reads() to a read replica
+
+    Everything else (writes, flushes, reads in a session that has written,
+    and all reads outside replica_reads) goes to the primary bind. Replica
+    reads are only enabled while session.info['replica_allowed'] is set,
+    which init_replica_routing does per request; Celery tasks always read
+    from the primary.
+    """
+
+    def __init__(self, replica=None, **kwargs):
+        super().__init__(**kwargs)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self.replica is not None
+            and self.info.get('replica_allowed')
+            and self.info.get('replica_reads')
+            and not self.info.get('wrote')
+            and not self._flushing
+            and isinstance(clause, Select)
+        ):
+            return self.replica
+        return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+
+
+@contextmanager
+def replica_reads(session):
+    """
+    Allow the enclosed queries to run on the read replica
+
+    Args:
+        session: Session or scoped_session
+    """
+    info = session.info
+    previous = info.get('replica_reads', False)
+    info['replica_reads'] = True
+    try:
+        yield
+    finally:
+        info['replica_reads'] = previous
+
+
+def reads_from_replica(method):
+    """Decorate a read-only service method so its queries may use the replica"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with replica_reads(self.db_session):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _record_writes(session_class):
+    @event.listens_for(session_class, 'after_flush')
+    def after_flush(session, flush_context):
+        session.info['wrote'] = True
+
+    @event.listens_for(session_class, 'do_orm_execute')
+    def do_orm_execute(orm_execute_state):
+        # Anything but a SELECT (including raw SQL text) counts as a write
+        if not orm_execute_state.is_select:
+            orm_execute_state.session.info['wrote'] = True
+
+
+_record_writes(RoutingSession)
+
+
+def init_replica_routing(app, db_session, sticky_seconds):
+    """
+    Enable replica reads per request, with read-your-writes stickiness
+
+    A request that writes sets a cookie keeping that client's reads on the
+    primary for `sticky_seconds`, longer than the replica is expected to lag.
+
+    Args:
+        app: Flask application
+        db_session: scoped_session of RoutingSession
+        sticky_seconds: Seconds reads stay on the primary after a write
+    """
+    @app.before_request
+    def allow_replica_reads():
+        info = db_session().info
+        info.pop('wrote', None)
+        try:
+            primary_until = float(request.cookies.get(STICKY_COOKIE, 0))
+        except ValueError:
+            primary_until = 0
+        info['replica_allowed'] = primary_until < time.time()
+
+    @app.after_request
+    def stick_to_primary(response):
+        info = db_session().info
+        if info.get('wrote'):
+            response.set_cookie(
+                STICKY_COOKIE,
+                str(time.time() + sticky_seconds),
+                max_age=sticky_seconds,
+                httponly=True,
+                samesite='Lax'
+            )
+        info['replica_allowed'] = False
+        return response
@@ -0,0 +1,203 @@
+import json
+import logging
+import time
+
+import redis
+import redis.asyncio
+
+logger = logging.getLogger(__name__)
+
+# Task state reported for each Analysis.status
+ANALYSIS_TASK_STATES = {
+    'pending': 'PENDING',
+    'running': 'PROGRESS',
+    'completed': 'SUCCESS',
+    'failed': 'FAILURE',
+}
+
+# Task states after which no further events are published
+TERMINAL_STATES = {'SUCCESS', 'FAILURE'}
+
+# One connection pool per Redis URL and process
+_clients = {}
+
+# One asyncio connection pool per Redis URL (async tier)
+_async_clients = {}
+
+
+def get_redis(redis_url):
+    """
+    Get a shared Redis client for a URL
+
+    Args:
+        redis_url: Redis connection URL
+
+    Returns:
+        redis.Redis client
+    """
+    client = _clients.get(redis_url)
+    if client is None:
+        client = _clients[redis_url] = redis.Redis.from_url(redis_url)
+    return client
+
+
+def get_async_redis(redis_url):
+    """
+    Get a shared asyncio Redis client for a URL
+
+    Args:
+        redis_url: Redis connection URL
+
+    Returns:
+        redis.asyncio.Redis client
+    """
+    client = _async_clients.get(redis_url)
+    if client is None:
+        client = _async_clients[redis_url] = redis.asyncio.Redis.from_url(redis_url)
+    return client
+
+
+def progress_channel(task_id):
+    """Get the pub/sub channel carrying a task's progress events"""
+    return f"analysis:progress:{task_id}"
+
+
+def publish_progress(redis_url, task_id, payload):
+    """
+    Publish a task progress event
+
+    Failures are logged and swallowed: progress events are best-effort and
+    must never fail the analysis itself.
+
+    Args:
+        redis_url: Redis connection URL
+        task_id: Celery task ID
+        payload: JSON-serializable event, with at least a "state" key
+    """
+    try:
+        get_redis(redis_url).publish(progress_channel(task_id), json.dumps(payload, default=str))
+    except redis.RedisError as e:
+        logger.warning("Could not publish progress for task %s: %s", task_id, e)
+
+
+def subscribe_progress(redis_url, task_id):
+    """
+    Subscribe to a task's progress events
+
+    Subscribe before reading the task's current state, so no event published
+    in between is missed.
+
+    Args:
+        redis_url: Redis connection URL
+        task_id: Celery task ID
+
+    Returns:
+        redis PubSub object
+    """
+    pubsub = get_redis(redis_url).pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(progress_channel(task_id))
+    return pubsub
+
+
+async def subscribe_progress_async(redis_url, task_id):
+    """
+    Subscribe to a task's progress events with asyncio, as subscribe_progress
+
+    Args:
+        redis_url: Redis connection URL
+        task_id: Celery task ID
+
+    Returns:
+        redis.asyncio PubSub object
+    """
+    pubsub = get_async_redis(redis_url).pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(progress_channel(task_id))
+    return pubsub
+
+
+def format_sse(data, event=None):
+    """
+    Format a Server-Sent Events message
+
+    Args:
+        data: JSON-serializable payload
+        event: Event name (optional)
+
+    Returns:
+        SSE message string
+    """
+    message = f"event: {event}\n" if event else ''
+    return message + f"data: {json.dumps(data, default=str)}\n\n"
+
+
+def stream_progress(pubsub, initial=None, heartbeat=15, timeout=3600):
+    """
+    Yield a task's progress as Server-Sent Events until it finishes
+
+    Args:
+        pubsub: PubSub object from subscribe_progress
+        initial: Current state to send first (optional)
+        heartbeat: Seconds between keep-alive comments when idle
+        timeout: Maximum seconds to keep the stream open
+
+    Yields:
+        SSE message strings
+    """
+    try:
+        if initial:
+            yield format_sse(initial, event='progress')
+            if initial.get('state') in TERMINAL_STATES:
+                return
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            message = pubsub.get_message(timeout=heartbeat)
+            if message is None:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+
+            payload = json.loads(message['data'])
+            yield format_sse(payload, event='progress')
+            if payload.get('state') in TERMINAL_STATES:
+                return
+    finally:
+        pubsub.close()
+
+
+async def stream_progress_async(pubsub, initial=None, heartbeat=15, timeout=3600):
+    """
+    Yield a task's progress as Server-Sent Events, as stream_progress
+
+    An open stream only waits on its pub/sub socket, so one event loop
+    serves any number of them without a thread each.
+
+    Args:
+        pubsub: PubSub object from subscribe_progress_async
+        initial: Current state to send first (optional)
+        heartbeat: Seconds between keep-alive comments when idle
+        timeout: Maximum seconds to keep the stream open
+
+    Yields:
+        SSE message strings
+    """
+    try:
+        if initial:
+            yield format_sse(initial, event='progress')
+            if initial.get('state') in TERMINAL_STATES:
+                return
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat)
+            if message is None:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+
+            payload = json.loads(message['data'])
+            yield format_sse(payload, event='progress')
+            if payload.get('state') in TERMINAL_STATES:
+                return
+    finally:
+        await pubsub.aclose()
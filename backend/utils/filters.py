@@ -0,0 +1,86 @@
+import json
+import re
+
+# Attribute names are restricted so they can be embedded in index DDL
+ATTRIBUTE_PATTERN = re.compile(r'^[A-Za-z_][\w .-]{0,62}$')
+
+# Longest operators first so ">=" is not read as ">"
+FILTER_PATTERN = re.compile(
+    r'^\s*(?P<key>[^<>=!]+?)\s*(?P<op>>=|<=|!=|=|>|<)\s*(?P<value>.*?)\s*$'
+)
+
+
+def validate_attribute_name(name):
+    """
+    Validate a property name used in filters or index definitions
+
+    Args:
+        name: Attribute name
+
+    Returns:
+        True if valid, False otherwise
+    """
+    return bool(ATTRIBUTE_PATTERN.match(name or ''))
+
+
+def parse_filter_value(raw):
+    """
+    Parse a filter value into a JSON scalar
+
+    Numbers, true/false, null and double-quoted strings are read as JSON;
+    anything else is taken as a bare string (so type=residential works).
+
+    Args:
+        raw: Raw value text
+
+    Returns:
+        Python scalar
+    """
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return raw
+    if isinstance(value, (dict, list)):
+        return raw
+    return value
+
+
+def parse_property_filter(expression):
+    """
+    Parse an attribute filter expression such as "population>1000"
+
+    Args:
+        expression: Filter expression string
+
+    Returns:
+        (key, operator, value) tuple
+
+    Raises:
+        ValueError: If the expression is malformed
+    """
+    match = FILTER_PATTERN.match(expression or '')
+    if not match:
+        raise ValueError(f"Invalid filter expression: {expression}")
+
+    key, op = match.group('key'), match.group('op')
+    if not validate_attribute_name(key):
+        raise ValueError(f"Invalid filter attribute: {key}")
+
+    value = parse_filter_value(match.group('value'))
+    if op not in ('=', '!=') and not isinstance(value, (int, float, str)):
+        raise ValueError(f"Operator {op} needs a number or string value: {expression}")
+
+    return key, op, value
+
+
+def parse_property_filters(expressions):
+    """
+    Parse a list of filter expressions
+
+    Args:
+        expressions: Iterable of filter expression strings
+
+    Returns:
+        List of (key, operator, value) tuples
+    """
+    return [parse_property_filter(expression) for expression in expressions or []]
@@ -0,0 +1,139 @@
+import json
+import os
+import numpy as np
+import geopandas as gpd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+
+# Feature tables: one row per feature, geometry as WKB in EPSG:4326
+FEATURE_SCHEMA = pa.schema([
+    pa.field('id', pa.string()),
+    pa.field('properties', pa.string()),  # JSON text
+    # GeoArrow extension metadata lets Arrow-aware readers recognise the column
+    pa.field('geometry', pa.binary(), metadata={
+        b'ARROW:extension:name': b'geoarrow.wkb',
+        b'ARROW:extension:metadata': b'{"crs": "OGC:CRS84"}'
+    }),
+])
+
+# GeoParquet 1.0 file metadata (the default CRS is OGC:CRS84)
+GEOPARQUET_METADATA = {
+    "version": "1.0.0",
+    "primary_column": "geometry",
+    "columns": {"geometry": {"encoding": "WKB", "geometry_types": []}}
+}
+
+# Snapshot file formats by extension
+SNAPSHOT_FORMATS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+
+def rows_to_batch(rows):
+    """
+    Build a record batch from (id, properties JSON text, WKB) rows
+
+    Args:
+        rows: Sequence of row tuples as returned by a DB-API cursor
+
+    Returns:
+        pyarrow.RecordBatch with FEATURE_SCHEMA
+    """
+    ids, properties, wkb = zip(*rows) if rows else ((), (), ())
+    return pa.RecordBatch.from_arrays([
+        pa.array(ids, type=pa.string()),
+        pa.array(properties, type=pa.string()),
+        pa.array(wkb, type=pa.binary()),
+    ], schema=FEATURE_SCHEMA)
+
+
+def table_to_geodataframe(table):
+    """
+    Convert a feature table to a GeoDataFrame
+
+    Geometries are decoded from WKB in one vectorized call. IDs and
+    properties become object columns of Python str (one per row), with
+    properties left as JSON text rather than parsed into dicts.
+
+    Args:
+        table: pyarrow.Table with FEATURE_SCHEMA
+
+    Returns:
+        GeoDataFrame with id, properties and geometry columns (EPSG:4326)
+    """
+    geometry = shapely.from_wkb(table.column('geometry').to_numpy(zero_copy_only=False))
+    return gpd.GeoDataFrame(
+        {
+            "id": table.column('id').to_numpy(zero_copy_only=False),
+            "properties": table.column('properties').to_numpy(zero_copy_only=False),
+        },
+        geometry=gpd.GeoSeries(np.asarray(geometry), crs='EPSG:4326'),
+        crs='EPSG:4326'
+    )
+
+
+def write_table(table, path, file_format='arrow'):
+    """
+    Write a feature table atomically
+
+    Arrow IPC files are uncompressed so readers can memory-map them;
+    Parquet files carry GeoParquet metadata and are compressed with zstd.
+
+    Args:
+        table: pyarrow.Table with FEATURE_SCHEMA
+        path: Destination path
+        file_format: 'arrow' or 'parquet'
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if file_format == 'parquet':
+        metadata = dict(table.schema.metadata or {})
+        metadata[b'geo'] = json.dumps(GEOPARQUET_METADATA).encode()
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path, compression='zstd')
+    elif file_format == 'arrow':
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    else:
+        raise ValueError(f"Unsupported snapshot format: {file_format}")
+    # Readers never see a partially written file
+    os.replace(tmp_path, path)
+
+
+def write_parquet_batches(batches, path):
+    """
+    Write record batches to a GeoParquet file as they arrive
+
+    Each batch becomes a row group, so only one batch is held in memory.
+
+    Args:
+        batches: Iterable of record batches with FEATURE_SCHEMA
+        path: Destination path
+
+    Returns:
+        Number of rows written
+    """
+    schema = FEATURE_SCHEMA.with_metadata({b'geo': json.dumps(GEOPARQUET_METADATA).encode()})
+    rows = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for batch in batches:
+            writer.write_table(pa.Table.from_batches([batch]).replace_schema_metadata(schema.metadata))
+            rows += batch.num_rows
+    return rows
+
+
+def read_table(path):
+    """
+    Read a feature table, memory-mapped
+
+    Arrow IPC files are read without copying: the table's buffers point into
+    the mapped file and pages are loaded by the OS on access.
+
+    Args:
+        path: Path to an .arrow or .parquet file
+
+    Returns:
+        pyarrow.Table
+    """
+    if path.endswith(SNAPSHOT_FORMATS['parquet']):
+        return pq.read_table(path, memory_map=True)
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
@@ -0,0 +1,110 @@
+import hashlib
+import json
+
+from flask import current_app, jsonify, request
+
+
+def make_etag(*parts):
+    """
+    Build an entity tag from version components
+
+    Args:
+        *parts: Values identifying the representation, such as IDs and
+            updated_at/completed_at timestamps
+
+    Returns:
+        Hex digest usable as an ETag value
+    """
+    token = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha1(token.encode('utf-8')).hexdigest()
+
+
+def content_etag(payload):
+    """
+    Build an entity tag by hashing a JSON-serializable payload
+
+    Only use this where no cheaper version marker exists, since the payload
+    has to be built and encoded to compute it.
+
+    Args:
+        payload: JSON-serializable object
+
+    Returns:
+        Hex digest usable as an ETag value
+    """
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(body.encode('utf-8')).hexdigest()
+
+
+def cache_control_value(public, max_age=0):
+    """
+    Build the Cache-Control value for cacheable API responses
+
+    Args:
+        public: Allow shared caches to store responses
+        max_age: Seconds the response may be reused without revalidation
+
+    Returns:
+        Cache-Control header value
+    """
+    scope = 'public' if public else 'private'
+    if max_age:
+        return f"{scope}, max-age={int(max_age)}"
+    # Store, but revalidate with If-None-Match before every reuse
+    return f"{scope}, no-cache"
+
+
+def cache_control_header(max_age=0):
+    """Build the Cache-Control value under the current Flask app's HTTP_CACHE_PUBLIC"""
+    return cache_control_value(current_app.config.get('HTTP_CACHE_PUBLIC', False), max_age)
+
+
+def if_none_match(header, etag):
+    """
+    Check an If-None-Match header against an ETag with weak comparison
+
+    Args:
+        header: If-None-Match header value (optional)
+        etag: ETag value (unquoted)
+
+    Returns:
+        True if the client already holds the representation
+    """
+    if not header:
+        return False
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag.strip('"') == etag:
+            return True
+    return False
+
+
+def conditional_json(etag, build_payload, max_age=0):
+    """
+    Return a JSON response, or 304 Not Modified if the client's copy is current
+
+    The payload is only built when the client does not already hold the
+    representation identified by `etag`.
+
+    Args:
+        etag: ETag value for the representation (unquoted)
+        build_payload: Callable returning the JSON-serializable payload
+        max_age: Seconds the response may be reused without revalidation
+
+    Returns:
+        Flask response object
+    """
+    # If-None-Match uses weak comparison (RFC 9110, section 13.1.2)
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build_payload())
+
+    # Weak, since compression changes the bytes but not the meaning
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = cache_control_header(max_age)
+    return response
@@ -0,0 +1,150 @@
+from collections import Counter
+
+import pandas as pd
+
+# Distinct values are kept for attributes up to this cardinality, which is
+# enough to build categorical styles and legends
+MAX_TRACKED_VALUES = 100
+
+
+def _to_python(value):
+    """Convert NumPy scalars to plain Python values"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+def summarize_geodataframe(gdf, max_values=MAX_TRACKED_VALUES):
+    """
+    Compute layer statistics for a batch of features
+
+    Args:
+        gdf: GeoDataFrame with the features being ingested
+        max_values: Keep distinct values for attributes up to this cardinality
+
+    Returns:
+        Statistics dictionary with feature_count, extent, geometry_types and attributes
+    """
+    geoms = gdf.geometry
+    geoms = geoms[~(geoms.isna() | geoms.is_empty)]
+
+    attributes = {}
+    for column in gdf.columns:
+        if column == gdf.geometry.name:
+            continue
+
+        series = gdf[column].dropna()
+        if series.empty:
+            continue
+
+        if pd.api.types.is_bool_dtype(series):
+            kind = 'boolean'
+        elif pd.api.types.is_numeric_dtype(series):
+            kind = 'number'
+        else:
+            kind = 'string'
+            series = series.astype(str)
+
+        distinct = series.unique()
+        entry = {"type": kind, "cardinality": int(len(distinct)), "exact": True}
+        if kind != 'boolean':
+            entry["min"] = _to_python(series.min())
+            entry["max"] = _to_python(series.max())
+        if len(distinct) <= max_values:
+            entry["values"] = sorted(_to_python(value) for value in distinct)
+        attributes[str(column)] = entry
+
+    return {
+        "feature_count": int(len(gdf)),
+        "extent": [float(v) for v in geoms.total_bounds] if len(geoms) else None,
+        "geometry_types": {str(k): int(v) for k, v in geoms.geom_type.value_counts().items()},
+        "attributes": attributes
+    }
+
+
+def _merge_extent(a, b):
+    if not a:
+        return b
+    if not b:
+        return a
+    return [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+
+
+def _merge_attribute(a, b, max_values):
+    if a["type"] != b["type"]:
+        # Mixed types: only a lower bound on cardinality is meaningful
+        return {
+            "type": 'mixed',
+            "cardinality": max(a["cardinality"], b["cardinality"]),
+            "exact": False
+        }
+
+    merged = {"type": a["type"]}
+    if "min" in a and "min" in b:
+        merged["min"] = min(a["min"], b["min"])
+        merged["max"] = max(a["max"], b["max"])
+
+    if "values" in a and "values" in b:
+        # Both value sets are complete, so the union is exact
+        values = set(a["values"]) | set(b["values"])
+        merged["cardinality"] = len(values)
+        merged["exact"] = a["exact"] and b["exact"]
+        if len(values) <= max_values:
+            merged["values"] = sorted(values)
+    else:
+        merged["cardinality"] = max(a["cardinality"], b["cardinality"])
+        merged["exact"] = False
+
+    return merged
+
+
+def merge_statistics(current, batch, max_values=MAX_TRACKED_VALUES):
+    """
+    Merge statistics for newly ingested features into existing layer statistics
+
+    Counts, extents, histograms and min/max merge exactly. Cardinality stays
+    exact while both sides still track their distinct values, and becomes a
+    lower bound once an attribute exceeds max_values.
+
+    Args:
+        current: Existing statistics dictionary (or None)
+        batch: Statistics dictionary for the new features
+        max_values: Keep distinct values for attributes up to this cardinality
+
+    Returns:
+        Merged statistics dictionary
+    """
+    if not current:
+        return batch
+
+    attributes = {}
+    for name in set(current["attributes"]) | set(batch["attributes"]):
+        a = current["attributes"].get(name)
+        b = batch["attributes"].get(name)
+        if a is None or b is None:
+            attributes[name] = a or b
+        else:
+            attributes[name] = _merge_attribute(a, b, max_values)
+
+    return {
+        "feature_count": current["feature_count"] + batch["feature_count"],
+        "extent": _merge_extent(current["extent"], batch["extent"]),
+        "geometry_types": dict(
+            Counter(current["geometry_types"]) + Counter(batch["geometry_types"])
+        ),
+        "attributes": attributes
+    }
+
+
+def extent_to_bounds(extent):
+    """
+    Convert a [minx, miny, maxx, maxy] extent to the API's north/south/east/west form
+
+    Args:
+        extent: Extent list or None
+
+    Returns:
+        Bounds dictionary or None
+    """
+    if not extent:
+        return None
+    minx, miny, maxx, maxy = extent
+    return {"north": maxy, "south": miny, "east": maxx, "west": minx}
@@ -0,0 +1,137 @@
+import threading
+from collections import OrderedDict
+from utils.metrics import CACHE_BYTES, CACHE_EVICTIONS, CACHE_LOOKUPS
+
+
+class ByteLRUCache:
+    """
+    Least-recently-used cache bounded by the total size of its values
+
+    Thread-safe, so it can be shared by the threads of a worker process.
+    Values larger than the whole budget are not cached. Named caches also
+    report lookups, evictions and size as Prometheus metrics.
+    """
+
+    def __init__(self, max_bytes, sizeof=len, name=None):
+        """
+        Initialize the cache
+
+        Args:
+            max_bytes: Total size budget; 0 disables caching
+            sizeof: Callable returning a value's size in bytes
+            name: Cache label of the exported metrics (optional, no metrics if omitted)
+        """
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.name = name
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Get a cached value and mark it as recently used
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                self._record_lookup('miss')
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._record_lookup('hit')
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        Cache a value, evicting least recently used entries to make room
+
+        Args:
+            key: Cache key
+            value: Value to cache
+
+        Returns:
+            True if the value was cached
+        """
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return False
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+                if self.name:
+                    CACHE_EVICTIONS.labels(self.name).inc()
+
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            self._record_size()
+            return True
+
+    def discard(self, predicate):
+        """
+        Remove every entry whose key matches a predicate
+
+        Args:
+            predicate: Callable taking a key and returning True to remove it
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                _, size = self._entries.pop(key)
+                self.current_bytes -= size
+            self._record_size()
+            return len(keys)
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self._record_size()
+
+    def _record_lookup(self, result):
+        if self.name:
+            CACHE_LOOKUPS.labels(self.name, result).inc()
+
+    def _record_size(self):
+        if self.name:
+            CACHE_BYTES.labels(self.name).set(self.current_bytes)
+
+    def stats(self):
+        """
+        Get cache metrics
+
+        Returns:
+            Dictionary with hits, misses, hit_ratio, evictions, entries and bytes
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes
+            }
@@ -0,0 +1,170 @@
+import os
+import time
+from flask import Response, g, has_request_context, request
+
+# Multiprocess mode (several gunicorn or Celery processes) keeps one metric
+# file per process here; the directory must exist before metrics are created
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+    start_http_server
+)
+from prometheus_client import multiprocess
+from sqlalchemy import event
+
+# Label for requests that matched no route
+UNMATCHED_ENDPOINT = '<unmatched>'
+
+# Latency buckets from 5 ms to 30 s; feature and tile reads sit at the low end
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Response sizes from 256 B to 64 MB
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency',
+    ['method', 'endpoint', 'status'], buckets=LATENCY_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'HTTP response body size (after compression)',
+    ['method', 'endpoint'], buckets=SIZE_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'HTTP requests being handled',
+    multiprocess_mode='livesum'
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL statements executed per HTTP request',
+    ['endpoint'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+QUERY_DURATION = Histogram(
+    'db_query_duration_seconds', 'SQL statement duration',
+    ['endpoint'], buckets=LATENCY_BUCKETS
+)
+QUERY_ERRORS = Counter('db_query_errors_total', 'SQL statements that raised', ['endpoint'])
+
+# In-process caches (utils.lru_cache.ByteLRUCache), labeled by cache name
+CACHE_LOOKUPS = Counter('cache_lookups_total', 'Cache lookups', ['cache', 'result'])
+CACHE_EVICTIONS = Counter('cache_evictions_total', 'Entries evicted to stay within the budget', ['cache'])
+CACHE_BYTES = Gauge('cache_bytes', 'Size of cached values', ['cache'], multiprocess_mode='livesum')
+
+
+def _endpoint():
+    """Get the endpoint label for the current context (bounded cardinality)"""
+    if has_request_context():
+        return request.endpoint or UNMATCHED_ENDPOINT
+    # Statements outside a request come from Celery tasks and startup
+    return '<background>'
+
+
+def instrument_engine(engine):
+    """
+    Record SQL statement counts and durations from engine events
+
+    Args:
+        engine: SQLAlchemy engine
+    """
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_start'].pop()
+        QUERY_DURATION.labels(_endpoint()).observe(elapsed)
+        if has_request_context() and 'metrics_queries' in g:
+            g.metrics_queries += 1
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        starts = context.connection.info.get('metrics_start') if context.connection is not None else None
+        if starts:
+            starts.pop()
+        QUERY_ERRORS.labels(_endpoint()).inc()
+
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_queries = 0
+    IN_FLIGHT.inc()
+
+
+def _record_response(response):
+    g.metrics_status = response.status_code
+    # Streamed responses (exports, event streams) have no known length
+    if response.content_length is not None:
+        RESPONSE_SIZE.labels(request.method, _endpoint()).observe(response.content_length)
+    return response
+
+
+def _finish_request(exception=None):
+    # Teardown runs even when the view raised, so the gauge never leaks
+    if 'metrics_start' not in g:
+        return
+    endpoint = _endpoint()
+    status = g.get('metrics_status', 500)
+    REQUEST_LATENCY.labels(request.method, endpoint, str(status)).observe(
+        time.perf_counter() - g.metrics_start
+    )
+    REQUEST_QUERIES.labels(endpoint).observe(g.metrics_queries)
+    IN_FLIGHT.dec()
+
+
+def _registry():
+    """Get the registry to expose, aggregating per-process files in multiprocess mode"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def metrics_view():
+    """Expose metrics in the Prometheus text format"""
+    return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def start_worker_metrics(port):
+    """
+    Expose a Celery worker's metrics (such as layer cache hits) over HTTP
+
+    Run in the worker's main process. Prefork pool processes only report
+    through PROMETHEUS_MULTIPROC_DIR, so set it for workers with a pool.
+
+    Args:
+        port: Port to listen on; 0 disables the exporter
+    """
+    if port:
+        start_http_server(port, registry=_registry())
+
+
+def mark_process_dead(pid):
+    """Drop a finished process' live gauges in multiprocess mode"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
+
+
+def init_metrics(app, *engines):
+    """
+    Instrument a Flask app and expose /metrics
+
+    Register before other after_request hooks (such as compression) so
+    response sizes are measured as sent.
+
+    Args:
+        app: Flask application
+        *engines: SQLAlchemy engines to instrument (None entries are skipped)
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    app.before_request(_start_request)
+    app.after_request(_record_response)
+    app.teardown_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+    for engine in engines:
+        if engine is not None:
+            instrument_engine(engine)
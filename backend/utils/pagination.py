@@ -0,0 +1,82 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at, record_id):
+    """
+    Encode a keyset pagination cursor
+
+    Args:
+        created_at: created_at of the last record on the page
+        record_id: ID of the last record on the page
+
+    Returns:
+        Opaque URL-safe cursor string
+    """
+    token = json.dumps([created_at.isoformat(), record_id])
+    return base64.urlsafe_b64encode(token.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor string
+
+    Returns:
+        (created_at, record_id) tuple
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(created_at), str(record_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def parse_page_size(value):
+    """
+    Parse and clamp a requested page size
+
+    Args:
+        value: Raw limit value (e.g., from the query string) or None
+
+    Returns:
+        Page size between 1 and MAX_PAGE_SIZE
+
+    Raises:
+        ValueError: If the value is not an integer
+    """
+    if value is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(value), MAX_PAGE_SIZE))
+
+
+def after_cursor(created_at_column, id_column, cursor):
+    """
+    Build the keyset condition for records after a cursor (newest first)
+
+    Args:
+        created_at_column: created_at column of the listed model
+        id_column: ID column of the listed model
+        cursor: Cursor string from encode_cursor
+
+    Returns:
+        SQLAlchemy boolean expression
+    """
+    created_at, record_id = decode_cursor(cursor)
+    # Expanded row comparison so it works on any backend and can use
+    # a (created_at, id) index
+    return or_(
+        created_at_column < created_at,
+        and_(created_at_column == created_at, id_column < record_id)
+    )
@@ -0,0 +1,97 @@
+import re
+
+# Step IDs are referenced by other steps and shown in status responses
+STEP_ID_PATTERN = re.compile(r'^[A-Za-z][\w-]{0,49}$')
+
+# Upper bound on steps in one pipeline
+MAX_PIPELINE_STEPS = 20
+
+
+def step_dependencies(step):
+    """
+    Get the IDs of the steps a pipeline step reads from
+
+    Args:
+        step: Step definition
+
+    Returns:
+        List of upstream step IDs, inputs first, then targets
+    """
+    return list(step.get('inputs') or []) + list(step.get('targets') or [])
+
+
+def validate_pipeline(steps, analysis_types):
+    """
+    Validate a pipeline definition and order its steps into stages
+
+    Each step is {"id", "type", "parameters", "inputs", "targets", "keep"}.
+    "inputs" and "targets" name upstream steps whose output layers become
+    the step's source and target layers.
+
+    Args:
+        steps: List of step definitions
+        analysis_types: Supported analysis types
+
+    Returns:
+        List of stages, each a list of step IDs whose dependencies are all
+        in earlier stages; steps within a stage can run in parallel
+
+    Raises:
+        ValueError: If the definition is malformed or has a cycle
+    """
+    if not isinstance(steps, list) or not steps:
+        raise ValueError("steps must be a non-empty list")
+    if len(steps) > MAX_PIPELINE_STEPS:
+        raise ValueError(f"A pipeline can have at most {MAX_PIPELINE_STEPS} steps")
+
+    by_id = {}
+    for step in steps:
+        if not isinstance(step, dict):
+            raise ValueError("Each step must be an object")
+        step_id = step.get('id')
+        if not isinstance(step_id, str) or not STEP_ID_PATTERN.match(step_id):
+            raise ValueError(f"Invalid step id: {step_id}")
+        if step_id in by_id:
+            raise ValueError(f"Duplicate step id: {step_id}")
+        if step.get('type') not in analysis_types:
+            raise ValueError(f"Unsupported analysis type in step {step_id}: {step.get('type')}")
+        if not isinstance(step.get('parameters') or {}, dict):
+            raise ValueError(f"parameters of step {step_id} must be an object")
+        by_id[step_id] = step
+
+    for step_id, step in by_id.items():
+        for dependency in step_dependencies(step):
+            if dependency not in by_id:
+                raise ValueError(f"Step {step_id} depends on unknown step {dependency}")
+
+    # Kahn's algorithm, one stage per round
+    remaining = {step_id: set(step_dependencies(step)) for step_id, step in by_id.items()}
+    stages = []
+    while remaining:
+        ready = [step_id for step_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Pipeline has a cycle between steps: {', '.join(sorted(remaining))}")
+        stages.append(ready)
+        for step_id in ready:
+            del remaining[step_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return stages
+
+
+def temporary_steps(steps):
+    """
+    Get the steps whose outputs are intermediate results
+
+    A step's output is temporary when another step consumes it and the step
+    is not marked "keep"; temporary layers are removed when the pipeline ends.
+
+    Args:
+        steps: List of step definitions
+
+    Returns:
+        Set of step IDs
+    """
+    consumed = {dependency for step in steps for dependency in step_dependencies(step)}
+    return {step['id'] for step in steps if step['id'] in consumed and not step.get('keep')}
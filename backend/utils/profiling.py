@@ -0,0 +1,232 @@
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Profiler of the job running in the current context, if profiling is on
+current_profiler = ContextVar('current_profiler', default=None)
+
+# Frames kept per sampled stack, innermost last
+MAX_STACK_DEPTH = 40
+
+# tracemalloc is process-wide: it runs while any profiler traces memory
+_tracing_lock = threading.Lock()
+_tracing_profilers = 0
+_started_tracing = False
+
+
+def _acquire_tracing():
+    """Start tracemalloc for one more profiler, unless it is already running"""
+    global _tracing_profilers, _started_tracing
+    with _tracing_lock:
+        if _tracing_profilers == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_profilers += 1
+        if _tracing_profilers == 1:
+            tracemalloc.reset_peak()
+
+
+def _release_tracing():
+    """Stop tracemalloc once the last profiler that started it is done"""
+    global _tracing_profilers, _started_tracing
+    with _tracing_lock:
+        _tracing_profilers -= 1
+        if _tracing_profilers == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def _sole_tracer():
+    """Check whether a single profiler traces memory, so peaks are its own"""
+    return _tracing_profilers == 1
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class StageProfiler:
+    """
+    Times the stages of a job (load, transform, compute, write, ...)
+
+    Records wall time and call count per stage, peak traced memory per stage
+    and for the whole job, and optionally a sampled CPU profile of the
+    profiled thread. Repeated stages (e.g. one write per chunk) accumulate.
+    Stages may run on several threads at once (e.g. parallel file uploads);
+    their times then add up, and per-stage memory peaks overlap.
+
+    tracemalloc is shared by the process: it is started for the first
+    profiler tracing memory and stopped after the last one. While several
+    profiled jobs run at once, peaks are not reset between stages and cover
+    the memory of all of them.
+    """
+
+    def __init__(self, trace_memory=True, cpu_sampling=False, sample_interval=0.01, top_stacks=20):
+        """
+        Initialize the StageProfiler
+
+        Args:
+            trace_memory: Record peak memory with tracemalloc
+            cpu_sampling: Sample the profiled thread's stack while active
+            sample_interval: Seconds between CPU samples
+            top_stacks: Number of most frequent stacks kept in the report
+        """
+        self.trace_memory = trace_memory
+        self.cpu_sampling = cpu_sampling
+        self.sample_interval = sample_interval
+        self.top_stacks = top_stacks
+        self.stages = {}
+        self.total_seconds = 0.0
+        self.peak_memory = None
+        self._sampler = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """
+        Make this the current profiler for the enclosed job
+
+        Code anywhere in the job marks stages with profile_stage().
+        """
+        token = current_profiler.set(self)
+        if self.trace_memory:
+            _acquire_tracing()
+        if self.cpu_sampling:
+            self._sampler = _StackSampler(threading.get_ident(), self.sample_interval)
+            self._sampler.start()
+
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_seconds += time.perf_counter() - start
+            if self._sampler:
+                self._sampler.stop()
+            if self.trace_memory:
+                peak = max([tracemalloc.get_traced_memory()[1]] + [
+                    stage.get("peak_memory_bytes", 0) for stage in self.stages.values()
+                ])
+                self.peak_memory = max(self.peak_memory or 0, peak)
+                _release_tracing()
+            current_profiler.reset(token)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a stage of the job
+
+        Args:
+            name: Stage name
+        """
+        if self.trace_memory and tracemalloc.is_tracing():
+            # Keep the job-wide peak before narrowing it to this stage; the
+            # peak is only reset when no other profiled job relies on it
+            self.peak_memory = max(self.peak_memory or 0, tracemalloc.get_traced_memory()[1])
+            if _sole_tracer():
+                tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+                entry["seconds"] += elapsed
+                entry["calls"] += 1
+                if self.trace_memory and tracemalloc.is_tracing():
+                    peak = tracemalloc.get_traced_memory()[1]
+                    entry["peak_memory_bytes"] = max(entry.get("peak_memory_bytes", 0), peak)
+
+    def report(self):
+        """
+        Get the profile
+
+        Returns:
+            Dictionary with total_seconds, stages, peak_memory_bytes and, if
+            sampled, cpu_profile ({"samples", "interval", "stacks"})
+        """
+        profile = {
+            "total_seconds": round(self.total_seconds, 6),
+            "stages": {
+                name: {**entry, "seconds": round(entry["seconds"], 6)}
+                for name, entry in self.stages.items()
+            },
+        }
+        if self.peak_memory is not None:
+            profile["peak_memory_bytes"] = self.peak_memory
+        if self._sampler:
+            profile["cpu_profile"] = {
+                "samples": self._sampler.samples,
+                "interval": self.sample_interval,
+                # Collapsed stacks (root;...;leaf), as used by flame graph tools
+                "stacks": [
+                    {"stack": stack, "samples": count}
+                    for stack, count in self._sampler.stacks.most_common(self.top_stacks)
+                ],
+            }
+        return profile
+
+
+@contextmanager
+def profile_stage(name):
+    """
+    Time a stage with the current profiler; does nothing when profiling is off
+
+    Args:
+        name: Stage name (load, transform, compute, write, ...)
+    """
+    profiler = current_profiler.get()
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
+
+
+def profiler_from_config(config, timings_only=False):
+    """
+    Build a StageProfiler from app config
+
+    Args:
+        config: Flask app config
+        timings_only: Skip memory tracing and CPU sampling, which slow down
+            every thread of the process (for profiles clients ask for)
+
+    Returns:
+        StageProfiler
+    """
+    return StageProfiler(
+        trace_memory=config.get('PROFILE_TRACE_MEMORY', True) and not timings_only,
+        cpu_sampling=config.get('PROFILE_CPU_SAMPLING', False) and not timings_only,
+        sample_interval=config.get('PROFILE_SAMPLE_INTERVAL', 0.01),
+    )
@@ -0,0 +1,193 @@
+import io
+import numpy as np
+import rasterio
+from rasterio.shutil import copy as copy_dataset
+from rasterio.warp import transform_bounds
+from rasterio.windows import Window
+from PIL import Image
+
+TILE_SIZE = 256
+
+# Half the width of the Web Mercator (EPSG:3857) world, in meters
+WEB_MERCATOR_EXTENT = 20037508.342789244
+
+# Encoded tile formats: extension -> (Pillow format, media type, save options)
+TILE_FORMATS = {
+    'png': ('PNG', 'image/png', {'compress_level': 3}),
+    'webp': ('WEBP', 'image/webp', {'quality': 85}),
+}
+
+# Cloud-optimized GeoTIFF layout: internal tiles plus overviews, so a tile
+# read fetches only the blocks of one overview level
+COG_OPTIONS = {
+    'compress': 'DEFLATE',
+    'predictor': 'YES',
+    'blocksize': 512,
+    'overviews': 'AUTO',
+    'bigtiff': 'IF_SAFER',
+}
+
+# Summaries read an overview of at most this many pixels per side
+SUMMARY_MAX_SIZE = 1024
+
+
+def tile_bounds(z, x, y):
+    """
+    Get the EPSG:3857 bounds of an XYZ tile
+
+    Returns:
+        (minx, miny, maxx, maxy) tuple
+    """
+    size = 2 * WEB_MERCATOR_EXTENT / 2 ** z
+    minx = -WEB_MERCATOR_EXTENT + x * size
+    maxy = WEB_MERCATOR_EXTENT - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def convert_to_cog(src_path, dst_path):
+    """
+    Write a raster as a cloud-optimized GeoTIFF
+
+    Args:
+        src_path: Any raster GDAL can read
+        dst_path: Output path
+    """
+    copy_dataset(src_path, dst_path, driver='COG', **COG_OPTIONS)
+
+
+def raster_summary(path):
+    """
+    Summarize a raster from its smallest useful overview
+
+    Args:
+        path: Raster path
+
+    Returns:
+        Dictionary with extent (EPSG:4326), band count, dtype, nodata and the
+        first band's min/max
+    """
+    with rasterio.open(path) as src:
+        # Read at most SUMMARY_MAX_SIZE pixels per side; GDAL picks the overview
+        scale = max(1, max(src.width, src.height) / SUMMARY_MAX_SIZE)
+        out_shape = (max(1, int(src.height / scale)), max(1, int(src.width / scale)))
+        data = src.read(1, out_shape=out_shape, masked=True,
+                        window=Window(0, 0, src.width, src.height))
+        valid = data.compressed()
+        extent = list(transform_bounds(src.crs, 'EPSG:4326', *src.bounds, densify_pts=21)) if src.crs else None
+        return {
+            "extent": extent,
+            "count": src.count,
+            "dtype": src.dtypes[0],
+            "nodata": src.nodata,
+            "min": float(valid.min()) if valid.size else None,
+            "max": float(valid.max()) if valid.size else None,
+        }
+
+
+def _hex_to_rgb(color):
+    color = color.lstrip('#')
+    return [int(color[i:i + 2], 16) for i in (0, 2, 4)]
+
+
+def gradient_lut(stops, size=256):
+    """
+    Build a color lookup table from gradient stops
+
+    Args:
+        stops: [{"value", "color"}, ...] from low to high
+        size: Number of entries
+
+    Returns:
+        (lut, min, max): uint8 array of shape (size, 3) spanning min..max
+    """
+    values = np.array([stop["value"] for stop in stops], dtype='float64')
+    colors = np.array([_hex_to_rgb(stop["color"]) for stop in stops], dtype='float64')
+    samples = np.linspace(values[0], values[-1], size)
+    lut = np.stack([np.interp(samples, values, colors[:, channel]) for channel in range(3)], axis=1)
+    return lut.round().astype('uint8'), values[0], values[-1]
+
+
+def apply_style(data, mask, style, opacity=255):
+    """
+    Color a single-band array with a layer style, vectorized with NumPy
+
+    Gradient styles scale values into a 256-entry lookup table; categorical
+    styles color listed values and leave the rest transparent. Without a
+    style the data is stretched to grayscale over its own range.
+
+    Args:
+        data: 2D array of band values
+        mask: Boolean array, True where there is no data
+        style: Layer style dictionary (or None)
+        opacity: Alpha for valid pixels
+
+    Returns:
+        uint8 RGBA array of shape data.shape + (4,)
+    """
+    rgba = np.zeros(data.shape + (4,), dtype='uint8')
+    style = style or {}
+
+    if style.get("type") == 'categorical':
+        values = style.get("values") or {}
+        keys = np.array([float(key) for key in values], dtype='float64')
+        order = np.argsort(keys)
+        keys = keys[order]
+        colors = np.array([_hex_to_rgb(entry["color"]) for entry in values.values()], dtype='uint8')[order]
+        if keys.size:
+            index = np.clip(np.searchsorted(keys, data), 0, keys.size - 1)
+            matched = (keys[index] == data) & ~mask
+            rgba[..., :3] = colors[index]
+            rgba[..., 3] = np.where(matched, opacity, 0)
+        return rgba
+
+    if style.get("type") == 'gradient' and style.get("stops"):
+        lut, low, high = gradient_lut(style["stops"])
+    else:
+        valid = data[~mask]
+        low, high = (float(valid.min()), float(valid.max())) if valid.size else (0.0, 1.0)
+        lut = np.repeat(np.arange(256, dtype='uint8')[:, None], 3, axis=1)
+
+    span = (high - low) or 1.0
+    index = np.clip((data.astype('float64') - low) * (255.0 / span), 0, 255).astype('uint8')
+    rgba[..., :3] = lut[index]
+    rgba[..., 3] = np.where(mask, 0, opacity)
+    return rgba
+
+
+def stretch_rgb(data, mask, style, opacity=255):
+    """
+    Scale a 3-band array to an RGBA image (for imagery)
+
+    Args:
+        data: Array of shape (3, height, width)
+        mask: Boolean array, True where there is no data
+        style: Layer style; "min"/"max" set the stretch (default 0..255)
+        opacity: Alpha for valid pixels
+
+    Returns:
+        uint8 RGBA array
+    """
+    style = style or {}
+    low, high = style.get("min", 0), style.get("max", 255)
+    scaled = np.clip((data.astype('float64') - low) * (255.0 / ((high - low) or 1.0)), 0, 255)
+    rgba = np.empty(data.shape[1:] + (4,), dtype='uint8')
+    rgba[..., :3] = np.moveaxis(scaled, 0, -1).astype('uint8')
+    rgba[..., 3] = np.where(mask, 0, opacity)
+    return rgba
+
+
+def encode_image(rgba, tile_format):
+    """
+    Encode an RGBA array as PNG or WebP
+
+    Args:
+        rgba: uint8 array of shape (height, width, 4)
+        tile_format: Key of TILE_FORMATS
+
+    Returns:
+        Encoded bytes
+    """
+    pil_format, _, options = TILE_FORMATS[tile_format]
+    buffer = io.BytesIO()
+    Image.fromarray(rgba, 'RGBA').save(buffer, format=pil_format, **options)
+    return buffer.getvalue()
@@ -0,0 +1,101 @@
+import decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+# Options shared by every orjson call: allow int/UUID dict keys (Flask allows them)
+# and encode NumPy scalars/arrays coming out of the analysis code natively
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson else 0
+)
+
+
+def _orjson_default(obj):
+    """
+    Fallback for types orjson does not serialize natively
+
+    Args:
+        obj: Object that orjson could not encode
+
+    Returns:
+        JSON-serializable representation of the object
+    """
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__geo_interface__'):
+        # Shapely geometries and similar objects
+        return obj.__geo_interface__
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def orjson_dumps(obj):
+    """
+    Serialize an object to JSON bytes with orjson
+
+    Args:
+        obj: Object to serialize
+
+    Returns:
+        UTF-8 encoded JSON bytes
+    """
+    return orjson.dumps(obj, default=_orjson_default, option=ORJSON_OPTIONS)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson
+
+    Datetimes, dates, UUIDs, dataclasses and NumPy values are encoded natively
+    by orjson. Keys are not sorted, which keeps large FeatureCollections cheap
+    to encode.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson_dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Build the response from bytes directly instead of going through
+        # dumps() and re-encoding the resulting str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson_dumps(obj), mimetype=self.mimetype)
+
+
+# Providers selectable through the JSON_ENCODER setting
+JSON_PROVIDERS = {
+    'default': DefaultJSONProvider,
+    'orjson': OrjsonProvider,
+}
+
+
+def configure_json(app):
+    """
+    Install the JSON provider selected by the JSON_ENCODER setting
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The installed JSON provider
+    """
+    name = app.config.get('JSON_ENCODER', 'orjson')
+    provider_class = JSON_PROVIDERS.get(name)
+    if provider_class is None:
+        raise ValueError(f"Unknown JSON encoder: {name}")
+
+    if provider_class is OrjsonProvider and orjson is None:
+        app.logger.warning("orjson is not installed, using the default JSON encoder")
+        provider_class = DefaultJSONProvider
+
+    app.json = provider_class(app)
+    return app.json
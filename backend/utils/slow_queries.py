@@ -0,0 +1,199 @@
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from flask import has_request_context, request
+from sqlalchemy import event, text
+
+logger = logging.getLogger(__name__)
+
+# Only plain reads are explained: EXPLAIN ANALYZE executes the statement
+EXPLAINABLE_PATTERN = re.compile(r'^\s*(select|with)\b', re.IGNORECASE)
+WRITE_PATTERN = re.compile(r'\b(insert|update|delete|merge)\b', re.IGNORECASE)
+
+# Logged statements and parameters are truncated (WKB and id lists get large)
+MAX_LOGGED_CHARS = 2000
+
+# Execution option that keeps a statement out of the slow-query log
+SKIP_OPTION = 'skip_slow_query_log'
+
+
+def _truncate(value):
+    value = str(value)
+    if len(value) <= MAX_LOGGED_CHARS:
+        return value
+    return f"{value[:MAX_LOGGED_CHARS]}... ({len(value)} chars)"
+
+
+def is_explainable(statement):
+    """Check whether a statement is a read that is safe to EXPLAIN ANALYZE"""
+    return bool(EXPLAINABLE_PATTERN.match(statement)) and not WRITE_PATTERN.search(statement)
+
+
+class SlowQueryLog:
+    """
+    Logs statements slower than a threshold and captures their query plans
+
+    Plans are captured with EXPLAIN (ANALYZE, BUFFERS) on a background thread,
+    for a sampled fraction of slow reads, at most once per statement per
+    cooldown, and with a statement timeout, so the log adds no latency to the
+    request and bounded load to the database.
+    """
+
+    def __init__(self, engine, threshold_ms, sample_rate=0.1, cooldown=300,
+                 explain_timeout_ms=30000, queue_size=10):
+        """
+        Initialize the SlowQueryLog
+
+        Args:
+            engine: SQLAlchemy engine to watch and to run EXPLAIN on
+            threshold_ms: Statements slower than this are logged
+            sample_rate: Fraction of slow reads whose plan is captured
+            cooldown: Seconds before the same statement is explained again
+            explain_timeout_ms: statement_timeout for the EXPLAIN run
+            queue_size: Pending EXPLAINs; slow queries beyond it are only logged
+        """
+        self.engine = engine
+        self.threshold = threshold_ms / 1000.0
+        self.sample_rate = sample_rate
+        self.cooldown = cooldown
+        self.explain_timeout_ms = explain_timeout_ms
+        self.queue_size = queue_size
+        self._queue = None
+        self._worker_pid = None
+        self._last_explained = {}
+        self._lock = threading.Lock()
+
+    def install(self):
+        """Register the engine event listeners"""
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(self.engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(self.engine, 'handle_error', self._handle_error)
+
+    def _skipped(self, context):
+        return context is not None and context.execution_options.get(SKIP_OPTION, False)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not self._skipped(context):
+            conn.info.setdefault('slow_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self._skipped(context):
+            return
+        starts = conn.info.get('slow_query_start')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < self.threshold:
+            return
+
+        endpoint = request.endpoint if has_request_context() else '<background>'
+        logger.warning(
+            "Slow query (%.0f ms, %s): %s; parameters: %s",
+            elapsed * 1000, endpoint, _truncate(statement), _truncate(parameters)
+        )
+        if not executemany and is_explainable(statement) and self._should_explain(statement):
+            self._enqueue(statement, parameters, elapsed)
+
+    def _handle_error(self, context):
+        # A failed statement never reaches after_cursor_execute: drop its start
+        if context.connection is None or self._skipped(context.execution_context):
+            return
+        starts = context.connection.info.get('slow_query_start')
+        if starts:
+            starts.pop()
+
+    def _should_explain(self, statement):
+        if random.random() >= self.sample_rate:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_explained.get(statement)
+            if last is not None and now - last < self.cooldown:
+                return False
+            self._last_explained[statement] = now
+            # Keep the cooldown table from growing without bound
+            if len(self._last_explained) > 1000:
+                self._last_explained = {
+                    key: value for key, value in self._last_explained.items()
+                    if now - value < self.cooldown
+                }
+        return True
+
+    def _enqueue(self, statement, parameters, elapsed):
+        with self._lock:
+            # Workers fork after import; each process needs its own thread
+            if self._worker_pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.queue_size)
+                threading.Thread(target=self._run, name='slow-query-explain', daemon=True).start()
+                self._worker_pid = os.getpid()
+        try:
+            self._queue.put_nowait((statement, parameters, elapsed))
+        except queue.Full:
+            logger.debug("Slow query EXPLAIN queue is full, skipping plan capture")
+
+    def _run(self):
+        while True:
+            statement, parameters, elapsed = self._queue.get()
+            try:
+                plan = self.explain(statement, parameters)
+                logger.warning(
+                    "Plan for slow query (%.0f ms): %s\n%s",
+                    elapsed * 1000, _truncate(statement), plan
+                )
+            except Exception as e:
+                logger.warning("Could not EXPLAIN slow query: %s", e)
+
+    def explain(self, statement, parameters):
+        """
+        Run EXPLAIN (ANALYZE, BUFFERS) for a statement
+
+        The statement runs again in a read-only transaction that is rolled back.
+
+        Args:
+            statement: SQL as sent to the driver
+            parameters: Driver parameters it was executed with
+
+        Returns:
+            Query plan as text
+        """
+        with self.engine.connect() as connection:
+            connection = connection.execution_options(**{SKIP_OPTION: True})
+            with connection.begin() as transaction:
+                connection.execute(text("SET TRANSACTION READ ONLY"))
+                connection.execute(text(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}"))
+                result = connection.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) {statement}", parameters
+                )
+                plan = "\n".join(row[0] for row in result)
+                transaction.rollback()
+        return plan
+
+
+def init_slow_query_log(app, engine):
+    """
+    Log slow statements on an engine, as configured by SLOW_QUERY_* settings
+
+    Args:
+        app: Flask application
+        engine: SQLAlchemy engine
+
+    Returns:
+        SlowQueryLog, or None when SLOW_QUERY_THRESHOLD_MS is 0
+    """
+    threshold_ms = app.config.get('SLOW_QUERY_THRESHOLD_MS', 0)
+    if not threshold_ms or engine.dialect.name != 'postgresql':
+        return None
+
+    slow_query_log = SlowQueryLog(
+        engine,
+        threshold_ms,
+        sample_rate=app.config.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0.1),
+        cooldown=app.config.get('SLOW_QUERY_EXPLAIN_COOLDOWN', 300),
+        explain_timeout_ms=app.config.get('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', 30000),
+    )
+    slow_query_log.install()
+    return slow_query_log
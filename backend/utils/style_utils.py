@@ -0,0 +1,112 @@
+# ColorBrewer "Paired", as used by the land-use layers
+CATEGORICAL_PALETTE = [
+    "#A6CEE3", "#1F78B4", "#B2DF8A", "#33A02C", "#FB9A99", "#E31A1C",
+    "#FDBF6F", "#FF7F00", "#CAB2D6", "#6A3D9A", "#FFFF99", "#B15928"
+]
+
+# ColorBrewer "Reds", low to high
+GRADIENT_PALETTE = ["#FEE5D9", "#FCAE91", "#FB6A4A", "#DE2D26", "#A50F15"]
+
+# Viridis, low to high, for continuous rasters (elevation, indices)
+RASTER_PALETTE = ["#440154", "#3B528B", "#21908C", "#5DC963", "#FDE725"]
+
+# Identifier columns are never useful to style by
+IDENTIFIER_ATTRIBUTES = {'id', 'fid', 'gid', 'objectid'}
+
+
+def categorical_style(property_name, values, opacity=0.7):
+    """
+    Build a categorical style for a layer
+
+    Args:
+        property_name: Attribute to classify by
+        values: Distinct attribute values
+        opacity: Fill opacity
+
+    Returns:
+        Style dictionary
+    """
+    return {
+        "property": property_name,
+        "type": "categorical",
+        "values": {
+            str(value): {
+                "color": CATEGORICAL_PALETTE[i % len(CATEGORICAL_PALETTE)],
+                "opacity": opacity
+            }
+            for i, value in enumerate(values)
+        }
+    }
+
+
+def gradient_style(property_name, min_value, max_value, palette=GRADIENT_PALETTE):
+    """
+    Build a gradient style spanning an attribute's value range
+
+    Args:
+        property_name: Attribute to color by
+        min_value: Smallest attribute value
+        max_value: Largest attribute value
+        palette: Colors from low to high
+
+    Returns:
+        Style dictionary
+    """
+    steps = len(palette) - 1
+    return {
+        "property": property_name,
+        "type": "gradient",
+        "stops": [
+            {"value": min_value + (max_value - min_value) * i / steps, "color": color}
+            for i, color in enumerate(palette)
+        ]
+    }
+
+
+def raster_style(min_value, max_value, band=1, palette=RASTER_PALETTE):
+    """
+    Build a gradient style for one band of a raster layer
+
+    Args:
+        min_value: Smallest band value
+        max_value: Largest band value
+        band: Band to color (1-based)
+        palette: Colors from low to high
+
+    Returns:
+        Style dictionary
+    """
+    style = gradient_style(f"band{band}", min_value, max_value, palette=palette)
+    style["band"] = band
+    return style
+
+
+def build_default_style(statistics):
+    """
+    Choose a default style from a layer's statistics
+
+    Prefers a low-cardinality text attribute (categorical), then a numeric
+    attribute with a non-empty range (gradient).
+
+    Args:
+        statistics: Layer statistics dictionary
+
+    Returns:
+        Style dictionary, or None if no attribute is suitable
+    """
+    attributes = {
+        name: attribute
+        for name, attribute in ((statistics or {}).get("attributes") or {}).items()
+        if name.lower() not in IDENTIFIER_ATTRIBUTES
+    }
+
+    for name, attribute in attributes.items():
+        values = attribute.get("values")
+        if attribute["type"] == 'string' and values and 1 < len(values) <= len(CATEGORICAL_PALETTE):
+            return categorical_style(name, values)
+
+    for name, attribute in attributes.items():
+        if attribute["type"] == 'number' and attribute.get("min") != attribute.get("max"):
+            return gradient_style(name, attribute["min"], attribute["max"])
+
+    return None
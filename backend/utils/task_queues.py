@@ -0,0 +1,76 @@
+from kombu import Queue
+
+# Queues by cost class. Each queue gets its own worker pool (see
+# docker-compose.yml) so long jobs cannot starve interactive ones.
+LIGHT_QUEUE = 'analysis.light'
+HEAVY_QUEUE = 'analysis.heavy'
+DEFAULT_QUEUE = 'default'
+
+# Analysis types that are expensive regardless of input size
+HEAVY_ANALYSIS_TYPES = {'clustering', 'heatmap', 'zonal_statistics'}
+
+# Redis emulates priorities with one list per step; 0 is served first
+PRIORITY_STEPS = list(range(10))
+
+# Default seconds before Redis redelivers an unacknowledged task
+VISIBILITY_TIMEOUT = 12 * 3600
+
+
+def configure_queues(celery, config):
+    """
+    Apply queue, routing and prefetch settings to a Celery app
+
+    Args:
+        celery: Celery application
+        config: Flask app config
+    """
+    celery.conf.update(
+        task_queues=(
+            Queue(DEFAULT_QUEUE),
+            Queue(LIGHT_QUEUE),
+            Queue(HEAVY_QUEUE),
+        ),
+        task_default_queue=DEFAULT_QUEUE,
+        task_default_priority=5,
+        broker_transport_options={
+            'priority_steps': PRIORITY_STEPS,
+            'queue_order_strategy': 'priority',
+            # With late acks a task stays unacknowledged while it runs; Redis
+            # hands it to another worker once this expires, so it must be
+            # longer than the longest analysis or export
+            'visibility_timeout': config.get('TASK_VISIBILITY_TIMEOUT', VISIBILITY_TIMEOUT),
+        },
+        # Only reserve one task per process so a long task never holds
+        # queued work hostage; overridden per pool with --prefetch-multiplier
+        worker_prefetch_multiplier=config.get('TASK_PREFETCH_MULTIPLIER', 1),
+        # Acknowledge after completion so a crashed worker's task is redelivered
+        task_acks_late=True,
+        task_reject_on_worker_lost=True,
+    )
+
+
+def select_queue(analysis_type, feature_count, heavy_threshold):
+    """
+    Choose the queue and priority for an analysis
+
+    Args:
+        analysis_type: Type of analysis
+        feature_count: Number of input features (0 if unknown)
+        heavy_threshold: Feature count above which any analysis is heavy
+
+    Returns:
+        (queue name, priority) tuple, lower priority values run first
+    """
+    feature_count = feature_count or 0
+    queue = HEAVY_QUEUE if (
+        analysis_type in HEAVY_ANALYSIS_TYPES or feature_count > heavy_threshold
+    ) else LIGHT_QUEUE
+
+    # Within a queue, smaller inputs go first so quick jobs stay interactive
+    if feature_count <= heavy_threshold // 100:
+        priority = 2
+    elif feature_count <= heavy_threshold:
+        priority = 5
+    else:
+        priority = 8
+    return queue, priority
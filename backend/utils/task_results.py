@@ -0,0 +1,29 @@
+def fetch_task_metas(backend, task_ids):
+    """
+    Read the stored state of many Celery tasks at once
+
+    Key-value backends (Redis) are read with a single MGET; other backends
+    fall back to one lookup per task.
+
+    Args:
+        backend: Celery result backend
+        task_ids: Celery task IDs
+
+    Returns:
+        Dictionary mapping task ID to its meta (status, result); tasks with
+        no stored state (pending or expired) are omitted
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return {}
+
+    if not hasattr(backend, 'mget'):
+        metas = {task_id: backend.get_task_meta(task_id) for task_id in task_ids}
+        return {task_id: meta for task_id, meta in metas.items() if meta['status'] != 'PENDING'}
+
+    values = backend.mget([backend.get_key_for_task(task_id) for task_id in task_ids])
+    return {
+        task_id: backend.meta_from_decoded(backend.decode_result(value))
+        for task_id, value in zip(task_ids, values)
+        if value is not None
+    }
@@ -0,0 +1,240 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import rasterio
+import shapely
+from rasterio.errors import WindowError
+from rasterio.features import rasterize
+from rasterio.windows import Window, bounds as window_bounds, from_bounds, transform as window_transform
+
+# Statistics zonal_statistics can report
+ZONAL_STATISTICS = ('count', 'sum', 'mean', 'min', 'max')
+
+# Window size for rasters without internal tiling (striped GeoTIFFs)
+DEFAULT_BLOCK_SIZE = 512
+
+
+def _block_windows(src, zones_bounds, block_size=None):
+    """
+    List the block-aligned windows of a raster that overlap a bounding box
+
+    Tiled rasters are read along their internal blocks, so every window
+    decodes whole blocks exactly once.
+    """
+    if block_size is None:
+        height, width = src.block_shapes[0]
+        if not src.profile.get('tiled'):
+            height = width = DEFAULT_BLOCK_SIZE
+    else:
+        height = width = block_size
+
+    try:
+        area = from_bounds(*zones_bounds, transform=src.transform)
+        area = area.intersection(Window(0, 0, src.width, src.height))
+    except WindowError:
+        # The zones are outside the raster
+        return []
+    row_start = int(area.row_off // height) * height
+    col_start = int(area.col_off // width) * width
+    row_stop = int(np.ceil(area.row_off + area.height))
+    col_stop = int(np.ceil(area.col_off + area.width))
+    return [
+        Window(col, row, min(width, src.width - col), min(height, src.height - row))
+        for row in range(row_start, row_stop, height)
+        for col in range(col_start, col_stop, width)
+    ]
+
+
+def _zone_groups(geometries, all_touched=False):
+    """
+    Color zones so that zones sharing a pixel never share a color
+
+    Each color can then be rasterized to one label array without zones
+    overwriting each other. Zones that only touch can share a pixel only
+    with all_touched. Colors are assigned greedily in zone order, so
+    zones without overlaps all get color 0.
+
+    Args:
+        geometries: Zone polygons (no missing or empty ones)
+        all_touched: Whether zones include every pixel they touch
+
+    Returns:
+        int array of colors, one per zone
+    """
+    colors = np.zeros(len(geometries), dtype='int32')
+    left, right = shapely.STRtree(geometries).query(geometries, predicate='intersects')
+    conflicts = left != right
+    if not all_touched:
+        conflicts &= ~shapely.touches(geometries[left], geometries[right])
+    left, right = left[conflicts], right[conflicts]
+    if not left.size:
+        return colors
+
+    order = np.argsort(left, kind='stable')
+    left, right = left[order], right[order]
+    starts = np.searchsorted(left, np.arange(len(geometries) + 1))
+    for zone in np.unique(left):
+        # Zones are colored in order: only earlier neighbours have a color yet
+        neighbours = right[starts[zone]:starts[zone + 1]]
+        taken = set(colors[neighbours[neighbours < zone]].tolist())
+        color = 0
+        while color in taken:
+            color += 1
+        colors[zone] = color
+    return colors
+
+
+def _reduce_block(data, valid, labels, zone_count):
+    """
+    Reduce one block's pixels per zone label with NumPy
+
+    Args:
+        data: float64 pixel values
+        valid: Boolean array of pixels inside a zone and not nodata
+        labels: int32 array of local zone labels (1-based, 0 outside)
+        zone_count: Number of local labels
+
+    Returns:
+        (local indexes, count, sum, min, max) for zones with valid pixels
+    """
+    labels = labels[valid]
+    values = data[valid]
+    if not labels.size:
+        return None
+
+    count = np.bincount(labels, minlength=zone_count + 1)
+    total = np.bincount(labels, weights=values, minlength=zone_count + 1)
+
+    # Min/max over runs of equal labels
+    order = np.argsort(labels, kind='stable')
+    labels, values = labels[order], values[order]
+    starts = np.flatnonzero(np.concatenate(([True], labels[1:] != labels[:-1])))
+    present = labels[starts]
+    return (
+        present - 1,
+        count[present],
+        total[present],
+        np.minimum.reduceat(values, starts),
+        np.maximum.reduceat(values, starts),
+    )
+
+
+def zonal_statistics(path, geometries, band=1, all_touched=False, workers=4, env_options=None, block_size=None):
+    """
+    Compute per-zone statistics of a raster band, one block at a time
+
+    The raster is read window by window along its internal blocks, and only
+    blocks that overlap a zone are read. In each block the overlapping zones
+    are rasterized to a label array and the pixels are reduced per label
+    with bincount/reduceat, so neither the raster nor a full-size zone mask
+    is ever held in memory. Overlapping zones are split into groups of
+    zones that share no pixel, each rasterized on its own, so every zone
+    counts all of its pixels. Blocks are processed on a thread pool (GDAL
+    reads and the NumPy reductions release the GIL), with one open dataset
+    per thread.
+
+    A zone covers the pixels whose center it contains, or every pixel it
+    touches with all_touched.
+
+    Args:
+        path: Raster path or URI rasterio can open
+        geometries: Zone polygons in the raster's CRS (sequence or GeoSeries)
+        band: Band to summarize (1-based)
+        all_touched: Include every pixel a zone touches
+        workers: Blocks processed at the same time
+        env_options: GDAL configuration options for the reads (optional)
+        block_size: Window size, overriding the raster's block shape (optional)
+
+    Returns:
+        Dictionary of arrays indexed like geometries: count, sum, mean, min
+        and max (NaN for zones without valid pixels), plus blocks_read
+    """
+    geometries = np.asarray(geometries, dtype=object)
+    zone_count = len(geometries)
+    count = np.zeros(zone_count, dtype='int64')
+    total = np.zeros(zone_count, dtype='float64')
+    minimum = np.full(zone_count, np.nan)
+    maximum = np.full(zone_count, np.nan)
+
+    present = np.flatnonzero(~shapely.is_missing(geometries) & ~shapely.is_empty(geometries))
+    groups = np.zeros(zone_count, dtype='int32')
+    if present.size:
+        groups[present] = _zone_groups(geometries[present], all_touched)
+    env_options = env_options or {}
+    blocks = []
+    if present.size:
+        with rasterio.Env(**env_options), rasterio.open(path) as src:
+            windows = _block_windows(src, shapely.total_bounds(geometries[present]), block_size)
+            raster_transform = src.transform
+        if windows:
+            # Zones per block, from one bulk query of the block boxes against the zones
+            boxes = shapely.box(*np.array([window_bounds(w, raster_transform) for w in windows]).T)
+            block_index, zone_index = shapely.STRtree(geometries[present]).query(boxes, predicate='intersects')
+            order = np.argsort(block_index, kind='stable')
+            block_index, zone_index = block_index[order], present[zone_index[order]]
+            splits = np.flatnonzero(np.diff(block_index)) + 1
+            blocks = [
+                (windows[indexes[0]], zones)
+                for indexes, zones in zip(np.split(block_index, splits), np.split(zone_index, splits))
+                if indexes.size
+            ]
+
+    # Datasets are not thread-safe: each thread opens its own
+    local = threading.local()
+    opened = []
+    lock = threading.Lock()
+
+    def process(window, zones):
+        with rasterio.Env(**env_options):
+            if not hasattr(local, 'src'):
+                local.src = rasterio.open(path)
+                with lock:
+                    opened.append(local.src)
+            data = local.src.read(band, window=window, masked=True)
+        values = data.data.astype('float64')
+        readable = ~np.ma.getmaskarray(data) & ~np.isnan(values)
+
+        # One label array per group of zones that share no pixel
+        results = []
+        for group in np.unique(groups[zones]):
+            group_zones = zones[groups[zones] == group]
+            labels = rasterize(
+                zip(geometries[group_zones], range(1, len(group_zones) + 1)),
+                out_shape=data.shape,
+                transform=window_transform(window, raster_transform),
+                fill=0,
+                all_touched=all_touched,
+                dtype='int32'
+            )
+            reduced = _reduce_block(values, readable & (labels > 0), labels, len(group_zones))
+            if reduced is not None:
+                results.append((group_zones[reduced[0]],) + reduced[1:])
+        if not results:
+            return None
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='zonal') as executor:
+            for reduced in executor.map(lambda block: process(*block), blocks):
+                if reduced is None:
+                    continue
+                # Zones are unique within a block, so plain fancy indexing accumulates
+                indexes, block_count, block_total, block_min, block_max = reduced
+                count[indexes] += block_count
+                total[indexes] += block_total
+                minimum[indexes] = np.fmin(minimum[indexes], block_min)
+                maximum[indexes] = np.fmax(maximum[indexes], block_max)
+    finally:
+        for src in opened:
+            src.close()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+    return {
+        "count": count,
+        "sum": total,
+        "mean": mean,
+        "min": minimum,
+        "max": maximum,
+        "blocks_read": len(blocks),
+    }
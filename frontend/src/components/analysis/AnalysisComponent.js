@@ -181,30 +181,69 @@ const AnalysisComponent = () => {
     fetchDatasets();
   }, []);
 
-  // Poll for task status when taskId is available
+  // Follow task status when taskId is available: pushed over Server-Sent
+  // Events, falling back to polling if the event stream is unavailable
   useEffect(() => {
     if (!taskId) return;
 
-    const interval = setInterval(async () => {
-      try {
-        const response = await axios.get(`/api/analysis/status/${taskId}`);
-        setAnalysisStatus(response.data.status);
-        
-        if (response.data.state === 'SUCCESS') {
-          setResults(response.data.result);
-          clearInterval(interval);
-          announceToScreenReader('Analysis completed successfully. Results are now available.');
-        } else if (response.data.state === 'FAILURE') {
-          announceToScreenReader('Analysis failed. Please check the error message and try again.');
+    let interval = null;
+    let events = null;
+
+    const handleStatus = (data) => {
+      if (data.state === 'SUCCESS') {
+        setResults(data.result);
+        announceToScreenReader('Analysis completed successfully. Results are now available.');
+        return true;
+      } else if (data.state === 'FAILURE') {
+        announceToScreenReader('Analysis failed. Please check the error message and try again.');
+        return true;
+      }
+      return false;
+    };
+
+    const startPolling = () => {
+      interval = setInterval(async () => {
+        try {
+          const response = await axios.get(`/api/analysis/status/${taskId}`);
+          setAnalysisStatus(response.data.status);
+          
+          if (handleStatus(response.data)) {
+            clearInterval(interval);
+          }
+        } catch (error) {
+          console.error('Error checking task status:', error);
           clearInterval(interval);
         }
-      } catch (error) {
-        console.error('Error checking task status:', error);
-        clearInterval(interval);
-      }
-    }, 2000);
+      }, 2000);
+    };
 
-    return () => clearInterval(interval);
+    if (window.EventSource) {
+      events = new EventSource(`/api/analysis/events/${taskId}`);
+      events.addEventListener('progress', (event) => {
+        const data = JSON.parse(event.data);
+        if (data.state === 'PROGRESS' && data.progress != null) {
+          setAnalysisStatus(`Analysis is in progress (${Math.round(data.progress)}%)`);
+        }
+        if (data.state === 'SUCCESS' && !data.result) {
+          // Only the initial state was sent; fetch the result once
+          events.close();
+          startPolling();
+        } else if (handleStatus(data)) {
+          events.close();
+        }
+      });
+      events.onerror = () => {
+        events.close();
+        startPolling();
+      };
+    } else {
+      startPolling();
+    }
+
+    return () => {
+      if (events) events.close();
+      if (interval) clearInterval(interval);
+    };
   }, [taskId]);
 
   const handleAnalysisTypeChange = (e) => {